@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Latency Anomaly Detection
+Incremental EWMA baselines that flag targets as DEGRADED before they go DOWN
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Anomaly Detection Configuration
+ANOMALY_DETECTION = os.getenv("ANOMALY_DETECTION", "true").lower() == "true"
+# EWMA smoothing factor: higher reacts faster, lower gives a steadier baseline
+ANOMALY_ALPHA = float(os.getenv("ANOMALY_ALPHA", "0.1"))
+# A sample is anomalous this many standard deviations above the baseline...
+ANOMALY_THRESHOLD = float(os.getenv("ANOMALY_THRESHOLD", "4"))
+# ...and at least this fraction slower than it (ignores jitter on very stable targets)
+ANOMALY_MIN_INCREASE = float(os.getenv("ANOMALY_MIN_INCREASE", "0.5"))
+# Samples needed before the baseline is trusted
+ANOMALY_MIN_SAMPLES = int(os.getenv("ANOMALY_MIN_SAMPLES", "20"))
+# Consecutive anomalous samples before a target is reported DEGRADED
+ANOMALY_CONSECUTIVE = int(os.getenv("ANOMALY_CONSECUTIVE", "2"))
+# Latency above this fraction of the probe timeout is DEGRADED regardless of the baseline,
+# which catches slow creeps the EWMA follows
+ANOMALY_TIMEOUT_FRACTION = float(os.getenv("ANOMALY_TIMEOUT_FRACTION", "0.5"))
+
+
+class LatencyBaseline:
+    """EWMA mean and variance of one target's latency (West's incremental form)"""
+
+    __slots__ = ("mean", "variance", "samples", "streak")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.variance = 0.0
+        self.samples = 0
+        self.streak = 0
+
+    def update(self, value: float, alpha: float) -> None:
+        if self.samples == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.samples += 1
+
+
+class LatencyAnomalyDetector:
+    """Flags latency that is far above a target's EWMA baseline, in O(1) per sample
+
+    Anomalous samples do not move the baseline, so a sustained slowdown stays
+    DEGRADED instead of becoming the new normal. A target seen for the first
+    time is warmed up from its recent probe history when one is available.
+    """
+
+    def __init__(self, history=None, alpha: float = ANOMALY_ALPHA, threshold: float = ANOMALY_THRESHOLD,
+                 min_increase: float = ANOMALY_MIN_INCREASE, min_samples: int = ANOMALY_MIN_SAMPLES,
+                 consecutive: int = ANOMALY_CONSECUTIVE, timeout_fraction: float = ANOMALY_TIMEOUT_FRACTION):
+        self.history = history
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_increase = min_increase
+        self.min_samples = min_samples
+        self.consecutive = consecutive
+        self.timeout_fraction = timeout_fraction
+        self.created_at = time.time()
+        self._baselines: Dict[str, LatencyBaseline] = {}
+        self._lock = threading.Lock()
+
+    def _baseline(self, name: str) -> LatencyBaseline:
+        baseline = self._baselines.get(name)
+        if baseline is None:
+            baseline = self._baselines[name] = LatencyBaseline()
+            if self.history is not None:
+                self._warm_up(name, baseline)
+        return baseline
+
+    def _warm_up(self, name: str, baseline: LatencyBaseline) -> None:
+        # A few baseline lifetimes (1 / alpha samples each) is plenty to converge
+        limit = max(self.min_samples, int(5 / self.alpha))
+        for record in self.history.records(name, limit=limit):
+            total = record["timings"].get("total")
+            if record["timestamp"] < int(self.created_at) and record["status"] == "UP" and total is not None:
+                baseline.update(total, self.alpha)
+
+    def observe(self, name: str, latency: float, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Feed a successful probe's latency; returns degradation details or None if normal"""
+        with self._lock:
+            baseline = self._baseline(name)
+            stddev = math.sqrt(baseline.variance)
+            reason = None
+            if timeout and latency >= timeout * self.timeout_fraction:
+                reason = f"{latency:.2f}s is over {self.timeout_fraction:.0%} of the {timeout:g}s timeout"
+            elif (baseline.samples >= self.min_samples
+                    and latency > baseline.mean + self.threshold * stddev
+                    and latency > baseline.mean * (1 + self.min_increase)):
+                reason = (f"{latency:.2f}s vs baseline {baseline.mean:.2f}s "
+                          f"(+{(latency - baseline.mean) / max(stddev, 1e-9):.1f} sigma)")
+
+            if reason is None:
+                baseline.streak = 0
+                baseline.update(latency, self.alpha)
+                return None
+
+            baseline.streak += 1
+            if baseline.streak < self.consecutive:
+                return None
+            return {
+                "reason": reason,
+                "baseline": round(baseline.mean, 4),
+                "stddev": round(stddev, 4),
+                "streak": baseline.streak,
+            }
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            self._baselines.pop(name, None)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Async HTTP Client
+Minimal asyncio HTTP/1.1 client used by the probe engine
+"""
+
+import asyncio
+import socket
+import ssl
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+USER_AGENT = "Portia-Uptime-Agent/1.0"
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+class ProtocolError(Exception):
+    """Raised when a server response is not valid HTTP/1.1"""
+
+
+class HTTPResponse:
+    """Parsed HTTP response returned by :func:`request`"""
+
+    def __init__(self, url: str, status: int, reason: str, headers: Dict[str, str],
+                 body: bytes, elapsed: float, timings: Dict[str, float]):
+        self.url = url
+        self.status_code = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+        self.timings = timings
+        # True when the final hop ran over a pooled keep-alive connection
+        self.reused = False
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    """Get the shared client SSL context (building one per request is slow)"""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def split_url(url: str) -> Tuple[str, str, int, str]:
+    """Split a URL into (scheme, host, port, request target)"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    if not parts.hostname:
+        raise ValueError(f"Invalid URL: {url}")
+    port = parts.port or (443 if scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    return scheme, parts.hostname, port, path
+
+
+def build_request(method: str, host: str, port: int, scheme: str, path: str,
+                  headers: Optional[Dict[str, str]] = None, body: Optional[bytes] = None) -> bytes:
+    """Serialize an HTTP/1.1 request"""
+    default_port = 443 if scheme == "https" else 80
+    host_header = host if port == default_port else f"{host}:{port}"
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host_header}"]
+    merged = {
+        "User-Agent": USER_AGENT,
+        "Accept": "*/*",
+        "Accept-Encoding": "identity",
+        "Connection": "close",
+    }
+    merged.update(headers or {})
+    if body is not None:
+        merged["Content-Length"] = str(len(body))
+    lines.extend(f"{key}: {value}" for key, value in merged.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+
+async def read_response_head(reader: asyncio.StreamReader) -> Tuple[int, str, Dict[str, str]]:
+    """Read the status line and headers of a response"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ProtocolError("Server closed connection without response")
+    try:
+        version, status, *reason = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        status_code = int(status)
+    except ValueError:
+        raise ProtocolError(f"Malformed status line: {status_line[:80]!r}")
+    if not version.startswith("HTTP/"):
+        raise ProtocolError(f"Malformed status line: {status_line[:80]!r}")
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        key = name.strip().lower()
+        value = value.strip()
+        # Repeated headers are folded as per RFC 9110
+        headers[key] = f"{headers[key]}, {value}" if key in headers else value
+    return status_code, reason[0] if reason else "", headers
+
+
+async def close_writer(writer: asyncio.StreamWriter) -> None:
+    """Close a connection without letting shutdown errors escape"""
+    writer.close()
+    try:
+        await asyncio.wait_for(writer.wait_closed(), timeout=1)
+    except (OSError, asyncio.TimeoutError, ssl.SSLError):
+        pass
+
+
+def is_reusable(headers: Dict[str, str], method: str, status: int) -> bool:
+    """Whether the connection can carry another request after this response"""
+    if "close" in headers.get("connection", "").lower():
+        return False
+    # Without a length or chunked framing the body ends at EOF, consuming the connection
+    return (not has_body(method, status) or "content-length" in headers
+            or "chunked" in headers.get("transfer-encoding", "").lower())
+
+
+def has_body(method: str, status: int) -> bool:
+    """Whether a response to ``method`` with ``status`` carries a body"""
+    return not (method == "HEAD" or 100 <= status < 200 or status in (204, 304))
+
+
+async def iter_body(reader: asyncio.StreamReader, headers: Dict[str, str],
+                    chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    """Yield the decoded response body in chunks"""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise ProtocolError(f"Malformed chunk size: {size_line[:80]!r}")
+            if size == 0:
+                # Skip trailers up to the terminating blank line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            while size > 0:
+                data = await reader.read(min(size, chunk_size))
+                if not data:
+                    raise ProtocolError("Connection closed mid-chunk")
+                size -= len(data)
+                yield data
+            await reader.readline()
+    elif "content-length" in headers:
+        try:
+            remaining = int(headers["content-length"])
+        except ValueError:
+            raise ProtocolError(f"Invalid Content-Length: {headers['content-length']!r}")
+        while remaining > 0:
+            data = await reader.read(min(remaining, chunk_size))
+            if not data:
+                raise ProtocolError("Connection closed before full body was received")
+            remaining -= len(data)
+            yield data
+    else:
+        while True:
+            data = await reader.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+
+async def stream_body(reader: asyncio.StreamReader, headers: Dict[str, str],
+                      on_body: Callable[[bytes], bool]) -> bool:
+    """Pass body chunks to ``on_body`` until it asks to stop; True if the body was fully read"""
+    chunks = iter_body(reader, headers)
+    try:
+        async for chunk in chunks:
+            if on_body(chunk):
+                return False
+        return True
+    finally:
+        await chunks.aclose()
+
+
+# Async callable mapping (host, port) to loop.getaddrinfo()-style address tuples
+Resolver = Callable[[str, int], Awaitable[list]]
+
+
+def add_timing(timings: Dict[str, float], phase: str, seconds: float) -> None:
+    """Add time spent in a phase (phases repeat across redirect hops and reconnects)"""
+    timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+async def connect(host: str, port: int, use_tls: bool, timings: Dict[str, float],
+                  resolver: Optional[Resolver] = None, local_addr: Optional[str] = None
+                  ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Open a connection, timing DNS, TCP connect and TLS handshake separately
+
+    A phase's time is recorded even when it fails or times out; phases that
+    don't run (TLS on plain HTTP) are left out of ``timings``.
+    ``local_addr`` binds the socket to that source address (a specific interface).
+    """
+    loop = asyncio.get_running_loop()
+
+    timings["phase"] = "dns"
+    started = loop.time()
+    try:
+        if resolver is not None:
+            addresses = await resolver(host, port)
+        else:
+            addresses = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    finally:
+        add_timing(timings, "dns", loop.time() - started)
+
+    timings["phase"] = "connect"
+    started = loop.time()
+    try:
+        last_error: Optional[Exception] = None
+        for family, _, _, _, sockaddr in addresses:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    sockaddr[0], sockaddr[1], family=family,
+                    local_addr=(local_addr, 0) if local_addr else None,
+                )
+                break
+            except OSError as e:
+                last_error = e
+        else:
+            raise last_error or OSError(f"No addresses found for {host}")
+    finally:
+        add_timing(timings, "connect", loop.time() - started)
+
+    if use_tls:
+        timings["phase"] = "tls"
+        started = loop.time()
+        try:
+            await writer.start_tls(get_ssl_context(), server_hostname=host)
+        except BaseException:
+            writer.close()
+            raise
+        finally:
+            add_timing(timings, "tls", loop.time() - started)
+    return reader, writer
+
+
+async def request(method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                  body: Optional[bytes] = None, max_redirects: int = 5,
+                  timings: Optional[Dict[str, float]] = None, pool=None,
+                  resolver: Optional[Resolver] = None,
+                  on_body: Optional[Callable[[bytes], bool]] = None,
+                  local_addr: Optional[str] = None) -> HTTPResponse:
+    """Perform a single HTTP request, following redirects like ``requests.get``
+
+    Per-phase durations (seconds, summed over redirect hops) are written into
+    ``timings`` as the request progresses, and ``timings["phase"]`` names the
+    phase in flight, so callers still have partial data if the request fails.
+    Only phases that ran appear (a reused connection has no dns/connect/tls);
+    ``timings["total"]`` is set however the request ends.
+
+    With a :class:`connection_pool.AsyncConnectionPool` the request reuses an
+    idle keep-alive connection when one is available; without one it opens a
+    fresh connection and closes it afterwards (full handshake every time).
+    ``resolver`` replaces the system resolver, e.g. with a :class:`dns_cache.DNSCache`.
+
+    ``on_body`` streams the final response body instead of buffering it: it is
+    called per chunk and returns True to stop reading (the connection is then
+    closed rather than pooled), and ``HTTPResponse.body`` is left empty.
+
+    ``local_addr`` sends new connections from that source address; combine it
+    with ``pool=None`` so no connection from another interface is reused.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    if timings is None:
+        timings = {}
+    request_headers = dict(headers or {})
+    if pool is not None:
+        request_headers.setdefault("Connection", "keep-alive")
+
+    hops = 0
+    reused = False
+    try:
+        while hops <= max_redirects:
+            scheme, host, port, path = split_url(url)
+            key = (scheme, host.lower(), port)
+            conn = pool.get(key) if pool is not None else None
+            if conn is not None:
+                reader, writer = conn.reader, conn.writer
+            else:
+                reader, writer = await connect(host, port, scheme == "https", timings, resolver, local_addr)
+                if pool is not None:
+                    pool.stats["opened"] += 1
+
+            keep_alive = False
+            try:
+                timings["phase"] = "ttfb"
+                sent = loop.time()
+                try:
+                    writer.write(build_request(method, host, port, scheme, path, request_headers, body))
+                    await writer.drain()
+                    try:
+                        status, reason, response_headers = await read_response_head(reader)
+                    except (ProtocolError, ConnectionError):
+                        if conn is None:
+                            raise
+                        # The server dropped an idle keep-alive connection; retry on a fresh one
+                        continue
+                finally:
+                    received = loop.time()
+                    add_timing(timings, "ttfb", received - sent)
+                elapsed = received - started
+
+                timings["phase"] = "transfer"
+                redirect = status in REDIRECT_CODES and "location" in response_headers
+                content = b""
+                complete = True
+                try:
+                    if has_body(method, status):
+                        if on_body is not None and not redirect:
+                            complete = await stream_body(reader, response_headers, on_body)
+                        else:
+                            content = b"".join([chunk async for chunk in iter_body(reader, response_headers)])
+                finally:
+                    add_timing(timings, "transfer", loop.time() - received)
+
+                keep_alive = pool is not None and complete and is_reusable(response_headers, method, status)
+            finally:
+                if keep_alive:
+                    pool.put(key, reader, writer)
+                else:
+                    await close_writer(writer)
+
+            hops += 1
+            reused = conn is not None
+            if redirect:
+                url = urljoin(url, response_headers["location"])
+                if status == 303 or (status in (301, 302) and method == "POST"):
+                    method, body = "GET", None
+                continue
+
+            timings["phase"] = "done"
+            timings["total"] = loop.time() - started
+            response = HTTPResponse(url, status, reason, response_headers, content, elapsed, timings)
+            response.reused = reused
+            return response
+
+        raise ProtocolError(f"Exceeded {max_redirects} redirects")
+    finally:
+        # Failed requests report how long they ran too
+        timings.setdefault("total", loop.time() - started)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures cold-start time of a single `python main.py` UP check and what it imports
+"""
+
+import http.server
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+BENCH_RUNS = int(os.getenv("BENCH_RUNS", "10"))
+OUTPUT_FILE = "bench_output.txt"
+
+# Modules that must stay off the UP path (only remediation needs them)
+HEAVY_MODULES = ("github", "git", "google.generativeai", "yaml", "jinja2")
+
+# Clearing these keeps the run on the pure UP path (empty values beat .env, which never overrides)
+DISABLED_INTEGRATIONS = ("TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID", "GOOGLE_AI_API_KEY",
+                         "GITHUB_TOKEN", "PORTIA_API_KEY")
+
+
+class _OkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    """Serve HTTP 200 on a free local port so the benchmark measures startup, not the network"""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def bench_env(url):
+    env = dict(os.environ, MONITORED_URL=url)
+    env.pop("MONITORED_URLS", None)
+    env.pop("MONITOR_TARGETS_FILE", None)
+    for key in DISABLED_INTEGRATIONS:
+        env[key] = ""
+    return env
+
+
+def time_up_check(url):
+    """Wall-clock seconds for one cold `python main.py` run against a healthy target"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "main.py"], env=bench_env(url),
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0 or "Site is UP" not in result.stdout:
+        raise RuntimeError(f"UP check did not succeed:\n{result.stdout}\n{result.stderr}")
+    return elapsed
+
+
+def heavy_imports_on_up_path(url):
+    """Run main() in-process once and report which heavy modules it pulled in"""
+    script = (
+        "import json, sys, main; main.main(); "
+        f"print(json.dumps([m for m in {list(HEAVY_MODULES)!r} if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", script], env=bench_env(url),
+                            capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(limit=8):
+    """Top top-level imports of main.py by cumulative time (microseconds)"""
+    # Modules the bare interpreter imports at startup (site, .pth hooks) aren't main's cost
+    baseline = subprocess.run([sys.executable, "-c", "import sys; print(' '.join(sys.modules))"],
+                              capture_output=True, text=True).stdout.split()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only direct imports of main (one indent level) to avoid double counting
+        if not name.startswith("   ") or name.startswith("     ") or name.strip() in baseline:
+            continue
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    print("⏱️  Portia Uptime Agent - Cold Start Benchmark (UP path)")
+    print("-" * 60)
+
+    server, url = start_stub_server()
+    try:
+        time_up_check(url)  # Warm the OS file cache so runs are comparable
+        timings = [time_up_check(url) for _ in range(BENCH_RUNS)]
+        heavy = heavy_imports_on_up_path(url)
+    finally:
+        server.shutdown()
+
+    profile = import_profile()
+    lines = [
+        f"[{datetime.now().isoformat(timespec='seconds')}] main.py UP path, {BENCH_RUNS} runs, "
+        f"Python {sys.version.split()[0]}",
+        f"  median {statistics.median(timings) * 1000:.0f} ms, "
+        f"min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms",
+        f"  heavy modules imported: {', '.join(heavy) if heavy else 'none'}",
+        "  slowest imports of main.py (cumulative):",
+    ]
+    lines.extend(f"    {cumulative / 1000:7.1f} ms  {name}" for cumulative, name in profile)
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, "a") as f:
+        f.write(report + "\n")
+    print(f"\n📄 Results appended to {OUTPUT_FILE}")
+
+    if heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
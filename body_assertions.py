@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Body Assertions
+Streaming content checks evaluated chunk by chunk with a byte cap
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+# Assertion states
+PENDING = "pending"
+PASSED = "passed"
+FAILED = "failed"
+
+
+class BodyAssertion(ABC):
+    """Base class: consumes body chunks until it can decide PASSED or FAILED"""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        # "absent" inverts the check: the pattern must NOT appear (e.g. error pages served as 200)
+        self.absent = bool(spec.get("absent", False))
+        self.state = PENDING
+
+    @abstractmethod
+    def feed(self, chunk: bytes) -> None:
+        """Consume the next body chunk"""
+
+    def finish(self) -> None:
+        """Decide any still-pending assertion once the body (or byte cap) ends"""
+        if self.state == PENDING:
+            self.state = PASSED if self.absent else FAILED
+
+    def _found(self) -> None:
+        self.state = FAILED if self.absent else PASSED
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Why the assertion failed, for the probe result's error"""
+
+
+class KeywordAssertion(BodyAssertion):
+    """Literal substring match, carried across chunk boundaries"""
+
+    def __init__(self, spec: Dict):
+        super().__init__(spec)
+        self.keyword = str(spec["value"]).encode("utf-8")
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> None:
+        window = self._tail + chunk
+        if self.keyword in window:
+            self._found()
+            return
+        self._tail = window[-(len(self.keyword) - 1):] if len(self.keyword) > 1 else b""
+
+    def describe(self) -> str:
+        verb = "present" if self.absent else "not found"
+        return f"keyword {self.keyword.decode('utf-8', 'replace')!r} {verb}"
+
+
+class RegexAssertion(BodyAssertion):
+    """Regex match over a sliding window (matches longer than ``window`` bytes are missed)"""
+
+    def __init__(self, spec: Dict):
+        super().__init__(spec)
+        self.pattern = re.compile(str(spec["pattern"]).encode("utf-8"))
+        self.window = int(spec.get("window", 4096))
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> None:
+        window = self._tail + chunk
+        if self.pattern.search(window):
+            self._found()
+            return
+        self._tail = window[-self.window:]
+
+    def describe(self) -> str:
+        verb = "matched" if self.absent else "did not match"
+        return f"regex {self.pattern.pattern.decode('utf-8', 'replace')!r} {verb}"
+
+
+class JsonPathAssertion(BodyAssertion):
+    """Checks a value at a dotted path such as ``data.items[0].status``
+
+    JSON can only be judged on the complete document, so the (capped) body is
+    buffered and parsed in :meth:`finish`. With ``equals`` the value must match,
+    otherwise the path only has to exist.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, spec: Dict):
+        super().__init__(spec)
+        self.path = str(spec["path"])
+        self.has_expected = "equals" in spec
+        self.expected = spec.get("equals")
+        self._chunks: List[bytes] = []
+        self.detail = ""
+
+    def feed(self, chunk: bytes) -> None:
+        self._chunks.append(chunk)
+
+    def finish(self) -> None:
+        if self.state != PENDING:
+            return
+        try:
+            document = json.loads(b"".join(self._chunks))
+        except ValueError:
+            self.state = FAILED
+            self.detail = "body is not valid JSON (or was truncated by the byte cap)"
+            return
+        finally:
+            self._chunks = []
+
+        value = resolve_json_path(document, self.path, self._MISSING)
+        if value is self._MISSING:
+            self.state, self.detail = FAILED, "path not found"
+        elif self.has_expected and value != self.expected:
+            self.state, self.detail = FAILED, f"got {value!r}, expected {self.expected!r}"
+        else:
+            self.state = PASSED
+
+    def describe(self) -> str:
+        return f"json path {self.path!r}: {self.detail}"
+
+
+ASSERTION_TYPES = {
+    "keyword": KeywordAssertion,
+    "regex": RegexAssertion,
+    "json_path": JsonPathAssertion,
+}
+
+
+def resolve_json_path(document: Any, path: str, default: Any = None) -> Any:
+    """Follow a dotted path with optional [index] segments; a leading "$." is allowed"""
+    if path.startswith("$"):
+        path = path[1:].lstrip(".")
+    value = document
+    for token in re.findall(r"[^.\[\]]+|\[\d+\]", path):
+        try:
+            if token.startswith("["):
+                value = value[int(token[1:-1])]
+            else:
+                value = value[token]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return value
+
+
+def build_assertions(specs: Optional[List[Dict]]) -> List[BodyAssertion]:
+    """Instantiate assertions from target config entries"""
+    assertions = []
+    for spec in specs or []:
+        kind = spec.get("type")
+        if kind not in ASSERTION_TYPES:
+            raise ValueError(f"Unknown body assertion type: {kind!r}")
+        assertions.append(ASSERTION_TYPES[kind](spec))
+    return assertions
+
+
+class BodyChecker:
+    """Feeds response chunks to assertions, stopping early once the outcome is known"""
+
+    def __init__(self, specs: Optional[List[Dict]], max_bytes: int):
+        self.assertions = build_assertions(specs)
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume a chunk; returns True when no more body needs to be read"""
+        remaining = self.max_bytes - self.bytes_read
+        if len(chunk) >= remaining:
+            chunk = chunk[:remaining]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+
+        pending = [a for a in self.assertions if a.state == PENDING]
+        for assertion in pending:
+            assertion.feed(chunk)
+        if any(a.state == FAILED for a in pending):
+            return True
+        if self.assertions and all(a.state != PENDING for a in self.assertions):
+            return True
+        return self.truncated
+
+    def failure(self) -> Optional[str]:
+        """Finish all assertions and describe the first failure, if any"""
+        for assertion in self.assertions:
+            assertion.finish()
+        for assertion in self.assertions:
+            if assertion.state == FAILED:
+                suffix = f" within {self.bytes_read} bytes" if self.truncated else ""
+                return f"Assertion failed: {assertion.describe()}{suffix}"
+        return None
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Alert Channels
+Pluggable alert delivery (Telegram, webhook, email, Portia) fanned out to all channels in parallel
+"""
+
+import concurrent.futures
+import os
+import smtplib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from connection_pool import get_session_pool
+from notifier import DIGEST_SEPARATOR, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, get_notifier
+from outbox import get_outbox
+from portia_config import get_portia_config
+
+# Load environment variables
+load_dotenv()
+
+# Channel Configuration
+# Seconds each channel gets per delivery; channels run in parallel, so an alert takes as long as the slowest
+NOTIFY_CHANNEL_TIMEOUT = float(os.getenv("NOTIFY_CHANNEL_TIMEOUT", "10"))
+# Per-channel overrides, e.g. "email=20,webhook=5"
+NOTIFY_CHANNEL_TIMEOUTS = os.getenv("NOTIFY_CHANNEL_TIMEOUTS", "")
+
+# Email channel: plain SMTP, by default to a relay (or stand-in such as `python -m aiosmtpd -n`) on localhost
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+ALERT_EMAIL_FROM = os.getenv("ALERT_EMAIL_FROM", "uptime-agent@localhost")
+# Comma-separated recipients; the email channel is off while this is empty
+ALERT_EMAIL_TO = os.getenv("ALERT_EMAIL_TO", "")
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """Per-channel timeouts from "name=seconds,..." """
+    timeouts = {}
+    for entry in spec.split(","):
+        name, _, seconds = entry.partition("=")
+        if name.strip() and seconds.strip():
+            timeouts[name.strip().lower()] = float(seconds)
+    return timeouts
+
+
+class AlertChannel(ABC):
+    """A destination for alerts
+
+    An alert is a dict with the message ``text`` and the ``url`` it is about
+    (if any). ``send`` makes one delivery attempt for a batch of alerts and
+    returns True if all of them went out; retrying is left to the outbox.
+    """
+
+    name = "channel"
+
+    def __init__(self, timeout: float = NOTIFY_CHANNEL_TIMEOUT):
+        self.timeout = timeout
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    def send(self, alerts: List[Dict]) -> bool:
+        """Deliver a batch of alerts in one attempt; True if every one went out"""
+
+
+class TelegramChannel(AlertChannel):
+    """Telegram chat, through the rate-limited notifier (batches become digests)"""
+
+    name = "telegram"
+
+    def __init__(self, timeout: float = NOTIFY_CHANNEL_TIMEOUT, chat_id: Optional[str] = TELEGRAM_CHAT_ID):
+        super().__init__(timeout)
+        self.chat_id = chat_id
+
+    @property
+    def configured(self) -> bool:
+        return bool(TELEGRAM_BOT_TOKEN and self.chat_id)
+
+    def send(self, alerts: List[Dict]) -> bool:
+        return get_notifier().send(self.chat_id, [alert["text"] for alert in alerts], max_attempts=1)
+
+    def submit(self, alert: Dict) -> bool:
+        """Hand an alert to the notifier's own background queue"""
+        return get_notifier().submit(alert["text"], self.chat_id)
+
+
+class WebhookChannel(AlertChannel):
+    """JSON POST to PORTIA_WEBHOOK_URL; any 2xx response counts as delivered"""
+
+    name = "webhook"
+
+    def __init__(self, timeout: float = NOTIFY_CHANNEL_TIMEOUT, url: Optional[str] = None):
+        super().__init__(timeout)
+        self.url = url or get_portia_config()["webhook_url"]
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.url)
+
+    def send(self, alerts: List[Dict]) -> bool:
+        payload = {
+            "source": "portia-uptime-agent",
+            "timestamp": datetime.now().isoformat(),
+            "alerts": [{"text": alert["text"].strip(), "url": alert.get("url")} for alert in alerts],
+        }
+        resp = get_session_pool().request("POST", self.url, json=payload, timeout=self.timeout)
+        if 200 <= resp.status_code < 300:
+            print(f"[WEBHOOK] {len(alerts)} alert(s) delivered")
+            return True
+        print(f"[WEBHOOK] Delivery failed: {resp.status_code}")
+        return False
+
+
+class EmailChannel(AlertChannel):
+    """One email per batch to ALERT_EMAIL_TO over SMTP"""
+
+    name = "email"
+
+    def __init__(self, timeout: float = NOTIFY_CHANNEL_TIMEOUT, recipients: Optional[List[str]] = None,
+                 host: str = SMTP_HOST, port: int = SMTP_PORT):
+        super().__init__(timeout)
+        self.recipients = recipients if recipients is not None else \
+            [address.strip() for address in ALERT_EMAIL_TO.split(",") if address.strip()]
+        self.host = host
+        self.port = port
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.recipients)
+
+    def send(self, alerts: List[Dict]) -> bool:
+        texts = [alert["text"].strip() for alert in alerts]
+        message = EmailMessage()
+        if len(texts) == 1:
+            message["Subject"] = f"[Uptime] {texts[0].splitlines()[0] if texts[0] else 'Alert'}"
+        else:
+            message["Subject"] = f"[Uptime] {len(texts)} alerts"
+        message["From"] = ALERT_EMAIL_FROM
+        message["To"] = ", ".join(self.recipients)
+        message.set_content(DIGEST_SEPARATOR.join(texts))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_USERNAME:
+                smtp.login(SMTP_USERNAME, SMTP_PASSWORD or "")
+            smtp.send_message(message)
+        print(f"[EMAIL] {len(texts)} alert(s) sent to {message['To']}")
+        return True
+
+
+class PortiaChannel(AlertChannel):
+    """Alerts posted to Portia's incident report endpoint"""
+
+    name = "portia"
+
+    def __init__(self, timeout: float = NOTIFY_CHANNEL_TIMEOUT):
+        super().__init__(timeout)
+        self._client = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(get_portia_config()["api_key"])
+
+    def send(self, alerts: List[Dict]) -> bool:
+        if self._client is None:
+            from portia_sdk import get_portia_client
+            self._client = get_portia_client()
+        sent = [self._client.report_incident(alert.get("url") or "", {"message": alert["text"].strip()})
+                for alert in alerts]
+        return all(sent)
+
+
+CHANNEL_TYPES = {channel.name: channel for channel in (TelegramChannel, WebhookChannel, EmailChannel, PortiaChannel)}
+
+
+class AlertChannels:
+    """Delivers alerts to every configured channel at once
+
+    Each channel has its own single-thread executor and its own timeout, so a
+    slow or hung channel delays nobody else: an alert is done when the
+    slowest channel finishes or times out. A send that outlives its timeout
+    can't be interrupted, so it is tracked instead: the channel gets no new
+    sends until it finishes, and alerts it did deliver are not sent again
+    when the outbox retries them.
+    """
+
+    def __init__(self, channels: List[AlertChannel]):
+        self.channels: Dict[str, AlertChannel] = {channel.name: channel for channel in channels}
+        self._executors = {name: concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                                       thread_name_prefix=f"alert-{name}")
+                           for name in self.channels}
+        # Runs deliveries made without the outbox; never shares workers with the channel executors
+        self._dispatcher = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-dispatch")
+        self._lock = threading.Lock()
+        # Timed-out sends still running, and alerts such sends delivered after all, per channel
+        self._late: Dict[str, Tuple[concurrent.futures.Future, List[Dict]]] = {}
+        self._delivered_late: Dict[str, Deque[Dict]] = {name: deque(maxlen=1000) for name in self.channels}
+        self.stats = {name: {"sent": 0, "failed": 0, "timeouts": 0, "last_seconds": None}
+                      for name in self.channels}
+
+    def notify(self, message: str, url: Optional[str] = None) -> bool:
+        """Send an alert to all channels without waiting for delivery; False if there is nowhere to send it"""
+        if not self.channels:
+            print("[WARNING] No alert channels configured")
+            return False
+        alert = {"text": message, "url": url}
+        outbox = get_outbox()
+        if outbox is not None:
+            try:
+                # One item per channel, so a retry only goes to the channel that failed
+                for name in self.channels:
+                    outbox.put("alert", dict(alert, channel=name))
+                return True
+            except Exception as e:
+                print(f"[OUTBOX] Could not queue alert: {e} - sending directly")
+
+        # Without the outbox Telegram keeps its own coalescing queue; the others fan out in the background
+        direct = {}
+        for name, channel in self.channels.items():
+            if isinstance(channel, TelegramChannel):
+                channel.submit(alert)
+            else:
+                direct[name] = [dict(alert, channel=name)]
+        if direct:
+            try:
+                self._dispatcher.submit(self.deliver, direct)
+            except RuntimeError:
+                # Interpreter shutdown: executors take no new work
+                self.deliver(direct)
+        return True
+
+    def deliver(self, batches: Dict[str, List[Dict]]) -> Dict[str, List[bool]]:
+        """Send each channel its batch of alerts in parallel; returns each alert's success"""
+        started = time.monotonic()
+        results: Dict[str, List[bool]] = {}
+        futures = {}
+        for name, alerts in batches.items():
+            if name not in self.channels:
+                # Queued for a channel that has since been removed from PORTIA_NOTIFICATION_CHANNELS
+                print(f"[CHANNEL] Dropping {len(alerts)} alert(s) for unconfigured channel {name}")
+                results[name] = [True] * len(alerts)
+                continue
+            with self._lock:
+                busy = not self._collect_late(name)
+                results[name] = [self._take_delivered(name, alert) for alert in alerts]
+            if busy:
+                print(f"[CHANNEL] {name} is still finishing a timed-out send - will retry")
+                continue
+            pending = [alert for alert, done in zip(alerts, results[name]) if not done]
+            if pending:
+                futures[name] = (self._submit(self.channels[name], pending), pending)
+
+        for name, (future, pending) in futures.items():
+            channel = self.channels[name]
+            stats = self.stats[name]
+            try:
+                remaining = channel.timeout - (time.monotonic() - started)
+                ok = bool(future.result(timeout=max(0.0, remaining)))
+            except concurrent.futures.TimeoutError:
+                print(f"[CHANNEL] {name} did not finish within {channel.timeout:g}s")
+                stats["timeouts"] += 1
+                with self._lock:
+                    self._late[name] = (future, pending)
+                ok = False
+            except Exception as e:
+                print(f"[CHANNEL] {name} delivery failed: {e}")
+                ok = False
+            results[name] = [done or ok for done in results[name]]
+            stats["sent" if ok else "failed"] += len(pending)
+        return results
+
+    def _submit(self, channel: AlertChannel, alerts: List[Dict]) -> concurrent.futures.Future:
+        try:
+            return self._executors[channel.name].submit(self._send, channel, alerts)
+        except RuntimeError:
+            # Interpreter shutdown: executors take no new work, so send from this thread
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            try:
+                future.set_result(self._send(channel, alerts))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+    def _collect_late(self, name: str) -> bool:
+        """Settle a finished timed-out send to ``name``; False while it is still running"""
+        late = self._late.get(name)
+        if late is None:
+            return True
+        future, alerts = late
+        if not future.done():
+            return False
+        del self._late[name]
+        if future.exception() is None and future.result():
+            print(f"[CHANNEL] {name} delivered {len(alerts)} timed-out alert(s) after all")
+            self._delivered_late[name].extend(alerts)
+            self.stats[name]["sent"] += len(alerts)
+            self.stats[name]["failed"] -= len(alerts)
+        return True
+
+    def _take_delivered(self, name: str, alert: Dict) -> bool:
+        """True (once) if a late send already delivered this alert"""
+        try:
+            self._delivered_late[name].remove(alert)
+            return True
+        except ValueError:
+            return False
+
+    def _send(self, channel: AlertChannel, alerts: List[Dict]) -> bool:
+        started = time.monotonic()
+        try:
+            return channel.send(alerts)
+        finally:
+            self.stats[channel.name]["last_seconds"] = round(time.monotonic() - started, 3)
+
+
+def build_channels(names: List[str]) -> List[AlertChannel]:
+    """Channel instances for the given names, skipping unknown and unconfigured ones"""
+    timeouts = parse_timeouts(NOTIFY_CHANNEL_TIMEOUTS)
+    channels = []
+    for name in dict.fromkeys(name.strip().lower() for name in names if name.strip()):
+        channel_type = CHANNEL_TYPES.get(name)
+        if channel_type is None:
+            print(f"[CHANNEL] Unknown notification channel '{name}' - expected one of {', '.join(CHANNEL_TYPES)}")
+            continue
+        channel = channel_type(timeout=timeouts.get(name, NOTIFY_CHANNEL_TIMEOUT))
+        if not channel.configured:
+            print(f"[CHANNEL] '{name}' is in PORTIA_NOTIFICATION_CHANNELS but not configured - skipping")
+            continue
+        channels.append(channel)
+    return channels
+
+
+_alert_channels: Optional[AlertChannels] = None
+_alert_channels_lock = threading.Lock()
+
+
+def get_alert_channels() -> AlertChannels:
+    """Get the channels named in PORTIA_NOTIFICATION_CHANNELS"""
+    global _alert_channels
+    with _alert_channels_lock:
+        if _alert_channels is None:
+            _alert_channels = AlertChannels(build_channels(get_portia_config()["notification_channels"]))
+        return _alert_channels
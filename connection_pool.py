@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Connection Pool Manager
+Shared keep-alive connection pools for probes, alerting and the Portia client
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    import requests
+
+# Load environment variables
+load_dotenv()
+
+# Connection Pool Configuration
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_POOL_IDLE_TIMEOUT = float(os.getenv("HTTP_POOL_IDLE_TIMEOUT", "60"))
+# Per-host overrides, e.g. "api.telegram.org=2,api.portialabs.ai=16"
+HTTP_POOL_HOST_SIZES = os.getenv("HTTP_POOL_HOST_SIZES", "")
+
+
+def parse_host_sizes(spec: str) -> Dict[str, int]:
+    """Parse a "host=size,host=size" pool sizing spec"""
+    sizes = {}
+    for item in spec.split(","):
+        host, _, size = item.partition("=")
+        if host.strip() and size.strip():
+            sizes[host.strip().lower()] = int(size)
+    return sizes
+
+
+class SessionPool:
+    """Thread-safe requests sessions, one keep-alive pool per host, closed when idle"""
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, idle_timeout: float = HTTP_POOL_IDLE_TIMEOUT,
+                 host_sizes: Optional[Dict[str, int]] = None):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.host_sizes = parse_host_sizes(HTTP_POOL_HOST_SIZES) if host_sizes is None else host_sizes
+        self._sessions: Dict[str, Tuple["requests.Session", float]] = {}
+        self._lock = threading.Lock()
+
+    def _new_session(self, host: str) -> "requests.Session":
+        # requests is imported on first use so probe-only startup doesn't pay for it
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        size = self.host_sizes.get(host, self.pool_size)
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def session_for(self, url: str) -> "requests.Session":
+        """Get the pooled session for the URL's host"""
+        host = (urlsplit(url).hostname or "").lower()
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle_locked(now)
+            entry = self._sessions.get(host)
+            session = entry[0] if entry else self._new_session(host)
+            self._sessions[host] = (session, now)
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        """Send a request over the host's pooled session"""
+        return self.session_for(url).request(method, url, **kwargs)
+
+    def _evict_idle_locked(self, now: float) -> None:
+        for host, (session, last_used) in list(self._sessions.items()):
+            if now - last_used > self.idle_timeout:
+                del self._sessions[host]
+                session.close()
+
+    def evict_idle(self) -> None:
+        """Close sessions that have not been used within the idle timeout"""
+        with self._lock:
+            self._evict_idle_locked(time.monotonic())
+
+    def close(self) -> None:
+        with self._lock:
+            for session, _ in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_session_pool: Optional[SessionPool] = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """Get the process-wide session pool shared by alerting and the Portia client"""
+    global _session_pool
+    with _session_pool_lock:
+        if _session_pool is None:
+            _session_pool = SessionPool()
+        return _session_pool
+
+
+class PooledConnection:
+    """An idle keep-alive connection held by :class:`AsyncConnectionPool`"""
+
+    __slots__ = ("reader", "writer", "idle_since")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = time.monotonic()
+
+    def usable(self, idle_timeout: float) -> bool:
+        return (not self.writer.is_closing() and not self.reader.at_eof()
+                and time.monotonic() - self.idle_since < idle_timeout)
+
+
+class AsyncConnectionPool:
+    """Keep-alive connections for the asyncio probe engine, keyed by (scheme, host, port)
+
+    Idle connections per host are capped (``HTTP_POOL_HOST_SIZES`` or
+    ``max_idle_per_host``) and closed once idle past ``idle_timeout``.
+    Pools are bound to the event loop that created their connections.
+    """
+
+    def __init__(self, max_idle_per_host: int = HTTP_POOL_SIZE,
+                 idle_timeout: float = HTTP_POOL_IDLE_TIMEOUT,
+                 host_sizes: Optional[Dict[str, int]] = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.host_sizes = parse_host_sizes(HTTP_POOL_HOST_SIZES) if host_sizes is None else host_sizes
+        self._idle: Dict[Tuple[str, str, int], Deque[PooledConnection]] = {}
+        self._last_sweep = time.monotonic()
+        self.stats = {"reused": 0, "opened": 0, "evicted": 0}
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[PooledConnection]:
+        """Take the most recently used healthy idle connection for ``key``"""
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.usable(self.idle_timeout):
+                self.stats["reused"] += 1
+                return conn
+            self._discard(conn)
+        return None
+
+    def put(self, key: Tuple[str, str, int], reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter) -> None:
+        """Return a connection whose response was fully read"""
+        idle = self._idle.get(key)
+        if idle is None:
+            idle = self._idle[key] = deque()
+        if len(idle) >= self.host_sizes.get(key[1], self.max_idle_per_host):
+            writer.close()
+        else:
+            idle.append(PooledConnection(reader, writer))
+        self._maybe_sweep()
+
+    def _discard(self, conn: PooledConnection) -> None:
+        self.stats["evicted"] += 1
+        conn.writer.close()
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep < self.idle_timeout / 2:
+            return
+        self._last_sweep = now
+        self.evict_idle()
+
+    def evict_idle(self) -> None:
+        """Close idle connections past the idle timeout or closed by the server"""
+        for key, idle in list(self._idle.items()):
+            kept = deque(conn for conn in idle if conn.usable(self.idle_timeout))
+            for conn in idle:
+                if conn not in kept:
+                    self._discard(conn)
+            if kept:
+                self._idle[key] = kept
+            else:
+                del self._idle[key]
+
+    async def close(self) -> None:
+        """Close every idle connection"""
+        for idle in self._idle.values():
+            for conn in idle:
+                conn.writer.close()
+        self._idle.clear()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Dependency Graph
+Declared upstream/downstream links between targets for probe pausing and alert roll-up
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Dependency Configuration
+# While an upstream is DOWN its downstream targets are probed only this often (seconds)
+DEPENDENCY_PAUSE_INTERVAL = float(os.getenv("DEPENDENCY_PAUSE_INTERVAL", "300"))
+# A failing target's upstreams are re-probed before it alerts, unless checked this recently (seconds)
+DEPENDENCY_RECHECK_AGE = float(os.getenv("DEPENDENCY_RECHECK_AGE", "10"))
+
+
+class DependencyGraph:
+    """Directed acyclic graph of target -> upstream target names
+
+    Upstreams that are not monitored targets are allowed (they are simply never
+    DOWN); cycles are rejected when a target is added.
+    """
+
+    def __init__(self):
+        self._upstreams: Dict[str, List[str]] = {}
+        self._downstreams: Dict[str, Set[str]] = {}
+
+    def set(self, name: str, upstreams: Iterable[str]) -> None:
+        """Declare a target's direct upstreams, replacing any earlier declaration"""
+        upstreams = [upstream for upstream in dict.fromkeys(upstreams) if upstream != name]
+        self.remove(name)
+        for upstream in upstreams:
+            if name in self.ancestors(upstream):
+                raise ValueError(f"Dependency cycle: {upstream} already depends on {name}")
+        if upstreams:
+            self._upstreams[name] = upstreams
+            for upstream in upstreams:
+                self._downstreams.setdefault(upstream, set()).add(name)
+
+    def remove(self, name: str) -> None:
+        """Drop a target's own upstream links (targets depending on it keep theirs)"""
+        for upstream in self._upstreams.pop(name, []):
+            dependents = self._downstreams.get(upstream)
+            if dependents is not None:
+                dependents.discard(name)
+                if not dependents:
+                    del self._downstreams[upstream]
+
+    def ancestors(self, name: str) -> List[str]:
+        """Every transitive upstream of a target, nearest first"""
+        seen: List[str] = []
+        frontier = list(self._upstreams.get(name, []))
+        while frontier:
+            upstream = frontier.pop(0)
+            if upstream not in seen:
+                seen.append(upstream)
+                frontier.extend(self._upstreams.get(upstream, []))
+        return seen
+
+    def descendants(self, name: str) -> Set[str]:
+        """Every target that transitively depends on ``name``"""
+        seen: Set[str] = set()
+        frontier = list(self._downstreams.get(name, ()))
+        while frontier:
+            downstream = frontier.pop()
+            if downstream not in seen:
+                seen.add(downstream)
+                frontier.extend(self._downstreams.get(downstream, ()))
+        return seen
+
+    def root_cause(self, name: str, down: Set[str]) -> Optional[str]:
+        """The DOWN upstream to blame for ``name``: the nearest one with no DOWN upstream of its own"""
+        for upstream in self.ancestors(name):
+            if upstream in down and not any(a in down for a in self.ancestors(upstream)):
+                return upstream
+        return None
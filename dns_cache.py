@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+DNS Cache
+In-process, TTL-respecting DNS cache with negative caching and request coalescing
+"""
+
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    import dns.asyncresolver
+    import dns.exception
+    import dns.rdatatype
+    DNSPYTHON_AVAILABLE = True
+except ImportError:
+    DNSPYTHON_AVAILABLE = False
+
+# Load environment variables
+load_dotenv()
+
+# DNS Cache Configuration
+# Used when record TTLs are unknown (dnspython not installed or system resolver fallback)
+DNS_CACHE_DEFAULT_TTL = float(os.getenv("DNS_CACHE_DEFAULT_TTL", "60"))
+DNS_CACHE_MIN_TTL = float(os.getenv("DNS_CACHE_MIN_TTL", "5"))
+DNS_CACHE_MAX_TTL = float(os.getenv("DNS_CACHE_MAX_TTL", "3600"))
+DNS_NEGATIVE_TTL = float(os.getenv("DNS_NEGATIVE_TTL", "30"))
+DNS_CACHE_MAX_ENTRIES = int(os.getenv("DNS_CACHE_MAX_ENTRIES", "20000"))
+
+# (family, ip) pairs; ports are applied per lookup
+Addresses = List[Tuple[int, str]]
+
+
+class _CacheEntry:
+    __slots__ = ("addresses", "error", "expires_at")
+
+    def __init__(self, addresses: Addresses, error: Optional[OSError], expires_at: float):
+        self.addresses = addresses
+        self.error = error
+        self.expires_at = expires_at
+
+
+class DNSCache:
+    """Caches name lookups for their record TTL and failures for DNS_NEGATIVE_TTL
+
+    Concurrent lookups of the same name share a single resolver query. Record
+    TTLs come from dnspython when installed; otherwise the system resolver is
+    used and entries live for DNS_CACHE_DEFAULT_TTL.
+    """
+
+    def __init__(self, default_ttl: float = DNS_CACHE_DEFAULT_TTL,
+                 negative_ttl: float = DNS_NEGATIVE_TTL, max_entries: int = DNS_CACHE_MAX_ENTRIES):
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._resolver = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "entries": len(self._entries)}
+
+    async def resolve(self, host: str, port: int, bypass: bool = False,
+                      info: Optional[Dict] = None) -> Tuple[list, str]:
+        """Resolve ``host`` into getaddrinfo-style tuples
+
+        Returns the addresses and how they were obtained: "hit", "miss" or "bypass".
+        The same outcome is written to ``info["result"]`` before any lookup error
+        is raised; cached failures are re-raised as the original resolver error.
+        """
+        if info is None:
+            info = {}
+        if _is_ip_literal(host):
+            family = socket.AF_INET6 if ":" in host else socket.AF_INET
+            info["result"] = "bypass"
+            return _to_addrinfo([(family, host)], port), "bypass"
+
+        if bypass:
+            info["result"] = "bypass"
+            addresses, _ = await self._lookup(host)
+            return _to_addrinfo(addresses, port), "bypass"
+
+        key = host.lower()
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self.hits += 1
+            outcome = "hit"
+        else:
+            task = self._in_flight.get(key)
+            if task is not None:
+                # Another probe is already resolving this name; share its answer
+                self.coalesced += 1
+                self.hits += 1
+                outcome = "hit"
+            else:
+                self.misses += 1
+                outcome = "miss"
+                # The lookup runs as its own task so a cancelled (timed out) caller
+                # doesn't cancel it for the other probes waiting on the same name
+                task = asyncio.ensure_future(self._refresh(key))
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+            info["result"] = outcome
+            entry = await asyncio.shield(task)
+
+        info["result"] = outcome
+        if entry.error is not None:
+            raise entry.error.with_traceback(None)
+        return _to_addrinfo(entry.addresses, port), outcome
+
+    async def _refresh(self, key: str) -> _CacheEntry:
+        now = time.monotonic()
+        try:
+            addresses, ttl = await self._lookup(key)
+            entry = _CacheEntry(addresses, None, now + min(max(ttl, DNS_CACHE_MIN_TTL), DNS_CACHE_MAX_TTL))
+        except OSError as e:
+            entry = _CacheEntry([], e, now + self.negative_ttl)
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: _CacheEntry) -> None:
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            now = time.monotonic()
+            for stale in [k for k, e in self._entries.items() if e.expires_at <= now]:
+                del self._entries[stale]
+            while len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order, so this drops the oldest entry
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = entry
+
+    async def _lookup(self, host: str) -> Tuple[Addresses, float]:
+        """Resolve a name, returning its addresses and TTL in seconds"""
+        if DNSPYTHON_AVAILABLE:
+            try:
+                return await self._lookup_dnspython(host)
+            except (dns.exception.DNSException, OSError):
+                pass  # Fall back to the system resolver (e.g. names only in /etc/hosts)
+
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys((family, sockaddr[0]) for family, _, _, _, sockaddr in infos))
+        return addresses, self.default_ttl
+
+    async def _lookup_dnspython(self, host: str) -> Tuple[Addresses, float]:
+        if self._resolver is None:
+            self._resolver = dns.asyncresolver.Resolver()
+        queries = [(socket.AF_INET, dns.rdatatype.A), (socket.AF_INET6, dns.rdatatype.AAAA)]
+        answers = await asyncio.gather(
+            *(self._resolver.resolve(host, rdtype, raise_on_no_answer=False) for _, rdtype in queries),
+            return_exceptions=True,
+        )
+
+        addresses: Addresses = []
+        ttls = []
+        for (family, _), answer in zip(queries, answers):
+            if isinstance(answer, BaseException) or answer.rrset is None:
+                continue
+            ttls.append(answer.rrset.ttl)
+            addresses.extend((family, record.address) for record in answer.rrset)
+
+        if not addresses:
+            errors = [a for a in answers if isinstance(a, BaseException)]
+            raise errors[0] if errors else socket.gaierror(socket.EAI_NONAME, f"No addresses for {host}")
+        return addresses, float(min(ttls))
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def _to_addrinfo(addresses: Addresses, port: int) -> list:
+    """Shape cached addresses like loop.getaddrinfo() results"""
+    infos = []
+    for family, ip in addresses:
+        sockaddr = (ip, port, 0, 0) if family == socket.AF_INET6 else (ip, port)
+        infos.append((family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", sockaddr))
+    return infos
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Consistent Hash Ring
+Stable target-to-owner assignment for worker processes and fleet nodes
+"""
+
+import bisect
+import hashlib
+import os
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Virtual nodes per owner on the hash ring (more = more even shares)
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "128"))
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes
+
+    Adding or removing a node only moves the keys that node gains or loses
+    (about 1/N of them); adding or removing a key never moves any other key.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = SHARD_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for replica in range(self.vnodes):
+            point = _hash(f"{node}#{replica}")
+            if point not in self._owners:
+                self._owners[point] = node
+                bisect.insort(self._points, point)
+
+    def remove_node(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+
+    def node_for(self, key: str) -> Optional[str]:
+        """The node owning ``key``: the first ring point clockwise from its hash"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Heartbeat Monitoring
+Push-based checks for cron jobs and workers: services ping in, missed deadlines go DOWN
+"""
+
+import asyncio
+import hmac
+import heapq
+import json
+import math
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Heartbeat Configuration
+# Port for the ping endpoint; 0 disables heartbeat monitoring
+HEARTBEAT_PORT = int(os.getenv("HEARTBEAT_PORT", "0"))
+HEARTBEAT_HOST = os.getenv("HEARTBEAT_HOST", "127.0.0.1")
+# Shared secret required as ?token= or "Authorization: Bearer ..." (empty = no auth)
+HEARTBEAT_TOKEN = os.getenv("HEARTBEAT_TOKEN", "")
+# JSON list of {"name", "period", "grace", "depends_on"} checks known up front
+HEARTBEAT_CHECKS_FILE = os.getenv("HEARTBEAT_CHECKS_FILE")
+# Default slack after the expected period before a heartbeat counts as missed (seconds)
+HEARTBEAT_GRACE = float(os.getenv("HEARTBEAT_GRACE", "60"))
+# Shortest accepted period in seconds: a missed check reports DOWN again every period
+HEARTBEAT_MIN_PERIOD = float(os.getenv("HEARTBEAT_MIN_PERIOD", "15"))
+# Most checks tracked at once; registering pings beyond it are refused
+HEARTBEAT_MAX_CHECKS = int(os.getenv("HEARTBEAT_MAX_CHECKS", "1000"))
+# Run Gemini analysis and open a fix PR when a heartbeat stays DOWN (off: most jobs aren't web code)
+HEARTBEAT_REMEDIATION = os.getenv("HEARTBEAT_REMEDIATION", "false").lower() == "true"
+
+# Heartbeat check names share the daemon's target namespace under this prefix
+NAME_PREFIX = "heartbeat:"
+MAX_REQUEST_HEAD = 64
+MAX_REQUEST_BODY = 4096
+
+
+class HeartbeatCheck:
+    """A service expected to ping at least every ``interval`` seconds (plus ``grace``)
+
+    Carries the ``name`` / ``url`` / ``interval`` / ``depends_on`` attributes the
+    daemon's result path reads from a ProbeTarget.
+    """
+
+    __slots__ = ("check", "name", "url", "interval", "grace", "depends_on",
+                 "last_ping", "deadline", "version", "missed")
+
+    def __init__(self, check: str, period: float, grace: float = HEARTBEAT_GRACE,
+                 depends_on: Optional[List[str]] = None):
+        if not math.isfinite(period) or period < HEARTBEAT_MIN_PERIOD:
+            raise ValueError(f"Heartbeat period must be at least {HEARTBEAT_MIN_PERIOD:g} seconds, got {period}")
+        if not math.isfinite(grace) or grace < 0:
+            raise ValueError(f"Heartbeat grace must be a non-negative number of seconds, got {grace}")
+        self.check = check
+        self.name = NAME_PREFIX + check
+        self.url = f"heartbeat://{check}"
+        self.interval = period
+        self.grace = grace
+        # None = not specified (a ping registering itself); an update then keeps the existing list
+        self.depends_on = None if depends_on is None else list(depends_on)
+        self.last_ping: Optional[float] = None
+        self.deadline = 0.0
+        self.version = 0
+        # Deadlines missed since the last ping
+        self.missed = 0
+
+
+class HeartbeatTracker:
+    """Deadlines for any number of heartbeat checks in a min-heap
+
+    A ping or a missed deadline pushes one heap item (O(log n)); superseded
+    items are discarded lazily as they reach the top, like TargetScheduler.
+    A missed check is re-armed one period later, so it keeps reporting DOWN
+    each period until it pings again.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_checks: int = HEARTBEAT_MAX_CHECKS):
+        self.clock = clock
+        self.max_checks = max_checks
+        self.checks: Dict[str, HeartbeatCheck] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.checks)
+
+    def register(self, check: HeartbeatCheck, now: Optional[float] = None) -> HeartbeatCheck:
+        """Track a check (or update its period), giving it one full period to ping
+
+        Raises ValueError for a new check once ``max_checks`` are tracked.
+        """
+        now = self.clock() if now is None else now
+        existing = self.checks.get(check.check)
+        if existing is None and len(self.checks) >= self.max_checks:
+            raise ValueError(f"Already tracking {self.max_checks} heartbeat checks (HEARTBEAT_MAX_CHECKS)")
+        if existing is not None:
+            existing.interval, existing.grace = check.interval, check.grace
+            if check.depends_on is not None:
+                existing.depends_on = check.depends_on
+            check = existing
+        elif check.depends_on is None:
+            check.depends_on = []
+        self.checks[check.check] = check
+        self._arm(check, now + check.interval + check.grace)
+        return check
+
+    def remove(self, check: str) -> None:
+        self.checks.pop(check, None)
+
+    def ping(self, check: str, now: Optional[float] = None) -> HeartbeatCheck:
+        """Record a heartbeat; raises KeyError for an unregistered check"""
+        now = self.clock() if now is None else now
+        entry = self.checks[check]
+        entry.last_ping = time.time()
+        entry.missed = 0
+        self._arm(entry, now + entry.interval + entry.grace)
+        return entry
+
+    def _arm(self, check: HeartbeatCheck, deadline: float) -> None:
+        check.version += 1
+        check.deadline = deadline
+        heapq.heappush(self._heap, (deadline, check.version, check.check))
+        if len(self._heap) > 2 * len(self.checks) + 1024:
+            self._heap = [item for item in self._heap
+                          if item[2] in self.checks and self.checks[item[2]].version == item[1]]
+            heapq.heapify(self._heap)
+
+    def next_deadline(self) -> Optional[float]:
+        while self._heap:
+            deadline, version, name = self._heap[0]
+            check = self.checks.get(name)
+            if check is not None and check.version == version:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_expired(self, now: Optional[float] = None) -> List[HeartbeatCheck]:
+        """Checks whose deadline has passed, each re-armed one period later"""
+        now = self.clock() if now is None else now
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, version, name = heapq.heappop(self._heap)
+            check = self.checks.get(name)
+            if check is None or check.version != version:
+                continue
+            check.missed += 1
+            expired.append(check)
+            self._arm(check, now + check.interval)
+        return expired
+
+
+def missed_result(check: HeartbeatCheck) -> Dict:
+    """DOWN result for a missed heartbeat, in the probe result format"""
+    if check.last_ping is None:
+        error = f"No heartbeat received (expected every {check.interval:g}s)"
+    else:
+        error = (f"No heartbeat for {time.time() - check.last_ping:.0f}s "
+                 f"(expected every {check.interval:g}s + {check.grace:g}s grace)")
+    return {"status": "DOWN", "error": error, "heartbeat": {"missed": check.missed},
+            "remediate": HEARTBEAT_REMEDIATION}
+
+
+def load_checks() -> List[HeartbeatCheck]:
+    """Heartbeat checks declared in HEARTBEAT_CHECKS_FILE"""
+    if not HEARTBEAT_CHECKS_FILE:
+        return []
+    with open(HEARTBEAT_CHECKS_FILE) as f:
+        entries = json.load(f)
+    return [HeartbeatCheck(entry["name"], float(entry["period"]),
+                           float(entry.get("grace", HEARTBEAT_GRACE)), entry.get("depends_on"))
+            for entry in entries]
+
+
+# Called with (check name, reported failure or None, query parameters); returns (HTTP status, text)
+PingHandler = Callable[[str, Optional[str], Dict[str, str]], Tuple[int, str]]
+
+
+class HeartbeatServer:
+    """Minimal HTTP endpoint that services ping
+
+    ``GET|POST /ping/<check>`` reports success and ``/ping/<check>/fail`` a
+    failure (the request body, if any, is the error message). Unknown checks
+    are registered when the ping carries ``?period=SECONDS`` (and optionally
+    ``grace``). One request per connection; responses are plain text.
+    """
+
+    def __init__(self, on_ping: PingHandler, host: str = HEARTBEAT_HOST, port: int = HEARTBEAT_PORT,
+                 token: str = HEARTBEAT_TOKEN):
+        self.on_ping = on_ping
+        self.host = host
+        self.port = port
+        self.token = token
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        print(f"[HEARTBEAT] Listening on http://{self.host}:{self.port}/ping/<check>")
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, text = await asyncio.wait_for(self._handle(reader), timeout=10)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError, UnicodeDecodeError):
+            status, text = 400, "Bad request"
+        except Exception:
+            writer.close()
+            raise
+        body = (text + "\n").encode()
+        try:
+            writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+                         f"Content-Type: text/plain\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader) -> Tuple[int, str]:
+        method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+        headers = {}
+        for _ in range(MAX_REQUEST_HEAD):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        else:
+            return 431, "Request headers too large"
+
+        length = min(int(headers.get("content-length") or 0), MAX_REQUEST_BODY)
+        body = (await reader.readexactly(length)).decode("utf-8", "replace").strip() if length else ""
+        if method not in ("GET", "POST", "HEAD"):
+            return 405, "Use GET or POST"
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if self.token:
+            supplied = query.pop("token", "") or headers.get("authorization", "").removeprefix("Bearer ").strip()
+            if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+                return 401, "Invalid heartbeat token"
+
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        if len(parts) < 2 or parts[0] != "ping" or not parts[1]:
+            return 404, "Not found; ping /ping/<check> or /ping/<check>/fail"
+        failure = None
+        if len(parts) == 3 and parts[2] == "fail":
+            failure = body or "Job reported failure"
+        elif len(parts) != 2:
+            return 404, "Not found; ping /ping/<check> or /ping/<check>/fail"
+        return self.on_ping(parts[1], failure, query)
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+            405: "Method Not Allowed", 431: "Request Header Fields Too Large"}
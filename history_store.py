@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Probe History Store
+Memory-mapped ring buffers of probe results per target, grown as targets are added
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# History Store Configuration
+# Directory for the agent's data files (created on first use)
+AGENT_DATA_DIR = os.getenv("AGENT_DATA_DIR", "data")
+# Set HISTORY_PATH to an empty value to disable probe history
+HISTORY_PATH = os.getenv("HISTORY_PATH", os.path.join(AGENT_DATA_DIR, "probe_history.bin"))
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "30"))
+# Seconds of history one record covers: a target keeps at most one record per interval (its worst
+# result), so retention holds however often it is probed. Rings hold retention / resolution records
+HISTORY_RESOLUTION = float(os.getenv("HISTORY_RESOLUTION", "60"))
+# Upper bound on targets with history; the file only grows to the targets actually recorded
+HISTORY_MAX_TARGETS = int(os.getenv("HISTORY_MAX_TARGETS", "10000"))
+
+# Record: timestamp (u32 epoch s), status (u8), unused (u8), HTTP code (u16),
+# then dns/connect/tls/ttfb/transfer/total latencies in milliseconds (u16 each)
+RECORD = struct.Struct("<IBBH6H")
+LATENCY_FIELDS = ("dns", "connect", "tls", "ttfb", "transfer", "total")
+# Latency slot value for a phase that was not measured (e.g. tls on plain HTTP)
+NOT_MEASURED = 0xFFFF
+MAX_LATENCY_MS = NOT_MEASURED - 1
+
+STATUS_CODES = {"UP": 1, "DOWN": 2, "DEGRADED": 3}
+STATUS_NAMES = {code: status for status, code in STATUS_CODES.items()}
+# Statuses where the target answered correctly (DEGRADED is slow but up)
+AVAILABLE_CODES = (STATUS_CODES["UP"], STATUS_CODES["DEGRADED"])
+# Which of two results in one resolution interval its record keeps
+STATUS_WEIGHT = {STATUS_CODES["UP"]: 1, STATUS_CODES["DEGRADED"]: 2, STATUS_CODES["DOWN"]: 3}
+
+# File header: magic, version, record size, slots per target, max targets
+HEADER = struct.Struct("<4sHHII")
+MAGIC = b"PUAH"
+VERSION = 1
+# Per-target ring header: next write position, records stored
+RING = struct.Struct("<II")
+
+
+def default_slots(resolution: float = HISTORY_RESOLUTION) -> int:
+    return max(1, int(HISTORY_RETENTION_DAYS * 86400 / resolution))
+
+
+def _to_ms(seconds: Optional[float]) -> int:
+    if seconds is None:
+        return NOT_MEASURED
+    return min(int(round(seconds * 1000)), MAX_LATENCY_MS)
+
+
+class HistoryStore:
+    """Per-target ring buffers of probe results in one memory-mapped file
+
+    Each ring is ``slots`` fixed 20-byte records (30 days at one record a minute
+    is about 860 KB). A target gets at most one record per ``resolution``
+    seconds: further results in the same interval are folded into it, keeping
+    the worst, so fast probing of a failing target doesn't eat its retention.
+
+    The file holds room for ``capacity`` rings and grows, doubling, as targets
+    are added, up to ``max_targets``; a ring's space is never moved, so the
+    record area stays one contiguous (capacity, slots) array. A file written
+    with other dimensions is rewritten to the configured ones on open, keeping
+    each target's newest records. Pages are only brought into memory when
+    touched. Target names map to ring numbers through a small JSON index next
+    to the file.
+    """
+
+    def __init__(self, path: str = HISTORY_PATH, slots: Optional[int] = None,
+                 max_targets: int = HISTORY_MAX_TARGETS, resolution: float = HISTORY_RESOLUTION):
+        self.path = path
+        self.index_path = path + ".index.json"
+        self.resolution = resolution
+        self.slots = slots or default_slots(resolution)
+        self.max_targets = max_targets
+        self._lock = threading.Lock()
+        self._rings_offset = HEADER.size
+        self._data_offset = HEADER.size + RING.size * max_targets
+        self._ring_bytes = RECORD.size * self.slots
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._index: Dict[str, int] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._file = open(path, "r+b" if size else "w+b")
+        if size:
+            try:
+                dimensions = self._check_header()
+                if dimensions != (self.slots, self.max_targets):
+                    self._resize(*dimensions)
+                    size = os.path.getsize(path)
+            except (OSError, ValueError):
+                self._file.close()
+                raise
+        else:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.slots, max_targets))
+
+        used = set(self._index.values())
+        # Lowest free ring first, so the file only grows when every allocated ring is in use
+        self._free = [ring for ring in range(max_targets - 1, -1, -1) if ring not in used]
+
+        stored = max(0, (size - self._data_offset) // self._ring_bytes)
+        self.capacity = min(max_targets, max(stored, max(used, default=-1) + 1, 1))
+        self._map = self._map_file(self.capacity)
+
+    def _map_file(self, capacity: int) -> mmap.mmap:
+        """Extend the file to hold ``capacity`` rings (never shrinking it) and map it"""
+        size = self._data_offset + self._ring_bytes * capacity
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        return mmap.mmap(self._file.fileno(), size)
+
+    def _grow(self, ring: int) -> None:
+        """Make room for ``ring`` (caller holds the lock)"""
+        self.capacity = min(self.max_targets, max(ring + 1, 2 * self.capacity))
+        # The old map is left to the garbage collector: vectorised readers may still hold views of it
+        self._map = self._map_file(self.capacity)
+
+    def _check_header(self) -> Tuple[int, int]:
+        """The slots per ring and max targets the file was written with"""
+        magic, version, record_size, slots, max_targets = HEADER.unpack(self._file.read(HEADER.size))
+        if (magic, version, record_size) != (MAGIC, VERSION, RECORD.size):
+            raise ValueError(f"{self.path} is not a version {VERSION} probe history file")
+        return slots, max_targets
+
+    def _resize(self, old_slots: int, old_max_targets: int) -> None:
+        """Rewrite a file laid out for other dimensions, keeping each ring's newest records"""
+        too_high = [name for name, ring in self._index.items() if ring >= self.max_targets]
+        if too_high:
+            raise ValueError(f"{self.path} has {len(too_high)} targets beyond HISTORY_MAX_TARGETS="
+                             f"{self.max_targets}; raise it or move the file aside")
+        print(f"[HISTORY] Resizing {self.path} from {old_slots} slots x {old_max_targets} targets "
+              f"to {self.slots} x {self.max_targets}")
+        old_data = HEADER.size + RING.size * old_max_targets
+        old_size = os.fstat(self._file.fileno()).st_size
+        old = mmap.mmap(self._file.fileno(), old_size, access=mmap.ACCESS_READ)
+        tmp_path = self.path + ".resize"
+        try:
+            with open(tmp_path, "w+b") as out:
+                out.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.slots, self.max_targets))
+                rings = max(self._index.values(), default=-1) + 1
+                out.truncate(self._data_offset + self._ring_bytes * rings)
+                for ring in self._index.values():
+                    base = old_data + ring * old_slots * RECORD.size
+                    head, count = (RING.unpack_from(old, HEADER.size + ring * RING.size)
+                                   if base < old_size else (0, 0))
+                    count = min(count, self.slots)
+                    start = (head - count) % old_slots
+                    # Oldest kept record first: the end of the old ring, then its start
+                    first = min(count, old_slots - start)
+                    records = (old[base + start * RECORD.size:base + (start + first) * RECORD.size]
+                               + old[base:base + (count - first) * RECORD.size])
+                    out.seek(self._data_offset + ring * self._ring_bytes)
+                    out.write(records)
+                    out.seek(self._rings_offset + ring * RING.size)
+                    out.write(RING.pack(count % self.slots, count))
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            old.close()
+        os.replace(tmp_path, self.path)
+        self._file.close()
+        self._file = open(self.path, "r+b")
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _ring(self, name: str, create: bool) -> Optional[int]:
+        ring = self._index.get(name)
+        if ring is None and create:
+            if not self._free:
+                raise ValueError(f"Probe history is full ({self.max_targets} targets)")
+            ring = self._index[name] = self._free.pop()
+            if ring >= self.capacity:
+                self._grow(ring)
+            RING.pack_into(self._map, self._rings_offset + ring * RING.size, 0, 0)
+            self._save_index()
+        return ring
+
+    def record(self, name: str, result: Dict, timestamp: Optional[float] = None) -> None:
+        """Append a probe result to the target's ring, overwriting the oldest when full
+
+        A result in the same resolution interval as the newest record replaces
+        that record only if it is worse (DOWN over DEGRADED over UP).
+        """
+        timings = result.get("timings") or {}
+        total = result.get("response_time", timings.get("total"))
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        status = STATUS_CODES.get(result.get("status"), 0)
+        row = RECORD.pack(
+            timestamp,
+            status,
+            0,
+            result.get("code") or 0,
+            *(_to_ms(timings.get(field)) for field in LATENCY_FIELDS[:-1]),
+            _to_ms(total),
+        )
+        with self._lock:
+            ring = self._ring(name, create=True)
+            header_offset = self._rings_offset + ring * RING.size
+            head, count = RING.unpack_from(self._map, header_offset)
+            if count:
+                newest = self._data_offset + (ring * self.slots + (head - 1) % self.slots) * RECORD.size
+                newest_at, newest_status = struct.unpack_from("<IB", self._map, newest)
+                if newest_at // self.resolution == timestamp // self.resolution:
+                    # Keep the interval's first timestamp, so time-weighted readers see when it started
+                    if STATUS_WEIGHT.get(status, 0) > STATUS_WEIGHT.get(newest_status, 0):
+                        self._map[newest + 4:newest + RECORD.size] = row[4:]
+                    return
+            offset = self._data_offset + (ring * self.slots + head) * RECORD.size
+            self._map[offset:offset + RECORD.size] = row
+            RING.pack_into(self._map, header_offset, (head + 1) % self.slots, min(count + 1, self.slots))
+
+    def _iter_rows(self, name: str, limit: Optional[int] = None) -> Iterator[Tuple]:
+        """Raw records for a target, oldest first, optionally only the newest ``limit`` (caller holds the lock)"""
+        ring = self._ring(name, create=False)
+        if ring is None:
+            return
+        head, count = RING.unpack_from(self._map, self._rings_offset + ring * RING.size)
+        if limit is not None:
+            count = min(count, limit)
+        base = self._data_offset + ring * self.slots * RECORD.size
+        start = (head - count) % self.slots
+        # At most two contiguous spans: oldest..end of ring, then start of ring..head
+        spans = [(start, min(count, self.slots - start)), (0, max(0, count - (self.slots - start)))]
+        for first, length in spans:
+            if length:
+                offset = base + first * RECORD.size
+                yield from RECORD.iter_unpack(self._map[offset:offset + length * RECORD.size])
+
+    def records(self, name: str, since: Optional[float] = None,
+                limit: Optional[int] = None) -> List[Dict]:
+        """Stored probe results for a target, oldest first
+
+        ``since`` (epoch s) drops older records; ``limit`` reads only the newest ones.
+        """
+        with self._lock:
+            rows = list(self._iter_rows(name, limit))
+        records = []
+        for timestamp, status, _, code, *latencies in rows:
+            if since is not None and timestamp < since:
+                continue
+            records.append({
+                "timestamp": timestamp,
+                "status": STATUS_NAMES.get(status, "UNKNOWN"),
+                "code": code or None,
+                "timings": {field: ms / 1000 for field, ms in zip(LATENCY_FIELDS, latencies)
+                            if ms != NOT_MEASURED},
+            })
+        return records
+
+    def summary(self, name: str, since: Optional[float] = None) -> Dict:
+        """Uptime, mean response time and outage count over the stored (or ``since``) window"""
+        samples = up = outages = 0
+        total_ms = timed = 0
+        last_timestamp = None
+        previous = None
+        with self._lock:
+            for timestamp, status, _, _, *latencies in self._iter_rows(name):
+                if since is not None and timestamp < since:
+                    continue
+                samples += 1
+                last_timestamp = timestamp
+                if status in AVAILABLE_CODES:
+                    up += 1
+                    if latencies[-1] != NOT_MEASURED:
+                        total_ms += latencies[-1]
+                        timed += 1
+                elif previous is None or previous in AVAILABLE_CODES:
+                    outages += 1
+                previous = status
+        return {
+            "samples": samples,
+            "uptime_percentage": round(100.0 * up / samples, 3) if samples else None,
+            "average_response_time": round(total_ms / timed / 1000, 3) if timed else None,
+            "outages": outages,
+            "last_check": last_timestamp,
+        }
+
+    def ring_table(self) -> Tuple[List[str], List[int], List[int], List[int]]:
+        """Every target's name, ring number, next write position and record count"""
+        with self._lock:
+            names = list(self._index)
+            rings = [self._index[name] for name in names]
+            positions = [RING.unpack_from(self._map, self._rings_offset + ring * RING.size)
+                         for ring in rings]
+        return names, rings, [head for head, _ in positions], [count for _, count in positions]
+
+    def data_buffer(self) -> Tuple[mmap.mmap, int, int]:
+        """The mapped file, the offset of the record area and the rings it holds, for vectorised readers
+
+        Records for ring ``r`` occupy slots ``r * slots .. (r + 1) * slots - 1``.
+        """
+        with self._lock:
+            return self._map, self._data_offset, self.capacity
+
+    def forget(self, name: str) -> None:
+        """Drop a target's history and free its ring"""
+        with self._lock:
+            ring = self._index.pop(name, None)
+            if ring is not None:
+                self._free.append(ring)
+                self._save_index()
+
+    def flush(self) -> None:
+        """Write dirty pages back to the file"""
+        with self._lock:
+            self._map.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+
+_history_store: Optional[HistoryStore] = None
+_history_store_lock = threading.Lock()
+
+
+def get_history_store() -> Optional[HistoryStore]:
+    """Get the process-wide probe history, or None when history is disabled"""
+    global _history_store
+    if not HISTORY_PATH:
+        return None
+    with _history_store_lock:
+        if _history_store is None:
+            try:
+                _history_store = HistoryStore()
+            except (OSError, ValueError) as e:
+                print(f"[HISTORY] Could not open probe history {HISTORY_PATH}: {e} - history disabled")
+                return None
+        return _history_store
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Latency Sketches
+Mergeable streaming quantile sketches (DDSketch) per target and time window
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+
+from history_store import get_history_store
+
+# Load environment variables
+load_dotenv()
+
+# Latency Sketch Configuration
+# Quantile estimates are within this relative error of the true value
+LATENCY_SKETCH_ACCURACY = float(os.getenv("LATENCY_SKETCH_ACCURACY", "0.01"))
+LATENCY_SKETCH_MAX_BINS = int(os.getenv("LATENCY_SKETCH_MAX_BINS", "1024"))
+# Each target keeps LATENCY_SKETCH_WINDOWS sketches of LATENCY_SKETCH_WINDOW seconds (24 x 1h)
+LATENCY_SKETCH_WINDOW = int(os.getenv("LATENCY_SKETCH_WINDOW", "3600"))
+LATENCY_SKETCH_WINDOWS = int(os.getenv("LATENCY_SKETCH_WINDOWS", "24"))
+
+# Quantiles reported in summaries
+QUANTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+
+# Values at or below this are counted in the zero bucket
+MIN_INDEXABLE = 1e-9
+
+
+class DDSketch:
+    """Relative-error quantile sketch (Masson et al., VLDB 2019)
+
+    Values fall into logarithmic buckets, so any quantile is estimated within
+    ``relative_accuracy`` of the true value. Memory is capped at ``max_bins``
+    buckets (the lowest buckets are collapsed first, which only affects low
+    quantiles). Sketches with the same accuracy merge exactly.
+    """
+
+    def __init__(self, relative_accuracy: float = LATENCY_SKETCH_ACCURACY,
+                 max_bins: int = LATENCY_SKETCH_MAX_BINS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= MIN_INDEXABLE:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other: "DDSketch") -> None:
+        """Fold another sketch into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile ``q`` (0..1), or None for an empty sketch"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Clamp to the exact extremes so p0/p100 never overshoot
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        """JSON-serialisable form, e.g. for shipping between worker processes"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(key): count for key, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, max_bins: int = LATENCY_SKETCH_MAX_BINS) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], max_bins)
+        sketch.bins = {int(key): count for key, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+class WindowedSketch:
+    """The last ``windows`` fixed-length (wall-clock aligned) sketches for one target"""
+
+    def __init__(self, window: int = LATENCY_SKETCH_WINDOW, windows: int = LATENCY_SKETCH_WINDOWS):
+        self.window = window
+        self.windows = windows
+        self.sketches: Dict[int, DDSketch] = {}
+
+    def add(self, value: float, timestamp: float) -> None:
+        index = int(timestamp // self.window)
+        sketch = self.sketches.get(index)
+        if sketch is None:
+            sketch = self.sketches[index] = DDSketch()
+            self._expire(index)
+        sketch.add(value)
+
+    def _expire(self, current: int) -> None:
+        for index in [i for i in self.sketches if i <= current - self.windows]:
+            del self.sketches[index]
+
+    def merged(self, windows: Optional[int] = None, now: Optional[float] = None) -> DDSketch:
+        """One sketch covering the most recent ``windows`` windows (default: all kept)"""
+        current = int((now if now is not None else time.time()) // self.window)
+        oldest = current - min(windows or self.windows, self.windows) + 1
+        result = DDSketch()
+        for index, sketch in self.sketches.items():
+            if oldest <= index <= current:
+                result.merge(sketch)
+        return result
+
+    def merge(self, other: "WindowedSketch") -> None:
+        for index, sketch in other.sketches.items():
+            mine = self.sketches.get(index)
+            if mine is None:
+                mine = self.sketches[index] = DDSketch()
+            mine.merge(sketch)
+        if self.sketches:
+            self._expire(max(self.sketches))
+
+    def to_dict(self) -> Dict:
+        return {"window": self.window,
+                "sketches": {str(index): sketch.to_dict() for index, sketch in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict, windows: int = LATENCY_SKETCH_WINDOWS) -> "WindowedSketch":
+        windowed = cls(data["window"], windows)
+        windowed.sketches = {int(index): DDSketch.from_dict(sketch)
+                             for index, sketch in data["sketches"].items()}
+        return windowed
+
+
+class LatencySketches:
+    """Windowed latency sketches for every target, safe to share between threads
+
+    A target seen for the first time is seeded from the probe history store with
+    results recorded before this registry was created, so quantiles survive
+    restarts and one-shot runs without double counting this process's results.
+    """
+
+    def __init__(self, history=None):
+        self.history = history
+        self.created_at = time.time()
+        self._targets: Dict[str, WindowedSketch] = {}
+        self._lock = threading.Lock()
+
+    def _target(self, name: str) -> WindowedSketch:
+        windowed = self._targets.get(name)
+        if windowed is None:
+            windowed = self._targets[name] = WindowedSketch()
+            if self.history is not None:
+                self._seed(name, windowed)
+        return windowed
+
+    def _seed(self, name: str, windowed: WindowedSketch) -> None:
+        since = self.created_at - windowed.window * windowed.windows
+        for record in self.history.records(name, since=since):
+            if record["timestamp"] >= int(self.created_at):
+                break
+            total = record["timings"].get("total")
+            if record["status"] in ("UP", "DEGRADED") and total is not None:
+                windowed.add(total, record["timestamp"])
+
+    def record(self, name: str, latency: float, timestamp: Optional[float] = None) -> None:
+        with self._lock:
+            self._target(name).add(latency, timestamp if timestamp is not None else time.time())
+
+    def sketch(self, name: str, windows: Optional[int] = None) -> DDSketch:
+        """Merged sketch of a target's most recent ``windows`` windows"""
+        with self._lock:
+            return self._target(name).merged(windows)
+
+    def quantile(self, name: str, q: float, windows: Optional[int] = None,
+                 min_samples: int = 1) -> Optional[float]:
+        sketch = self.sketch(name, windows)
+        return sketch.quantile(q) if sketch.count >= min_samples else None
+
+    def quantiles(self, name: str, windows: Optional[int] = None) -> Dict:
+        """p50/p95/p99 (seconds) and sample count for a target"""
+        sketch = self.sketch(name, windows)
+        summary = {label: _round(sketch.quantile(q)) for label, q in QUANTILES.items()}
+        summary["count"] = sketch.count
+        return summary
+
+    def snapshot(self, names: Optional[Iterable[str]] = None) -> Dict:
+        """Serialisable per-target sketches, for merging into another process's registry"""
+        with self._lock:
+            names = list(self._targets) if names is None else names
+            return {name: self._targets[name].to_dict() for name in names if name in self._targets}
+
+    def merge(self, snapshot: Dict) -> None:
+        """Fold a :meth:`snapshot` from another process into this registry"""
+        with self._lock:
+            for name, data in snapshot.items():
+                self._target(name).merge(WindowedSketch.from_dict(data))
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def format_quantiles(summary: Dict) -> str:
+    """One-line p50/p95/p99 description for alerts"""
+    if not summary.get("count"):
+        return "no latency samples yet"
+    return (f"p50 {summary['p50']:.3f}s / p95 {summary['p95']:.3f}s / p99 {summary['p99']:.3f}s "
+            f"({summary['count']} samples)")
+
+
+_latency_sketches: Optional[LatencySketches] = None
+_latency_sketches_lock = threading.Lock()
+
+
+def get_latency_sketches() -> LatencySketches:
+    """Get the process-wide latency sketches shared by the probe engine, alerts and Portia"""
+    global _latency_sketches
+    with _latency_sketches_lock:
+        if _latency_sketches is None:
+            _latency_sketches = LatencySketches(history=get_history_store())
+        return _latency_sketches
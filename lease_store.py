@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Lease Store
+Target ownership leases so a fleet of agents probes and remediates each target exactly once
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from hash_ring import HashRing
+
+# Load environment variables
+load_dotenv()
+
+# Fleet Configuration
+# Lease backend shared by every agent, e.g. sqlite:///shared/leases.db; empty runs stand-alone
+FLEET_LEASE_STORE = os.getenv("FLEET_LEASE_STORE", "")
+# Unique per agent; defaults to the hostname (set it when running several agents on one host)
+FLEET_NODE_ID = os.getenv("FLEET_NODE_ID", "") or socket.gethostname()
+# A dead node's targets move to the survivors within about this many seconds
+FLEET_LEASE_TTL = float(os.getenv("FLEET_LEASE_TTL", "15"))
+# Heartbeat and lease renewal period; keep well under FLEET_LEASE_TTL
+FLEET_SYNC_INTERVAL = float(os.getenv("FLEET_SYNC_INTERVAL", "5"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_owner ON leases (owner);
+CREATE TABLE IF NOT EXISTS nodes (
+    node TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Take the lease if it is free, expired or already ours; a live lease held by another node is left alone
+_ACQUIRE = """
+INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+WHERE leases.owner = excluded.owner OR leases.expires_at <= ?
+"""
+
+
+class LeaseStore(ABC):
+    """Interface for lease backends
+
+    Leases and heartbeats expire on wall-clock time, so the fleet's clocks
+    must agree to well within the lease TTL.
+    """
+
+    @abstractmethod
+    def heartbeat(self, node: str, ttl: float) -> None:
+        """Mark a node alive for another ``ttl`` seconds"""
+
+    @abstractmethod
+    def live_nodes(self) -> List[str]:
+        """Nodes whose heartbeat has not expired"""
+
+    @abstractmethod
+    def acquire(self, names: Iterable[str], owner: str, ttl: float) -> Set[str]:
+        """Take or renew leases for ``ttl`` seconds; returns the names ``owner`` now holds"""
+
+    @abstractmethod
+    def release(self, names: Iterable[str], owner: str) -> None:
+        """Give up leases held by ``owner`` so another node can take them at once"""
+
+    @abstractmethod
+    def leave(self, node: str) -> None:
+        """Release everything a node holds and drop its heartbeat (clean shutdown)"""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """Leases in a SQLite database shared by every agent
+
+    Good for agents on one host or on a filesystem with working POSIX locks
+    (local testing, a shared volume); not for network filesystems such as NFS.
+    Each batch of lease changes is one IMMEDIATE transaction, so competing
+    nodes serialise on the database lock rather than racing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def heartbeat(self, node: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO nodes (node, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(node) DO UPDATE SET expires_at = excluded.expires_at",
+                (node, now + ttl),
+            )
+
+    def live_nodes(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT node FROM nodes WHERE expires_at > ? ORDER BY node",
+                                      (time.time(),))
+            return [node for node, in rows]
+
+    def acquire(self, names: Iterable[str], owner: str, ttl: float) -> Set[str]:
+        now = time.time()
+        rows = [(name, owner, now + ttl, now) for name in names]
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(_ACQUIRE, rows)
+            return {name for name, in self._conn.execute(
+                "SELECT name FROM leases WHERE owner = ? AND expires_at > ?", (owner, now))}
+
+    def release(self, names: Iterable[str], owner: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("DELETE FROM leases WHERE name = ? AND owner = ?",
+                                   [(name, owner) for name in names])
+
+    def leave(self, node: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM leases WHERE owner = ?", (node,))
+            self._conn.execute("DELETE FROM nodes WHERE node = ?", (node,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_lease_store(spec: str) -> LeaseStore:
+    """Open a lease backend from a ``scheme://location`` spec (currently sqlite:///path)"""
+    scheme, _, location = spec.partition("://")
+    if scheme == "sqlite" and location:
+        # sqlite:///relative.db -> relative.db, sqlite:////abs/path.db -> /abs/path.db
+        return SQLiteLeaseStore(location[1:] if location.startswith("/") else location)
+    raise ValueError(f"Unsupported lease store {spec!r} (expected sqlite:///path)")
+
+
+class FleetMembership:
+    """This node's share of the fleet's targets
+
+    Every live node hashes the full target list onto a ring of live nodes, so
+    they agree on a preferred owner for each target without talking to each
+    other. A node claims its preferred targets, keeps renewing them, and hands
+    back targets that move to a node that just joined. When a node stops
+    heartbeating its ring share moves to the survivors, which take the leases
+    as soon as they expire.
+    """
+
+    def __init__(self, store: LeaseStore, node: str = FLEET_NODE_ID, ttl: float = FLEET_LEASE_TTL):
+        self.store = store
+        self.node = node
+        self.ttl = ttl
+        self.owned: Set[str] = set()
+        # Monotonic time until which the leases in ``owned`` are known to be valid
+        self.valid_until = 0.0
+
+    def owns(self, name: str) -> bool:
+        return name in self.owned
+
+    def sync(self, names: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """Heartbeat and rebalance; returns the (gained, lost) target names"""
+        names = set(names)
+        started = time.monotonic()
+        self.store.heartbeat(self.node, self.ttl)
+        ring = HashRing(self.store.live_nodes() or [self.node])
+        preferred = {name for name in names if ring.node_for(name) == self.node}
+
+        # Targets that moved to another node: stop reporting them first, then free the leases
+        previous = self.owned
+        handed_over = previous - preferred
+        if handed_over:
+            self.owned = previous - handed_over
+            self.store.release(handed_over, self.node)
+        held = self.store.acquire(preferred, self.node, self.ttl) & preferred
+
+        gained, lost = held - previous, previous - held
+        self.owned = held
+        self.valid_until = started + self.ttl
+        return gained, lost
+
+    def expire(self) -> Set[str]:
+        """After failed syncs, give up targets once their leases may have lapsed; returns them"""
+        if time.monotonic() < self.valid_until:
+            return set()
+        lost, self.owned = self.owned, set()
+        return lost
+
+    def claim(self, name: str, ttl: float) -> bool:
+        """Take or keep one target's lease outside the sync cycle (one-shot checks)"""
+        return name in self.store.acquire([name], self.node, ttl)
+
+    def leave(self) -> None:
+        """Hand every target back so the rest of the fleet picks them up immediately"""
+        self.owned = set()
+        self.store.leave(self.node)
+
+
+_fleet: Optional[FleetMembership] = None
+_fleet_lock = threading.Lock()
+
+
+def get_fleet() -> Optional[FleetMembership]:
+    """Get this process's fleet membership, or None when running stand-alone"""
+    global _fleet
+    if not FLEET_LEASE_STORE:
+        return None
+    with _fleet_lock:
+        if _fleet is None:
+            try:
+                _fleet = FleetMembership(open_lease_store(FLEET_LEASE_STORE))
+            except (sqlite3.Error, ValueError) as e:
+                print(f"[FLEET] Could not open lease store {FLEET_LEASE_STORE}: {e} - running stand-alone")
+                return None
+        return _fleet
@@ -1,20 +1,25 @@
 
 
 import os
-import requests
 import json
 import time
 from dotenv import load_dotenv
-from github import Github
-import git
-import google.generativeai as genai
 from datetime import datetime
-import yaml
-import jinja2
+from probe_engine import AsyncProbeEngine, ProbeTarget, RetryPolicy
+from history_store import get_history_store
+from lease_store import get_fleet
+from channels import get_alert_channels
+from outbox import close_outbox, get_outbox
+from latency_sketch import format_quantiles
+from state_store import get_state_store
 
 # Load environment variables
 load_dotenv()
 
+# Remediation dependencies (PyGithub, GitPython, google.generativeai) are imported
+# lazily inside GitHubManager/GeminiCodeAnalyzer: a healthy UP check never needs
+# them, and importing them costs about a second of startup. See bench_startup.py.
+
 # Configuration
 MONITORED_URL = os.getenv("MONITORED_URL", "https://example.com")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -31,12 +36,19 @@ GITHUB_BRANCH = os.getenv("GITHUB_BRANCH", "main")
 # Monitoring Configuration
 RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
 DOWN_THRESHOLD = int(os.getenv("DOWN_THRESHOLD", "2"))
+MONITORING_INTERVAL = int(os.getenv("MONITORING_INTERVAL", "5")) * 60
+# While a target stays DOWN, repeat the alert at most this often (seconds; defaults to MONITORING_INTERVAL).
+# The first failure and the DOWN_THRESHOLD crossing always alert, however fast the target is probed.
+ALERT_REPEAT_INTERVAL = float(os.getenv("ALERT_REPEAT_INTERVAL") or MONITORING_INTERVAL)
+# Start AI analysis and a fix PR as soon as a target turns DEGRADED, before it goes DOWN
+ANOMALY_EARLY_REMEDIATION = os.getenv("ANOMALY_EARLY_REMEDIATION", "false").lower() == "true"
 
 class GitHubManager:
     def __init__(self):
         if not all([GITHUB_TOKEN, GITHUB_REPO_OWNER, GITHUB_REPO_NAME]):
             raise ValueError("GitHub configuration incomplete")
         
+        from github import Github
         self.github = Github(GITHUB_TOKEN)
         self.repo = self.github.get_repo(f"{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}")
         self.repo_path = f"temp_repo_{int(time.time())}"
@@ -44,6 +56,7 @@ class GitHubManager:
     def clone_repository(self):
         """Clone the repository to local workspace"""
         try:
+            import git
             print(f"[GITHUB] Cloning repository {self.repo.full_name}...")
             git.Repo.clone_from(
                 f"https://{GITHUB_TOKEN}@github.com/{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}.git",
@@ -58,6 +71,7 @@ class GitHubManager:
     def create_branch(self, branch_name):
         """Create a new branch for the fix"""
         try:
+            import git
             repo = git.Repo(self.repo_path)
             new_branch = repo.create_head(branch_name)
             new_branch.checkout()
@@ -70,6 +84,7 @@ class GitHubManager:
     def commit_and_push(self, commit_message):
         """Commit changes and push to remote"""
         try:
+            import git
             repo = git.Repo(self.repo_path)
             repo.git.add(".")
             repo.index.commit(commit_message)
@@ -111,10 +126,11 @@ class GeminiCodeAnalyzer:
             raise ValueError("Google AI API key not configured")
         
         # Configure Google AI
+        import google.generativeai as genai
         genai.configure(api_key=GOOGLE_AI_API_KEY)
         self.model = genai.GenerativeModel('gemini-1.5-flash')
     
-    def analyze_website_issue(self, url, error_details):
+    def analyze_website_issue(self, url, error_details, timings=None):
         """Analyze website issues and suggest fixes using Gemini"""
         try:
             prompt = f"""
@@ -123,6 +139,8 @@ class GeminiCodeAnalyzer:
             
             Error details: {error_details}
             
+            {format_latency_breakdown(timings)}
+            
             Please analyze this issue and provide a JSON response with:
             1. Root cause analysis
             2. Specific code fixes needed
@@ -213,51 +231,119 @@ class GeminiCodeAnalyzer:
             return []
 
 class UptimeMonitor:
-    def __init__(self):
-        self.down_count = 0
-        self.last_status = None
+    def __init__(self, engine=None, name=None, store=None, history=None):
+        # With a state store, counters, open incidents and fix PRs survive restarts
+        self.name = name
+        self.store = store if name else None
+        self.reload()
+        self.history = history if name else None
+        self.engine = engine or AsyncProbeEngine(retry_policy=RetryPolicy(attempts=RETRY_ATTEMPTS))
+    
+    def reload(self):
+        """Take this target's state from the state store, if one is configured"""
+        state = self.store.load(self.name) if self.store else {}
+        self.down_count = state.get("down_count", 0)
+        self.last_status = state.get("last_status")
+        self.incident_id = state.get("incident_id")
+        self.pr_number = state.get("pr_number")
+        self.last_alert_at = state.get("last_alert_at")
+    
+    def persist(self, flush=False):
+        """Save this target's state to the state store, if one is configured"""
+        if self.store:
+            self.store.save(self.name, down_count=self.down_count, last_status=self.last_status,
+                            incident_id=self.incident_id, pr_number=self.pr_number,
+                            last_alert_at=self.last_alert_at)
+            if flush:
+                self.store.flush()
+    
+    def record_result(self, result):
+        """Append a check result to this target's probe history, if one is configured"""
+        if self.history:
+            self.history.record(self.name, result)
         
     def check_uptime(self, url):
         """Check website uptime with retries"""
-        for attempt in range(RETRY_ATTEMPTS):
-            try:
-                print(f"[CHECK] Attempt {attempt + 1}/{RETRY_ATTEMPTS} for {url}")
-                response = requests.get(url, timeout=10)
-                
-                if response.status_code == 200:
-                    return {"status": "UP", "code": response.status_code, "response_time": response.elapsed.total_seconds()}
-                else:
-                    return {"status": "DOWN", "code": response.status_code, "error": f"HTTP {response.status_code}"}
-            except requests.exceptions.Timeout:
-                return {"status": "DOWN", "error": "Timeout"}
-            except requests.exceptions.ConnectionError:
-                return {"status": "DOWN", "error": "Connection Error"}
-            except Exception as e:
-                return {"status": "DOWN", "error": str(e)}
-        
-        return {"status": "DOWN", "error": "All retry attempts failed"}
-
-def send_telegram_alert(message):
-    """Send Telegram alert"""
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        print("[WARNING] Telegram credentials missing")
-        return False
+        print(f"[CHECK] Probing {url} (up to {RETRY_ATTEMPTS} attempts)")
+        result = self.engine.check(ProbeTarget(url))
+        if result.get("attempts", 1) > 1:
+            print(f"[CHECK] {url} needed {result['attempts']} attempts")
+        return result
     
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    def check_many(self, targets):
+        """Check many targets concurrently, returning results keyed by target name"""
+        targets = [t if isinstance(t, ProbeTarget) else ProbeTarget(t) for t in targets]
+        print(f"[CHECK] Probing {len(targets)} targets")
+        return self.engine.check_many(targets)
+
+def send_alert(message, url=None):
+    """Send an alert to every channel in PORTIA_NOTIFICATION_CHANNELS (in the background, see channels.py)"""
+    return get_alert_channels().notify(message, url)
+
+def open_portia_incident(portia_client, stream, **fields):
+    """Create a Portia incident; returns its id, or None if it could not be created
+
+    With the alert outbox enabled the create is queued and a placeholder id is
+    returned at once; updates made with it are delivered after the create.
+    """
+    outbox = get_outbox()
+    if outbox is not None:
+        ref = outbox.new_ref(stream)
+        try:
+            outbox.put("portia.create_incident", dict(fields, ref=ref), key=ref, stream=stream)
+            print(f"[PORTIA] Incident queued for delivery")
+            return ref
+        except Exception as e:
+            print(f"[OUTBOX] Could not queue incident: {e} - sending directly")
     try:
-        resp = requests.post(url, data={"chat_id": TELEGRAM_CHAT_ID, "text": message}, timeout=10)
-        if resp.status_code == 200:
-            print("[SUCCESS] Telegram alert sent!")
-            return True
-        else:
-            print(f"[ERROR] Telegram notification failed: {resp.status_code}")
-            return False
+        incident_result = portia_client.create_incident(**fields)
+    except Exception as e:
+        print(f"[PORTIA] Error creating incident: {e}")
+        return None
+    if not incident_result:
+        print(f"[PORTIA] Failed to create incident")
+        return None
+    print(f"[PORTIA] Incident created successfully")
+    return incident_result.get("incident_id")
+
+def update_portia_incident(portia_client, stream, incident_id, **fields):
+    """Update a Portia incident (through the alert outbox when it is enabled)"""
+    outbox = get_outbox()
+    if outbox is not None:
+        try:
+            outbox.put("portia.update_incident", dict(fields, incident_id=incident_id), stream=stream)
+            return
+        except Exception as e:
+            print(f"[OUTBOX] Could not queue incident update: {e} - sending directly")
+    if outbox is not None:
+        incident_id = outbox.resolve(incident_id)
+        if incident_id is None:
+            print(f"[PORTIA] Incident not created yet - skipping update")
+            return
+    try:
+        portia_client.update_incident(incident_id, **fields)
     except Exception as e:
-        print(f"[ERROR] Telegram notification error: {e}")
-        return False
+        print(f"[PORTIA] Error updating incident: {e}")
+
+def format_latency_breakdown(timings):
+    """Describe per-phase probe latency for the Gemini prompt"""
+    if not timings:
+        return "Latency breakdown: not available"
+    
+    lines = ["Latency breakdown of the failing probe (milliseconds):"]
+    for phase, label in [("dns", "DNS resolution"), ("connect", "TCP connect"), ("tls", "TLS handshake"),
+                         ("ttfb", "Time to first byte"), ("transfer", "Body transfer"), ("total", "Total")]:
+        if phase in timings:
+            lines.append(f"            - {label}: {timings[phase] * 1000:.1f}")
+    if timings.get("failed_phase"):
+        lines.append(f"            The probe failed during the '{timings['failed_phase']}' phase.")
+    return "\n".join(lines)
 
-def handle_website_down(url, error_details):
-    """Handle website downtime - analyze and create fixes"""
+def handle_website_down(url, error_details, timings=None):
+    """Handle website downtime - analyze and create fixes
+
+    Returns the number of the fix pull request, or None if no PR was opened.
+    """
     print(f"[CRITICAL] Website {url} is DOWN - Initiating automatic fix process...")
     
     try:
@@ -266,11 +352,11 @@ def handle_website_down(url, error_details):
         
         # Analyze the issue
         print("[AI] Analyzing website issue using Gemini...")
-        issue_analysis = ai_analyzer.analyze_website_issue(url, error_details)
+        issue_analysis = ai_analyzer.analyze_website_issue(url, error_details, timings)
         
         if not issue_analysis:
             print("[ERROR] Gemini analysis failed, cannot proceed with automatic fixes")
-            return False
+            return None
         
         print(f"[AI] Issue analyzed - Priority: {issue_analysis.get('priority', 'UNKNOWN')}")
         
@@ -280,19 +366,19 @@ def handle_website_down(url, error_details):
         
         if not fixes:
             print("[ERROR] No code fixes generated")
-            return False
+            return None
         
         # Initialize GitHub manager
         github_manager = GitHubManager()
         
         # Clone repository
         if not github_manager.clone_repository():
-            return False
+            return None
         
         # Create fix branch
         branch_name = f"fix/website-downtime-{int(time.time())}"
         if not github_manager.create_branch(branch_name):
-            return False
+            return None
         
         # Apply fixes
         print("[GITHUB] Applying code fixes...")
@@ -312,7 +398,7 @@ def handle_website_down(url, error_details):
         commit_message = f"🔧 Auto-fix: Website downtime issue detected and resolved\n\n- Root cause: {issue_analysis.get('root_cause', 'Unknown')}\n- Priority: {issue_analysis.get('priority', 'Unknown')}\n- Files modified: {len(fixes)}"
         
         if not github_manager.commit_and_push(commit_message):
-            return False
+            return None
         
         # Create pull request
         pr_title = f"🚨 Auto-Fix: Website Downtime Resolution - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
@@ -364,31 +450,20 @@ Root Cause: {issue_analysis.get('root_cause', 'Unknown')}
 Review and merge the PR to restore website functionality.
             """
             
-            send_telegram_alert(telegram_message)
+            send_alert(telegram_message, url)
             
             # Cleanup
             github_manager.cleanup()
-            return True
+            return pr.number
         
-        return False
+        return None
             
     except Exception as e:
         print(f"[ERROR] Automatic fix process failed: {e}")
-        return False
+        return None
 
-def main():
-    print(f"🚀 Portia Uptime Agent - Enhanced Hackathon Version (Gemini AI + Portia SDK)")
-    print(f"📊 Monitoring: {MONITORED_URL}")
-    print(f"🤖 AI Code Analysis: {'✅ Enabled (Gemini)' if GOOGLE_AI_API_KEY else '❌ Disabled'}")
-    print(f"🔗 GitHub Integration: {'✅ Enabled' if GITHUB_TOKEN else '❌ Disabled'}")
-    print(f"📱 Telegram Alerts: {'✅ Enabled' if TELEGRAM_BOT_TOKEN else '❌ Disabled'}")
-    print(f"🔌 Portia SDK: {'✅ Enabled' if PORTIA_API_KEY else '❌ Disabled'}")
-    print("-" * 80)
-    
-    # Initialize monitor and Portia SDK
-    monitor = UptimeMonitor()
-    
-    # Initialize Portia SDK if available
+def init_portia_client():
+    """Initialize the Portia SDK client if configured, otherwise return None"""
     portia_client = None
     if PORTIA_API_KEY:
         try:
@@ -404,100 +479,220 @@ def main():
         except Exception as e:
             print(f"[WARNING] Portia SDK initialization failed: {e}")
             portia_client = None
-    
-    # Check uptime
-    print(f"\n🔍 Checking uptime for {MONITORED_URL}...")
-    result = monitor.check_uptime(MONITORED_URL)
-    
-    print(f"\n📊 Uptime Check Result:")
-    print(f"   Status: {result.get('status', 'UNKNOWN')}")
-    print(f"   Details: {result}")
-    
-    # Handle results
-    if result.get('status') == "DOWN":
+    return portia_client
+
+def format_quorum(vote):
+    """One-line summary of a quorum confirmation for alerts"""
+    if not vote:
+        return "single probe"
+    return f"{vote['down_votes']}/{vote['votes']} vantage points ({vote['required']} required)"
+
+def format_affected(affected):
+    """Alert line listing downstream targets rolled up into this target's incident"""
+    if not affected:
+        return ""
+    names = ", ".join(affected[:10]) + (f" and {len(affected) - 10} more" if len(affected) > 10 else "")
+    return f"\nDownstream affected: {names}"
+
+def handle_check_result(monitor, url, result, portia_client=None, upstream=None, affected=None):
+    """Alert, report and remediate based on a single uptime check result
+
+    ``upstream`` names a DOWN target this one depends on: failures are then rolled up
+    into that target's incident instead of alerting and remediating here. ``affected``
+    lists downstream targets rolled up into this target's incident.
+    """
+    if upstream and result.get('status') != "UP":
+        print(f"[DEPENDENCY] {monitor.name or url} is {result.get('status')} - "
+              f"rolled up into upstream {upstream}, no alert or fix")
+        
+    elif result.get('status') == "DOWN":
         monitor.down_count += 1
         print(f"[ALERT] Site is DOWN (Count: {monitor.down_count}/{DOWN_THRESHOLD})")
         
-        # Send immediate alert
+        # Alert on the UP->DOWN transition and at the threshold; repeats are throttled so a
+        # target probed fast while DOWN (adaptive intervals) doesn't page on every probe
+        now = time.time()
+        repeat_due = monitor.last_alert_at is None or now - monitor.last_alert_at >= ALERT_REPEAT_INTERVAL
+        notify = monitor.down_count in (1, DOWN_THRESHOLD) or repeat_due
+        if not notify:
+            print(f"[ALERT] Repeat alert suppressed (at most every {ALERT_REPEAT_INTERVAL:g}s while DOWN)")
+        
         alert_message = f"""
 🚨 UPTIME ALERT
 
-Website: {MONITORED_URL}
+Website: {url}
 Status: DOWN
 Error: {result.get('error', 'Unknown')}
-Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Confirmed by: {format_quorum(result.get('quorum'))}
+Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{format_affected(affected)}
 
 Attempting automatic resolution using Gemini AI...
         """
-        send_telegram_alert(alert_message)
+        if notify:
+            send_alert(alert_message, url)
+            monitor.last_alert_at = now
         
-        # Send incident report to Portia API if available
-        if portia_client and portia_client.enabled:
-            try:
-                incident_data = {
-                    "status": "DOWN",
-                    "error": result.get('error', 'Unknown'),
-                    "response_time": result.get('response_time', 0),
-                    "down_count": monitor.down_count,
-                    "severity": "high" if monitor.down_count >= DOWN_THRESHOLD else "medium"
-                }
-                
-                # Create incident in Portia
-                incident_result = portia_client.create_incident(
-                    monitor_id="uptime-agent",
-                    title=f"Website Downtime: {MONITORED_URL}",
-                    description=f"Website {MONITORED_URL} is down. Error: {result.get('error', 'Unknown')}",
-                    severity="high" if monitor.down_count >= DOWN_THRESHOLD else "medium",
-                    status="open"
-                )
-                
-                if incident_result:
-                    print(f"[PORTIA] Incident created successfully")
-                else:
-                    print(f"[PORTIA] Failed to create incident")
-                    
-            except Exception as e:
-                print(f"[PORTIA] Error creating incident: {e}")
+        # Send incident report to Portia API if available (one incident per outage)
+        if portia_client and portia_client.enabled and monitor.incident_id and notify:
+            update_portia_incident(
+                portia_client,
+                monitor.name or url,
+                monitor.incident_id,
+                down_count=monitor.down_count,
+                severity="high" if monitor.down_count >= DOWN_THRESHOLD else "medium",
+                error=result.get('error', 'Unknown')
+            )
+        elif portia_client and portia_client.enabled and not monitor.incident_id:
+            # Create incident in Portia
+            monitor.incident_id = open_portia_incident(
+                portia_client,
+                monitor.name or url,
+                monitor_id="uptime-agent",
+                title=f"Website Downtime: {url}",
+                description=f"Website {url} is down. Error: {result.get('error', 'Unknown')}",
+                severity="high" if monitor.down_count >= DOWN_THRESHOLD else "medium",
+                status="open"
+            )
         
-        # If threshold reached, initiate automatic fix
-        if monitor.down_count >= DOWN_THRESHOLD:
+        # If threshold reached, initiate automatic fix (once per outage)
+        if monitor.down_count == DOWN_THRESHOLD and monitor.pr_number:
+            print(f"[INFO] Fix PR #{monitor.pr_number} already opened while the site was degraded")
+        elif monitor.down_count == DOWN_THRESHOLD and result.get('remediate') is False:
+            print(f"[INFO] Down threshold reached ({DOWN_THRESHOLD}) - automatic fix disabled for this check")
+        elif monitor.down_count == DOWN_THRESHOLD:
             print(f"[CRITICAL] Down threshold reached ({DOWN_THRESHOLD}) - Starting automatic fix process...")
-            if handle_website_down(MONITORED_URL, result.get('error', 'Unknown')):
+            timings = dict(result.get('timings') or {}, failed_phase=result.get('failed_phase'))
+            # Save the threshold crossing first so a crash mid-remediation can't repeat it
+            monitor.persist(flush=True)
+            pr_number = handle_website_down(url, result.get('error', 'Unknown'), timings)
+            if pr_number:
+                monitor.pr_number = pr_number
                 print("[SUCCESS] Automatic fix process completed successfully!")
             else:
                 print("[ERROR] Automatic fix process failed")
+        elif monitor.down_count > DOWN_THRESHOLD:
+            print(f"[INFO] Automatic fix already attempted for this outage")
         else:
             print(f"[INFO] Waiting for threshold ({DOWN_THRESHOLD}) before automatic fix...")
             
+    elif result.get('status') == "DEGRADED":
+        degraded = result.get('degraded') or {}
+        if monitor.last_status == "DEGRADED":
+            print(f"[DEGRADED] Latency still elevated: {degraded.get('reason', 'Unknown')}")
+        else:
+            print(f"[DEGRADED] Latency anomaly: {degraded.get('reason', 'Unknown')}")
+            send_alert(f"""
+⚠️ LATENCY DEGRADATION
+
+Website: {url}
+Status: DEGRADED (responding, but slowly)
+Details: {degraded.get('reason', 'Unknown')}
+Response Time: {result.get('response_time', 'Unknown')}s
+Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+            """, url)
+            
+            if ANOMALY_EARLY_REMEDIATION and not monitor.pr_number:
+                print("[CRITICAL] Starting early automatic fix process for latency degradation...")
+                pr_number = handle_website_down(url, f"Latency degraded: {degraded.get('reason', 'Unknown')}",
+                                                result.get('timings'))
+                if pr_number:
+                    monitor.pr_number = pr_number
+                    print("[SUCCESS] Automatic fix process completed successfully!")
+                else:
+                    print("[ERROR] Automatic fix process failed")
+    
     elif result.get('status') == "UP":
         if monitor.down_count > 0:
             print(f"[RECOVERY] Site is back UP - Resetting down counter")
             monitor.down_count = 0
             
-            # Update incident status in Portia if available
-            if portia_client and portia_client.enabled:
-                try:
-                    # This would update the incident status to resolved
-                    print(f"[PORTIA] Would update incident status to resolved")
-                except Exception as e:
-                    print(f"[PORTIA] Error updating incident: {e}")
+            # Resolve the outage's incident in Portia if available
+            if portia_client and portia_client.enabled and monitor.incident_id:
+                update_portia_incident(
+                    portia_client,
+                    monitor.name or url,
+                    monitor.incident_id,
+                    status="resolved",
+                    resolved_at=datetime.now().isoformat()
+                )
+            fix_line = f"\nFix PR: #{monitor.pr_number}" if monitor.pr_number else ""
+            latency = format_quantiles(monitor.engine.latency.quantiles(monitor.name or url))
+            monitor.incident_id = None
+            monitor.pr_number = None
             
             # Send recovery notification
             recovery_message = f"""
 ✅ WEBSITE RECOVERED!
 
-Website: {MONITORED_URL}
+Website: {url}
 Status: UP
 Response Time: {result.get('response_time', 'Unknown')}s
-Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Latency (24h): {latency}
+Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{fix_line}{format_affected(affected)}
 
 The website is now accessible again.
             """
-            send_telegram_alert(recovery_message)
+            send_alert(recovery_message, url)
+        elif monitor.last_status == "DEGRADED":
+            print(f"[RECOVERY] Latency back to normal")
+            fix_line = f"\nFix PR: #{monitor.pr_number}" if monitor.pr_number else ""
+            monitor.pr_number = None
+            send_alert(f"""
+✅ LATENCY RECOVERED
+
+Website: {url}
+Response Time: {result.get('response_time', 'Unknown')}s
+Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{fix_line}
+            """, url)
         else:
                 print("[SUCCESS] Site is UP")
     
     monitor.last_status = result.get('status')
+    monitor.persist()
+
+def main():
+    try:
+        check_once()
+    finally:
+        # Deliver queued alerts and incident writes before the interpreter shuts thread pools down
+        close_outbox()
+
+def check_once():
+    print(f"🚀 Portia Uptime Agent - Enhanced Hackathon Version (Gemini AI + Portia SDK)")
+    print(f"📊 Monitoring: {MONITORED_URL}")
+    print(f"🤖 AI Code Analysis: {'✅ Enabled (Gemini)' if GOOGLE_AI_API_KEY else '❌ Disabled'}")
+    print(f"🔗 GitHub Integration: {'✅ Enabled' if GITHUB_TOKEN else '❌ Disabled'}")
+    print(f"📱 Telegram Alerts: {'✅ Enabled' if TELEGRAM_BOT_TOKEN else '❌ Disabled'}")
+    print(f"📣 Alert Channels: {', '.join(get_alert_channels().channels) or '❌ None configured'}")
+    print(f"🔌 Portia SDK: {'✅ Enabled' if PORTIA_API_KEY else '❌ Disabled'}")
+    print("-" * 80)
+    
+    # With a fleet lease store only the agent holding this URL's lease checks it. One-shot runs
+    # keep the lease for two check intervals, so it fails over after two missed runs.
+    fleet = get_fleet()
+    if fleet is not None and not fleet.claim(MONITORED_URL, 2 * MONITORING_INTERVAL):
+        print(f"[FLEET] {MONITORED_URL} is checked by another agent - skipping this run")
+        return
+    
+    # Initialize monitor (restoring state saved by previous runs) and Portia SDK
+    store = get_state_store()
+    monitor = UptimeMonitor(name=MONITORED_URL, store=store, history=get_history_store())
+    
+    # Initialize Portia SDK if available
+    portia_client = init_portia_client()
+    
+    # Check uptime
+    print(f"\n🔍 Checking uptime for {MONITORED_URL}...")
+    result = monitor.check_uptime(MONITORED_URL)
+    monitor.record_result(result)
+    
+    print(f"\n📊 Uptime Check Result:")
+    print(f"   Status: {result.get('status', 'UNKNOWN')}")
+    print(f"   Details: {result}")
+    
+    # Handle results
+    handle_check_result(monitor, MONITORED_URL, result, portia_client)
+    monitor.persist(flush=True)
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,9 @@
 """
 Simple continuous monitoring script for Portia Uptime Agent
 Runs the main uptime check at regular intervals
+
+By default checks run inside a resident daemon (see monitor_daemon.py).
+Pass --subprocess to re-run main.py in a fresh process every cycle instead.
 """
 
 import time
@@ -9,14 +12,8 @@ import subprocess
 import sys
 import os
 
-def main():
-    print("🔄 Starting continuous monitoring...")
-    print("Press Ctrl+C to stop")
-    print("-" * 50)
-    
-    # Get monitoring interval from environment (default: 5 minutes)
-    interval = int(os.getenv("MONITORING_INTERVAL", "5")) * 60
-    
+def run_subprocess_loop(interval):
+    """Legacy mode: spawn main.py for every check"""
     try:
         while True:
             print(f"\n⏰ Running uptime check at {time.strftime('%H:%M:%S')}...")
@@ -40,5 +37,25 @@ def main():
     except Exception as e:
         print(f"\n❌ Monitoring error: {e}")
 
+def main():
+    print("🔄 Starting continuous monitoring...")
+    print("Press Ctrl+C to stop")
+    print("-" * 50)
+    
+    # Get monitoring interval from environment (default: 5 minutes)
+    interval = int(os.getenv("MONITORING_INTERVAL", "5")) * 60
+    
+    if "--subprocess" in sys.argv[1:]:
+        run_subprocess_loop(interval)
+        return
+    
+    try:
+        from monitor_daemon import run_daemon
+        run_daemon(interval)
+    except KeyboardInterrupt:
+        print("\n🛑 Monitoring stopped by user")
+    except Exception as e:
+        print(f"\n❌ Monitoring error: {e}")
+
 if __name__ == "__main__":
     main()
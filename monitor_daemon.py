@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Monitoring Daemon
+Long-lived in-process monitor that keeps clients and per-target state warm between checks
+"""
+
+import asyncio
+import os
+import signal
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from main import UptimeMonitor, handle_check_result, init_portia_client, update_portia_incident
+from probe_engine import AsyncProbeEngine, ProbeTarget, load_targets
+from scheduler import (ADAPTIVE_INTERVALS, PROBE_BUDGET, PROBE_BUDGET_CYCLE, AdaptiveIntervalPolicy,
+                       ProbeBudget, TargetScheduler, next_wakeup, take_due)
+from slo_engine import NUMPY_AVAILABLE, SLO_EVAL_INTERVAL, SLOEngine
+from dependency_graph import DEPENDENCY_PAUSE_INTERVAL, DEPENDENCY_RECHECK_AGE, DependencyGraph
+from heartbeat import (HEARTBEAT_GRACE, HEARTBEAT_PORT, HEARTBEAT_REMEDIATION, HeartbeatCheck,
+                       HeartbeatServer, HeartbeatTracker, load_checks, missed_result)
+from history_store import get_history_store
+from lease_store import FLEET_SYNC_INTERVAL, get_fleet
+from outbox import close_outbox
+from state_store import get_state_store
+
+# Monitoring interval in minutes, as used by monitor_continuous.py
+MONITORING_INTERVAL = int(os.getenv("MONITORING_INTERVAL", "5")) * 60
+# Seconds between progress summaries in the daemon log
+DAEMON_SUMMARY_INTERVAL = float(os.getenv("DAEMON_SUMMARY_INTERVAL", "60"))
+
+
+class MonitorDaemon:
+    """Runs scheduled uptime checks for every target inside a single process
+
+    With a fleet lease store (see lease_store.py) every agent loads the same
+    targets but only probes, alerts on and remediates the ones it holds leases for.
+    """
+
+    def __init__(self, targets: List[ProbeTarget], interval: float = MONITORING_INTERVAL):
+        self.engine = AsyncProbeEngine()
+        self.interval = interval
+        self.scheduler = TargetScheduler()
+        # Failing targets are probed faster and stable ones slower, within a global probe budget
+        self.adaptive = AdaptiveIntervalPolicy() if ADAPTIVE_INTERVALS else None
+        self.budget = ProbeBudget(PROBE_BUDGET, PROBE_BUDGET_CYCLE) if PROBE_BUDGET > 0 else None
+        self._intervals: Dict[str, float] = {}
+        # Downstream failures roll up into the DOWN upstream they depend on
+        self.dependencies = DependencyGraph()
+        self._down: Set[str] = set()
+        self._rolled_up: Dict[str, Set[str]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._upstream_checks: Dict[str, asyncio.Task] = {}
+        self.targets: Dict[str, ProbeTarget] = {}
+        self.monitors: Dict[str, UptimeMonitor] = {}
+        # Down counters, incidents and fix PRs are restored from the previous run
+        self.store = get_state_store()
+        self.history = get_history_store()
+        self.slo = self._init_slo()
+        self._slo_task: Optional[asyncio.Future] = None
+        self.portia_client = init_portia_client()
+        self.fleet = get_fleet()
+        self._fleet_task: Optional[asyncio.Future] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._probing: Dict[str, asyncio.Task] = {}
+        self._stop_event: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stats = {"probes": 0, "up": 0, "not_up": 0, "overlaps": 0}
+
+        for target in targets:
+            self.add_target(target)
+
+        # Push checks: services ping the heartbeat endpoint, missed deadlines report DOWN
+        self.heartbeats = HeartbeatTracker() if HEARTBEAT_PORT else None
+        self._heartbeat_server: Optional[HeartbeatServer] = None
+        if self.heartbeats is not None:
+            for check in load_checks():
+                self.add_heartbeat(check)
+
+    def _init_slo(self) -> Optional[SLOEngine]:
+        if self.history is None:
+            print("[SLO] Probe history disabled - burn-rate alerts off")
+            return None
+        if not NUMPY_AVAILABLE:
+            print("[SLO] numpy not installed - burn-rate alerts off")
+            return None
+        return SLOEngine(self.history, store=self.store)
+
+    def interval_for(self, target: ProbeTarget) -> float:
+        return target.interval or self.interval
+
+    def add_target(self, target: ProbeTarget) -> None:
+        """Start monitoring a target, keeping existing state if already known"""
+        self.dependencies.set(target.name, target.depends_on)
+        self.targets[target.name] = target
+        if target.name not in self.monitors:
+            self.monitors[target.name] = UptimeMonitor(self.engine, name=target.name, store=self.store,
+                                                       history=self.history)
+        if self.monitors[target.name].last_status == "DOWN":
+            self._down.add(target.name)
+        if self.fleet is None or self.fleet.owns(target.name):
+            self._schedule(target)
+
+    def remove_target(self, name: str) -> None:
+        """Stop monitoring a target and drop its state"""
+        self.targets.pop(name, None)
+        self.monitors.pop(name, None)
+        self.dependencies.remove(name)
+        self._down.discard(name)
+        self._rolled_up.pop(name, None)
+        self._checked_at.pop(name, None)
+        self._intervals.pop(name, None)
+        if self.adaptive is not None:
+            self.adaptive.forget(name)
+        self._unschedule(name)
+        if self.store:
+            self.store.delete(name)
+        if self.history:
+            self.history.forget(name)
+
+    def add_heartbeat(self, check: HeartbeatCheck) -> HeartbeatCheck:
+        """Start tracking a heartbeat check (or update its period)"""
+        check = self.heartbeats.register(check)
+        self.dependencies.set(check.name, check.depends_on)
+        if self._wakeup is not None:
+            self._wakeup.set()  # Its deadline may be earlier than the loop is sleeping for
+        if check.name not in self.monitors:
+            self.monitors[check.name] = UptimeMonitor(self.engine, name=check.name, store=self.store,
+                                                      history=self.history)
+        return check
+
+    def _on_ping(self, name: str, failure: Optional[str], query: Dict[str, str]) -> Tuple[int, str]:
+        """Handle a heartbeat ping from the endpoint (runs on the event loop)"""
+        if "period" in query:
+            try:
+                self.add_heartbeat(HeartbeatCheck(name, float(query["period"]),
+                                                  float(query.get("grace", HEARTBEAT_GRACE))))
+            except ValueError as e:
+                return 400, str(e)
+        if name not in self.heartbeats.checks:
+            return 404, f"Unknown check {name!r}; add ?period=SECONDS to register it"
+        check = self.heartbeats.ping(name)
+        if failure is None:
+            result = {"status": "UP", "heartbeat": {"period": check.interval}}
+        else:
+            result = {"status": "DOWN", "error": f"Job reported failure: {failure}",
+                      "heartbeat": {"period": check.interval}, "remediate": HEARTBEAT_REMEDIATION}
+        self.dispatch_result(check, result, pushed=True)
+        return 200, "OK"
+
+    def _schedule(self, target: ProbeTarget) -> None:
+        """Start probing a target (probes run in this process)"""
+        self.scheduler.add(target.name, self.interval_for(target))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _unschedule(self, name: str) -> None:
+        self.scheduler.remove(name)
+
+    def _set_interval(self, name: str, interval: float) -> None:
+        """Apply an adaptive interval from the target's next run"""
+        if name in self.scheduler:
+            self.scheduler.reschedule(name, interval)
+
+    def _adapt_interval(self, target: ProbeTarget, result: Dict) -> None:
+        base = self.interval_for(target)
+        current = self._intervals.get(target.name, base)
+        interval = self.adaptive.next_interval(target.name, base, current, result.get("status"))
+        if interval != current:
+            self._intervals[target.name] = interval
+            self._set_interval(target.name, interval)
+
+    async def run_cycle(self) -> Dict[str, Dict]:
+        """Probe all targets once and dispatch their results"""
+        results = await self.engine.probe_many(list(self.targets.values()))
+        for name, result in results.items():
+            self.dispatch_result(self.targets[name], result)
+        return results
+
+    def dispatch_result(self, target: ProbeTarget, result: Dict, pushed: bool = False) -> None:
+        """Hand a probe result to the alert/remediation path without blocking probes
+
+        ``pushed`` results (heartbeat pings) are reported by whichever agent
+        received them, lease or not.
+        """
+        monitor = self.monitors.get(target.name)
+        if monitor is None:
+            return
+        if self.fleet is not None and not pushed and not self.fleet.owns(target.name):
+            # Lease moved to another agent while this probe was in flight; it reports from now on
+            return
+        monitor.record_result(result)
+        self._checked_at[target.name] = time.monotonic()
+        self._track_dependencies(target.name, result.get("status"))
+        upstream = self.dependencies.root_cause(target.name, self._down)
+        if upstream is not None:
+            # Paused behind the upstream: keep the slow interval and blame the upstream
+            if result.get("status") != "UP":
+                self._roll_up(upstream, target.name)
+        elif self.adaptive is not None and target.name in self.targets:
+            self._adapt_interval(target, result)
+
+        # Steady-state UP needs no alerting, so skip the worker thread entirely
+        if result.get("status") == "UP" and monitor.down_count == 0 and monitor.last_status != "DEGRADED":
+            if monitor.last_status != "UP":
+                monitor.last_status = "UP"
+                monitor.persist()
+            return
+
+        previous = self._pending.get(target.name)
+        task = asyncio.create_task(self._handle_result(target, monitor, result, previous, upstream))
+        self._pending[target.name] = task
+        task.add_done_callback(lambda t, name=target.name: self._forget(name, t))
+
+    async def _handle_result(self, target: ProbeTarget, monitor: UptimeMonitor, result: Dict,
+                             previous: Optional[asyncio.Task], upstream: Optional[str] = None) -> None:
+        # Results for one target are handled in order so down_count stays consistent
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        if upstream is None and result.get("status") != "UP":
+            upstream = await self._blame_upstream(target.name)
+
+        print(f"[DAEMON] {target.name}: {result.get('status', 'UNKNOWN')} - {result}")
+        loop = asyncio.get_running_loop()
+        try:
+            # Alerting and remediation use blocking clients, so keep them off the event loop
+            affected = sorted(self._rolled_up.get(target.name, ()))
+            await loop.run_in_executor(
+                None, handle_check_result, monitor, target.url, result, self.portia_client,
+                upstream, affected
+            )
+        except Exception as e:
+            print(f"[ERROR] Failed to handle result for {target.name}: {e}")
+        if result.get("status") == "UP" and monitor.down_count == 0:
+            # The recovery alert listed what was rolled up; start afresh next outage
+            self._rolled_up.pop(target.name, None)
+
+    async def _blame_upstream(self, name: str) -> Optional[str]:
+        """Re-probe a failing target's monitored upstreams before it alerts; returns the DOWN one"""
+        upstreams = [upstream for upstream in self.dependencies.ancestors(name) if upstream in self.targets]
+        if not upstreams:
+            return None
+        await asyncio.gather(*(self._check_upstream(upstream) for upstream in upstreams),
+                             return_exceptions=True)
+        upstream = self.dependencies.root_cause(name, self._down)
+        if upstream is not None:
+            self._roll_up(upstream, name)
+        return upstream
+
+    async def _check_upstream(self, name: str) -> None:
+        # Many dependents failing at once share one probe of their upstream
+        task = self._upstream_checks.get(name)
+        if task is None:
+            if time.monotonic() - self._checked_at.get(name, float("-inf")) < DEPENDENCY_RECHECK_AGE:
+                return
+            task = asyncio.create_task(self._probe_upstream(self.targets[name]))
+            self._upstream_checks[name] = task
+            task.add_done_callback(lambda t, name=name: self._upstream_checks.pop(name, None))
+        await task
+
+    async def _probe_upstream(self, target: ProbeTarget) -> None:
+        result = await self.engine.probe(target)
+        self._stats["probes"] += 1
+        self._stats["up" if result.get("status") == "UP" else "not_up"] += 1
+        if target.name in self.targets:
+            self.dispatch_result(target, result)
+
+    def _track_dependencies(self, name: str, status: Optional[str]) -> None:
+        """Pause a DOWN target's dependents, and resume them once it is back"""
+        if status == "DOWN" and name not in self._down:
+            self._down.add(name)
+            for downstream in self.dependencies.descendants(name):
+                if downstream in self.targets:
+                    self._intervals[downstream] = DEPENDENCY_PAUSE_INTERVAL
+                    self._set_interval(downstream, DEPENDENCY_PAUSE_INTERVAL)
+        elif status != "DOWN" and name in self._down:
+            self._down.discard(name)
+            for downstream in self.dependencies.descendants(name):
+                target = self.targets.get(downstream)
+                if target is not None and self.dependencies.root_cause(downstream, self._down) is None:
+                    self._intervals.pop(downstream, None)
+                    self._set_interval(downstream, self.interval_for(target))
+
+    def _roll_up(self, upstream: str, name: str) -> None:
+        """Attach a failing downstream target to its upstream's open incident"""
+        affected = self._rolled_up.setdefault(upstream, set())
+        if name in affected:
+            return
+        affected.add(name)
+        print(f"[DEPENDENCY] {name} failing behind DOWN upstream {upstream} "
+              f"({len(affected)} downstream targets affected)")
+        monitor = self.monitors.get(upstream)
+        if self.portia_client and self.portia_client.enabled and monitor and monitor.incident_id:
+            asyncio.get_running_loop().run_in_executor(
+                None, self._update_rolled_up_incident, upstream, monitor.incident_id, sorted(affected)
+            )
+
+    def _update_rolled_up_incident(self, upstream: str, incident_id: str, affected: List[str]) -> None:
+        update_portia_incident(self.portia_client, upstream, incident_id, affected_targets=affected)
+
+    def _forget(self, name: str, task: asyncio.Task) -> None:
+        if self._pending.get(name) is task:
+            del self._pending[name]
+
+    def stop(self) -> None:
+        """Ask the daemon to exit once in-flight checks finish"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def _start_probe(self, name: str) -> None:
+        target = self.targets.get(name)
+        if target is None:
+            return
+        if name in self._probing:
+            # The previous probe is still running (slow target); don't stack another
+            self._stats["overlaps"] += 1
+            return
+        task = asyncio.create_task(self._probe(target))
+        self._probing[name] = task
+        task.add_done_callback(lambda t, name=name: self._probing.pop(name, None))
+
+    async def _probe(self, target: ProbeTarget) -> None:
+        result = await self.engine.probe(target)
+        self._stats["probes"] += 1
+        self._stats["up" if result.get("status") == "UP" else "not_up"] += 1
+        if target.name in self.targets:
+            self.dispatch_result(target, result)
+
+    def _log_summary(self) -> None:
+        stats = self._stats
+        line = (f"[DAEMON] {time.strftime('%H:%M:%S')} - {stats['probes']} probes "
+                f"({stats['up']} UP, {stats['not_up']} not UP), {len(self._probing)} in flight, "
+                f"{stats['overlaps']} overlapping runs skipped, "
+                f"{self.scheduler.skipped_runs} late slots skipped")
+        if self.adaptive is not None:
+            fast = sum(1 for name, interval in self._intervals.items()
+                       if name in self.targets and interval < self.interval_for(self.targets[name]))
+            line += f", {fast} targets on fast intervals"
+        if self.budget is not None:
+            line += f", probe budget exhausted {self.budget.exhausted}x"
+        if self.portia_client is not None:
+            paced = self.portia_client.limiter.wait_stats()
+            if paced["delayed"]:
+                line += (f", Portia requests paced {paced['delayed']}/{paced['requests']} "
+                         f"(avg wait {paced['average_wait']:.2f}s, {paced['throttled']} throttled)")
+        print(line)
+        self._stats = {"probes": 0, "up": 0, "not_up": 0, "overlaps": 0}
+
+    async def run(self) -> None:
+        """Run scheduled checks until stopped"""
+        self._stop_event = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, self.stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # Signal handlers are unavailable on Windows event loops
+
+        print(f"[DAEMON] Monitoring {len(self.targets)} targets (default interval {self.interval}s)")
+        if self.heartbeats is not None:
+            self._heartbeat_server = HeartbeatServer(self._on_ping)
+            await self._heartbeat_server.start()
+        next_summary = time.monotonic() + DAEMON_SUMMARY_INTERVAL
+        next_slo = time.monotonic() + SLO_EVAL_INTERVAL
+        next_fleet = time.monotonic()
+        if self.fleet is not None:
+            print(f"[FLEET] Joining as {self.fleet.node}")
+            self._apply_fleet_changes(await loop.run_in_executor(None, self._sync_fleet, self._fleet_names(), False))
+            next_fleet += FLEET_SYNC_INTERVAL
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            for name in take_due(self.scheduler, self.budget, now):
+                self._start_probe(name)
+            if self.heartbeats is not None:
+                for check in self.heartbeats.pop_expired(now):
+                    self.dispatch_result(check, missed_result(check))
+
+            if self.fleet is not None and now >= next_fleet:
+                self._start_fleet_sync(loop)
+                next_fleet = now + FLEET_SYNC_INTERVAL
+
+            if now >= next_summary:
+                self._log_summary()
+                if self.store:
+                    self.store.flush()
+                if self.history:
+                    self.history.flush()
+                next_summary = now + DAEMON_SUMMARY_INTERVAL
+
+            if self.slo is not None and now >= next_slo:
+                self._start_slo_evaluation(loop)
+                next_slo = now + SLO_EVAL_INTERVAL
+
+            next_due = next_wakeup(self.scheduler, self.budget, now)
+            if self.heartbeats is not None:
+                deadline = self.heartbeats.next_deadline()
+                if deadline is not None:
+                    next_due = deadline if next_due is None else min(next_due, deadline)
+            wake_at = min(next_summary, next_slo if self.slo is not None else next_summary,
+                          next_fleet if self.fleet is not None else next_summary)
+            delay = min(wake_at, next_due if next_due is not None else wake_at) - now
+            self._wakeup.clear()
+            await self._wait_for_event(max(0.0, delay))
+
+        if self._heartbeat_server is not None:
+            await self._heartbeat_server.close()
+        # Let in-flight probes finish, then drain the result handlers they queued
+        if self._probing:
+            await asyncio.gather(*self._probing.values(), return_exceptions=True)
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+        if self.store:
+            self.store.flush()
+        if self.history:
+            self.history.flush()
+        await self._leave_fleet(loop)
+
+    def _start_fleet_sync(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Renew leases in a worker thread and start/stop probing the targets that moved"""
+        if self._fleet_task is not None and not self._fleet_task.done():
+            return
+        self._fleet_task = loop.run_in_executor(None, self._sync_fleet, self._fleet_names(), True)
+        self._fleet_task.add_done_callback(lambda task: self._apply_fleet_changes(task.result()))
+
+    def _fleet_names(self) -> List[str]:
+        """Targets and heartbeat checks to share out; the lease owner reports a check's missed deadlines"""
+        names = list(self.targets)
+        if self.heartbeats is not None:
+            names.extend(check.name for check in self.heartbeats.checks.values())
+        return names
+
+    def _sync_fleet(self, names: List[str], refresh: bool) -> Tuple[Set[str], Set[str]]:
+        try:
+            gained, lost = self.fleet.sync(names)
+        except Exception as e:
+            print(f"[ERROR] Fleet lease sync failed: {e}")
+            gained, lost = set(), self.fleet.expire()
+        if lost and self.store:
+            # The next owner reads down counters and open incidents from the shared state store
+            self.store.flush()
+        if gained and refresh and self.store:
+            self.store.refresh(gained)
+        return gained, lost
+
+    def _apply_fleet_changes(self, changes: Tuple[Set[str], Set[str]]) -> None:
+        gained, lost = changes
+        for name in lost:
+            self._intervals.pop(name, None)
+            self._unschedule(name)
+        for name in gained:
+            if name in self.targets:
+                self.monitors[name].reload()
+                self._schedule(self.targets[name])
+            elif name in self.monitors:
+                self.monitors[name].reload()  # A heartbeat check
+        if gained or lost:
+            print(f"[FLEET] {self.fleet.node} took {len(gained)} targets, handed over {len(lost)}; "
+                  f"owns {len(self.fleet.owned)} of {len(self._fleet_names())}")
+
+    async def _leave_fleet(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self.fleet is None:
+            return
+        if self._fleet_task is not None:
+            await asyncio.gather(self._fleet_task, return_exceptions=True)
+        try:
+            await loop.run_in_executor(None, self.fleet.leave)
+            print(f"[FLEET] {self.fleet.node} left the fleet; its targets fail over now")
+        except Exception as e:
+            print(f"[ERROR] Could not release fleet leases: {e}")
+
+    def _start_slo_evaluation(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Evaluate burn rates in a worker thread, skipping a tick if the last one is still running"""
+        if self._slo_task is not None and not self._slo_task.done():
+            return
+        self._slo_task = loop.run_in_executor(None, self._evaluate_slo)
+
+    def _evaluate_slo(self) -> None:
+        try:
+            # Other agents alert on the targets they own
+            owned = set(self.fleet.owned) if self.fleet is not None else None
+            self.slo.tick(self.portia_client, owned=owned)
+        except Exception as e:
+            print(f"[ERROR] SLO evaluation failed: {e}")
+
+    async def _wait_for_event(self, timeout: float) -> None:
+        """Sleep until ``timeout`` elapses, the daemon stops or a target is added"""
+        waiters = [asyncio.ensure_future(self._stop_event.wait()),
+                   asyncio.ensure_future(self._wakeup.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+
+def run_daemon(interval: float = MONITORING_INTERVAL) -> None:
+    """Start the monitoring daemon for all configured targets
+
+    With PROBE_WORKERS > 1 probing is sharded across worker processes (see sharding.py).
+    """
+    # Imported here because sharding builds on this module
+    from sharding import PROBE_WORKERS, ShardedMonitorDaemon
+
+    if PROBE_WORKERS > 1:
+        daemon = ShardedMonitorDaemon(load_targets(), interval=interval, workers=PROBE_WORKERS)
+    else:
+        daemon = MonitorDaemon(load_targets(), interval=interval)
+    try:
+        asyncio.run(daemon.run())
+    finally:
+        # Alerts raised while shutting down (or left by earlier runs) go out before exit
+        close_outbox()
+
+
+if __name__ == "__main__":
+    try:
+        run_daemon()
+    except KeyboardInterrupt:
+        print("\n🛑 Monitoring stopped by user")
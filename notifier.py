@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Alert Notifier
+Background Telegram dispatcher with per-chat rate limits, retry_after handling and digests
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from connection_pool import get_session_pool
+
+# Load environment variables
+load_dotenv()
+
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+
+# Notifier Configuration
+# Alerts arriving within this many seconds of the first queued one go out as one digest
+NOTIFY_COALESCE_WINDOW = float(os.getenv("NOTIFY_COALESCE_WINDOW", "2"))
+# Per-chat send rate: Telegram allows about 20 messages a minute into a group
+TELEGRAM_RATE_PER_MINUTE = float(os.getenv("TELEGRAM_RATE_PER_MINUTE", "20"))
+TELEGRAM_BURST = int(os.getenv("TELEGRAM_BURST", "3"))
+# Attempts per message before it is dropped (429s wait out retry_after and don't count)
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "10000"))
+# How long a short-lived process waits at exit for queued alerts to go out (seconds)
+NOTIFY_FLUSH_TIMEOUT = float(os.getenv("NOTIFY_FLUSH_TIMEOUT", "30"))
+
+# Telegram rejects messages longer than this
+TELEGRAM_MAX_LENGTH = 4096
+DIGEST_SEPARATOR = "\n────────────\n"
+
+
+class TokenBucket:
+    """Token bucket that can also be frozen until a server-given retry time"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def block_for(self, seconds: float) -> None:
+        """Send nothing for ``seconds`` (Telegram's retry_after), then resume with an empty bucket"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+def build_digest(messages: List[str], limit: int = TELEGRAM_MAX_LENGTH) -> List[str]:
+    """Merge messages into as few Telegram-sized texts as possible"""
+    if len(messages) == 1:
+        return [messages[0][:limit]]
+    header = f"📣 {len(messages)} alerts\n"
+    texts: List[str] = []
+    current = header
+    for message in messages:
+        message = message.strip()[:limit - len(header) - len(DIGEST_SEPARATOR)]
+        addition = (DIGEST_SEPARATOR if current != header else "") + message
+        if len(current) + len(addition) > limit:
+            texts.append(current)
+            current = header + message
+        else:
+            current += addition
+    texts.append(current)
+    return texts
+
+
+class TelegramNotifier:
+    """Queues alerts and delivers them from a background thread
+
+    ``submit`` never blocks on the network. The worker collects everything
+    queued within ``coalesce_window`` of the first alert, merges each chat's
+    alerts into digests and sends them through a per-chat token bucket. A 429
+    response freezes that chat's bucket for the ``retry_after`` Telegram asks for.
+    """
+
+    def __init__(self, bot_token: Optional[str] = TELEGRAM_BOT_TOKEN, chat_id: Optional[str] = TELEGRAM_CHAT_ID,
+                 coalesce_window: float = NOTIFY_COALESCE_WINDOW,
+                 rate_per_minute: float = TELEGRAM_RATE_PER_MINUTE, burst: int = TELEGRAM_BURST,
+                 max_attempts: int = NOTIFY_MAX_ATTEMPTS, queue_size: int = NOTIFY_QUEUE_SIZE):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.coalesce_window = coalesce_window
+        self.rate = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self.max_attempts = max(1, max_attempts)
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=queue_size)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._idle = threading.Condition()
+        self._busy = 0
+        self._closed = False
+        self.stats = {"queued": 0, "sent": 0, "digests": 0, "dropped": 0, "rate_limited": 0}
+        self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+        self._thread.start()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.bot_token and self.chat_id)
+
+    def submit(self, message: str, chat_id: Optional[str] = None) -> bool:
+        """Queue an alert for delivery; returns False if it could not be queued"""
+        chat_id = chat_id or self.chat_id
+        if not self.bot_token or not chat_id or self._closed:
+            return False
+        with self._idle:
+            self._busy += 1
+        try:
+            self._queue.put_nowait((chat_id, message))
+        except queue.Full:
+            self._done(1)
+            self.stats["dropped"] += 1
+            print("[ERROR] Telegram alert queue is full - alert dropped")
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued alert has been sent or dropped; returns False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._busy == 0, timeout)
+
+    def close(self, timeout: float = NOTIFY_FLUSH_TIMEOUT) -> None:
+        self.flush(timeout)
+        self._closed = True
+
+    def _done(self, count: int) -> None:
+        with self._idle:
+            self._busy -= count
+            if self._busy == 0:
+                self._idle.notify_all()
+
+    def _collect(self) -> List[Tuple[str, str]]:
+        """Block for the first alert, then gather whatever else arrives within the window"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            by_chat: Dict[str, List[str]] = {}
+            for chat_id, message in batch:
+                by_chat.setdefault(chat_id, []).append(message)
+            try:
+                for chat_id, messages in by_chat.items():
+                    self.send(chat_id, messages)
+            except Exception as e:
+                print(f"[ERROR] Telegram notifier failed: {e}")
+            finally:
+                self._done(len(batch))
+
+    def send(self, chat_id: str, messages: List[str], max_attempts: Optional[int] = None) -> bool:
+        """Deliver alerts to one chat now, merged into digests; True if every digest was sent
+
+        Blocks on the chat's rate limit. Used by the background thread and by the
+        alert outbox, which does its own retrying and passes ``max_attempts=1``.
+        """
+        texts = build_digest(messages)
+        if len(messages) > 1:
+            self.stats["digests"] += 1
+            print(f"[NOTIFY] Merged {len(messages)} alerts into {len(texts)} Telegram message(s)")
+        sent = [self._deliver(chat_id, text, max_attempts or self.max_attempts) for text in texts]
+        return all(sent)
+
+    def _bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _deliver(self, chat_id: str, text: str, max_attempts: int) -> bool:
+        bucket = self._bucket(chat_id)
+        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        attempt = 0
+        while attempt < max_attempts:
+            wait = bucket.wait_time(time.monotonic())
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            bucket.take()
+            try:
+                resp = get_session_pool().request("POST", url, data={"chat_id": chat_id, "text": text},
+                                                  timeout=10)
+            except Exception as e:
+                attempt += 1
+                print(f"[ERROR] Telegram notification error: {e}")
+                if attempt < max_attempts:
+                    bucket.block_for(min(2 ** attempt, 60))
+                continue
+
+            if resp.status_code == 200:
+                self.stats["sent"] += 1
+                print("[SUCCESS] Telegram alert sent!")
+                return True
+            if resp.status_code == 429:
+                self.stats["rate_limited"] += 1
+                retry_after = retry_after_seconds(resp)
+                print(f"[NOTIFY] Telegram rate limit hit - waiting {retry_after:g}s")
+                bucket.block_for(retry_after)
+                continue
+            attempt += 1
+            print(f"[ERROR] Telegram notification failed: {resp.status_code}")
+            if resp.status_code < 500:
+                break  # Bad token, chat or message: retrying won't help
+            if attempt < max_attempts:
+                bucket.block_for(min(2 ** attempt, 60))
+
+        self.stats["dropped"] += 1
+        return False
+
+
+def retry_after_seconds(resp, default: float = 5.0) -> float:
+    """Telegram's ``parameters.retry_after`` (or a Retry-After header) from a 429 response"""
+    try:
+        return float(resp.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(resp.headers.get("Retry-After", default))
+    except (TypeError, ValueError):
+        return default
+
+
+_notifier: Optional[TelegramNotifier] = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> TelegramNotifier:
+    """Get the process-wide Telegram notifier; queued alerts are flushed at interpreter exit"""
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = TelegramNotifier()
+            atexit.register(_notifier.close)
+        return _notifier
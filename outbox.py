@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Alert Outbox
+Durable SQLite queue for alerts and incident writes, drained with batching, retries and dedup keys
+"""
+
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from notifier import NOTIFY_FLUSH_TIMEOUT
+
+# Load environment variables
+load_dotenv()
+
+# Outbox Configuration
+# Set OUTBOX_PATH to an empty value to send alerts directly (a failed send is then lost)
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "alert_outbox.db")
+# Items claimed per flush
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", "100"))
+# After a new item the flusher waits this long so alerts landing together share a batch (seconds)
+OUTBOX_BATCH_WINDOW = float(os.getenv("OUTBOX_BATCH_WINDOW", "2"))
+# Failed deliveries back off exponentially from OUTBOX_RETRY_BASE up to OUTBOX_RETRY_MAX seconds...
+OUTBOX_RETRY_BASE = float(os.getenv("OUTBOX_RETRY_BASE", "5"))
+OUTBOX_RETRY_MAX = float(os.getenv("OUTBOX_RETRY_MAX", "300"))
+# ...and are kept as dead letters after this many attempts
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "50"))
+# Delivered items are kept this long so a re-queued duplicate is recognised (seconds)
+OUTBOX_RETENTION = float(os.getenv("OUTBOX_RETENTION", "86400"))
+# Claimed items not settled within this many seconds (crashed process) are delivered again
+OUTBOX_CLAIM_TIMEOUT = float(os.getenv("OUTBOX_CLAIM_TIMEOUT", "300"))
+
+# Incident ids handed out before Portia has assigned the real one
+REF_PREFIX = "outbox:"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    stream TEXT,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    delivered_at REAL,
+    dead INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (id) WHERE delivered_at IS NULL AND dead = 0;
+CREATE INDEX IF NOT EXISTS outbox_delivered ON outbox (delivered_at) WHERE delivered_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS outbox_refs (
+    ref TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Delivers a batch of (dedup key, payload) items of one kind; returns one success flag per item
+Handler = Callable[[List[Tuple[str, Dict]]], List[bool]]
+
+
+class Outbox:
+    """SQLite (WAL mode) outbox with at-least-once delivery
+
+    ``put`` is a single committed INSERT, cheap enough for the check path; a
+    background thread claims due items in batches, hands each kind's items to
+    its handler and settles them. Failures retry with exponential backoff.
+    Items sharing a ``stream`` (e.g. a target's incident create and its
+    updates) are delivered one at a time in queue order. Each item has a
+    dedup key: re-queuing a key is a no-op and handlers pass it on as an
+    idempotency key, since an item may be delivered twice if the process dies
+    between sending and settling it. Items left pending by a previous run are
+    delivered when the outbox is opened again.
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH, batch: int = OUTBOX_BATCH,
+                 batch_window: float = OUTBOX_BATCH_WINDOW, retry_base: float = OUTBOX_RETRY_BASE,
+                 retry_max: float = OUTBOX_RETRY_MAX, max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 retention: float = OUTBOX_RETENTION, claim_timeout: float = OUTBOX_CLAIM_TIMEOUT):
+        self.path = path
+        self.batch = max(1, batch)
+        self.batch_window = batch_window
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max(1, max_attempts)
+        self.retention = retention
+        self.claim_timeout = claim_timeout
+        self.handlers: Dict[str, Handler] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL is durable across process crashes; only power loss can drop the last commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._wakeup = threading.Event()
+        self._urgent = threading.Event()
+        self._flushed = threading.Condition()
+        self._requested = 0
+        self._completed = 0
+        self._last_prune = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"queued": 0, "duplicates": 0, "delivered": 0, "failed": 0, "dead": 0}
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    def start(self) -> None:
+        """Start the background flusher (it first drains anything left by a previous run)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-outbox", daemon=True)
+            self._thread.start()
+
+    def put(self, kind: str, payload: Dict, key: Optional[str] = None, stream: Optional[str] = None) -> bool:
+        """Durably queue an item; returns False if an item with the same dedup key exists
+
+        The key defaults to a hash of the kind and payload. Raises sqlite3.Error if
+        the item could not be written.
+        """
+        body = json.dumps(payload, sort_keys=True, default=str)
+        key = key or f"{kind}:{hashlib.sha1(body.encode('utf-8')).hexdigest()}"
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (key, kind, stream, payload, created_at, next_attempt) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, stream, body, now, now),
+            )
+        if cursor.rowcount == 0:
+            self.stats["duplicates"] += 1
+            return False
+        self.stats["queued"] += 1
+        self._wakeup.set()
+        return True
+
+    def new_ref(self, stream: str) -> str:
+        """Placeholder id for an object (an incident) whose real id arrives on delivery"""
+        return f"{REF_PREFIX}{stream}:{uuid.uuid4().hex}"
+
+    def set_ref(self, ref: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO outbox_refs (ref, value, created_at) VALUES (?, ?, ?)",
+                               (ref, value, time.time()))
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """The real id behind a placeholder (other ids are returned as-is); None if never assigned"""
+        if not ref.startswith(REF_PREFIX):
+            return ref
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM outbox_refs WHERE ref = ?", (ref,)).fetchone()
+        return row[0] if row else None
+
+    def forget_ref(self, ref: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox_refs WHERE ref = ?", (ref,))
+
+    def pending(self) -> int:
+        """Items not yet delivered or given up"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL AND dead = 0"
+            ).fetchone()[0]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attempt every item due now, skipping the batch window; returns False on timeout"""
+        with self._flushed:
+            self._requested += 1
+            target = self._requested
+        self._urgent.set()
+        self._wakeup.set()
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._completed >= target, timeout)
+
+    def close(self, timeout: float = NOTIFY_FLUSH_TIMEOUT) -> None:
+        if self._thread is not None and not self.flush(timeout):
+            print(f"[OUTBOX] {self.pending()} alert(s) still pending - they will be sent on the next run")
+
+    def _run(self) -> None:
+        while True:
+            with self._flushed:
+                requested = self._requested
+            try:
+                while self._flush_once():
+                    pass
+                self._prune()
+            except sqlite3.Error as e:
+                print(f"[OUTBOX] Flush failed: {e}")
+            with self._flushed:
+                self._completed = requested
+                self._flushed.notify_all()
+                if self._completed == self._requested:
+                    self._urgent.clear()
+
+            if self._wakeup.wait(self._idle_timeout()) and not self._urgent.is_set():
+                # Give alerts landing together a moment to join one batch
+                self._urgent.wait(self.batch_window)
+            self._wakeup.clear()
+
+    def _idle_timeout(self) -> float:
+        """Seconds until the next retry is due (polled at least every minute for other processes' items)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt) FROM outbox WHERE delivered_at IS NULL AND dead = 0"
+            ).fetchone()
+        if row[0] is None:
+            return 60.0
+        return min(60.0, max(0.05, row[0] - time.time()))
+
+    def _claim(self, now: float) -> List[Tuple[int, str, str, Dict, int]]:
+        """Claim up to ``batch`` due items, at most one per stream"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT id, stream, next_attempt FROM outbox WHERE delivered_at IS NULL AND dead = 0 ORDER BY id"
+            ).fetchall()
+            blocked = set()
+            ids = []
+            for item_id, stream, next_attempt in rows:
+                if stream is not None:
+                    if stream in blocked:
+                        continue
+                    # Later items in a stream wait for the earliest one, due or not
+                    blocked.add(stream)
+                if next_attempt <= now:
+                    ids.append(item_id)
+                    if len(ids) >= self.batch:
+                        break
+            if not ids:
+                return []
+            marks = ",".join("?" * len(ids))
+            self._conn.execute(f"UPDATE outbox SET attempts = attempts + 1, next_attempt = ? WHERE id IN ({marks})",
+                               (now + self.claim_timeout, *ids))
+            claimed = self._conn.execute(
+                f"SELECT id, key, kind, payload, attempts FROM outbox WHERE id IN ({marks}) ORDER BY id", ids
+            ).fetchall()
+        return [(item_id, key, kind, json.loads(payload), attempts)
+                for item_id, key, kind, payload, attempts in claimed]
+
+    def _flush_once(self) -> int:
+        """Deliver one batch; returns the number of items attempted"""
+        claimed = self._claim(time.time())
+        by_kind: Dict[str, List[Tuple[int, str, str, Dict, int]]] = {}
+        for item in claimed:
+            by_kind.setdefault(item[2], []).append(item)
+
+        for kind, items in by_kind.items():
+            handler = self.handlers.get(kind)
+            error = None
+            if handler is None:
+                results, error = [False] * len(items), f"No handler for {kind}"
+            else:
+                try:
+                    results = handler([(key, payload) for _, key, _, payload, _ in items])
+                except Exception as e:
+                    results, error = [False] * len(items), str(e)
+            self._settle(items, results, error or "Delivery failed")
+        return len(claimed)
+
+    def _settle(self, items: List[Tuple[int, str, str, Dict, int]], results: List[bool], error: str) -> None:
+        now = time.time()
+        delivered, retry, dead = [], [], []
+        for (item_id, key, kind, _, attempts), ok in zip(items, results):
+            if ok:
+                delivered.append((now, item_id))
+            elif attempts >= self.max_attempts:
+                dead.append((error, item_id))
+                print(f"[OUTBOX] Giving up on {kind} item {key} after {attempts} attempts: {error}")
+            else:
+                delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+                retry.append((now + delay, error, item_id))
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("UPDATE outbox SET delivered_at = ?, last_error = NULL WHERE id = ?", delivered)
+            self._conn.executemany("UPDATE outbox SET next_attempt = ?, last_error = ? WHERE id = ?", retry)
+            self._conn.executemany("UPDATE outbox SET dead = 1, last_error = ? WHERE id = ?", dead)
+        self.stats["delivered"] += len(delivered)
+        self.stats["failed"] += len(retry)
+        self.stats["dead"] += len(dead)
+        if retry:
+            print(f"[OUTBOX] {len(retry)} item(s) failed ({error}) - will retry")
+
+    def _prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE delivered_at < ?", (now - self.retention,))
+
+
+def alert_handler(items: List[Tuple[str, Dict]]) -> List[bool]:
+    """Send queued alerts, every channel's batch in parallel (see channels.py)"""
+    from channels import get_alert_channels
+    batches: Dict[str, List[Dict]] = {}
+    for _, payload in items:
+        batches.setdefault(payload["channel"], []).append(payload)
+    results = {channel: iter(sent) for channel, sent in get_alert_channels().deliver(batches).items()}
+    return [next(results[payload["channel"]]) for _, payload in items]
+
+
+def portia_handlers(outbox: Outbox) -> Dict[str, Handler]:
+    """Handlers for queued Portia incident creates and updates
+
+    A batch holds at most one item per stream, so its requests are independent
+    and are sent concurrently with AsyncPortiaSDK on the flusher's own event loop.
+    """
+    client = None
+    loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def run(deliver, items: List[Tuple[str, Dict]]) -> List[bool]:
+        nonlocal client, loop
+        if client is None:
+            from portia_sdk import get_async_portia_client
+            client = get_async_portia_client()
+            loop = asyncio.new_event_loop()
+
+        async def deliver_all():
+            return await asyncio.gather(*(deliver(key, payload) for key, payload in items), return_exceptions=True)
+
+        results = loop.run_until_complete(deliver_all())
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"[OUTBOX] Portia delivery error: {result}")
+        return [result is True for result in results]
+
+    async def create_one(key: str, payload: Dict) -> bool:
+        fields = dict(payload)
+        ref = fields.pop("ref")
+        result = await client.create_incident(idempotency_key=key, **fields)
+        if result and result.get("incident_id"):
+            outbox.set_ref(ref, result["incident_id"])
+        return bool(result)
+
+    async def update_one(key: str, payload: Dict) -> bool:
+        fields = dict(payload)
+        ref = fields.pop("incident_id")
+        incident_id = outbox.resolve(ref)
+        if incident_id is None:
+            # Its create was delivered earlier in the stream without an id, or given up on
+            print(f"[OUTBOX] Dropping update for incident {ref}: Portia never assigned it an id")
+            return True
+        result = await client.update_incident(incident_id, idempotency_key=key, **fields)
+        if result and fields.get("status") == "resolved" and incident_id != ref:
+            outbox.forget_ref(ref)
+        return bool(result)
+
+    return {
+        "portia.create_incident": lambda items: run(create_one, items),
+        "portia.update_incident": lambda items: run(update_one, items),
+    }
+
+
+_outbox: Optional[Outbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Optional[Outbox]:
+    """Get the process-wide alert outbox, or None when it is disabled
+
+    The first call starts the flusher, which also delivers items left pending by earlier runs.
+    """
+    global _outbox
+    if not OUTBOX_PATH:
+        return None
+    with _outbox_lock:
+        if _outbox is None:
+            try:
+                outbox = Outbox()
+            except sqlite3.Error as e:
+                print(f"[OUTBOX] Could not open outbox {OUTBOX_PATH}: {e} - alerts will be sent directly")
+                return None
+            outbox.register("alert", alert_handler)
+            for kind, handler in portia_handlers(outbox).items():
+                outbox.register(kind, handler)
+            outbox.start()
+            # Last resort for scripts that exit without close_outbox(); by then thread pools are shut down
+            atexit.register(outbox.close)
+            _outbox = outbox
+        return _outbox
+
+
+def close_outbox() -> None:
+    """Deliver what the process-wide outbox holds before exit (a no-op if it was never opened)
+
+    Entry points call this as they finish, while thread pools still accept work.
+    """
+    with _outbox_lock:
+        outbox = _outbox
+    if outbox is not None:
+        outbox.close()
@@ -29,10 +29,28 @@ def get_portia_config():
         },
         "timeout": int(os.getenv("PORTIA_TIMEOUT", "30")),
         "retry_attempts": int(os.getenv("PORTIA_RETRY_ATTEMPTS", "3")),
+        # Requests AsyncPortiaSDK keeps in flight at once
+        "max_concurrency": int(os.getenv("PORTIA_MAX_CONCURRENCY", "16")),
+        # Client-side quota: at most rate_limit requests per rate_window seconds (0 = follow server headers only)
+        "rate_limit": float(os.getenv("PORTIA_RATE_LIMIT", "0")),
+        "rate_window": float(os.getenv("PORTIA_RATE_WINDOW", "60")),
+        "rate_burst": int(os.getenv("PORTIA_RATE_BURST", "5")),
         "webhook_url": os.getenv("PORTIA_WEBHOOK_URL"),
         "notification_channels": os.getenv("PORTIA_NOTIFICATION_CHANNELS", "telegram,email").split(",")
     }
 
+def get_portia_rate(config):
+    """Client-side requests per second from rate_limit / rate_window
+
+    0 (follow server headers only) unless both are positive.
+    """
+    if config["rate_limit"] <= 0:
+        return 0.0
+    if config["rate_window"] <= 0:
+        print("[WARNING] PORTIA_RATE_WINDOW must be positive - client-side rate limit disabled")
+        return 0.0
+    return config["rate_limit"] / config["rate_window"]
+
 def get_portia_headers():
     """Get standard headers for Portia API requests"""
     config = get_portia_config()
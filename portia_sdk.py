@@ -4,22 +4,33 @@ Portia SDK Client
 Comprehensive client for Portia API integration
 """
 
+import asyncio
+import math
 import os
 import requests
 import json
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from portia_config import get_portia_config, get_portia_headers
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+from portia_config import get_portia_config, get_portia_headers, get_portia_rate
+import async_http
+from connection_pool import AsyncConnectionPool, get_session_pool
+from rate_limiter import get_rate_limiter
+from history_store import get_history_store
+from latency_sketch import LATENCY_SKETCH_WINDOW, get_latency_sketches
 
-class PortiaSDK:
-    """Portia SDK client for API integration"""
+# A prepared API call: keyword arguments for _make_request, and a function from its result to the return value
+PortiaCall = Tuple[Dict[str, Any], Callable[[Optional[Dict]], Any]]
+
+class PortiaClientBase:
+    """Configuration and local helpers shared by the blocking and asyncio Portia clients"""
     
     def __init__(self):
         self.config = get_portia_config()
         self.headers = get_portia_headers()
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # One limiter per process (or per host with RATE_LIMIT_STORE) for every Portia client
+        self.limiter = get_rate_limiter("portia", get_portia_rate(self.config), self.config["rate_burst"])
         
         if not self.config["api_key"]:
             print("[WARNING] Portia API key not configured - SDK disabled")
@@ -33,62 +44,50 @@ class PortiaSDK:
             if not org_id or org_id == "your_actual_org_id_from_dashboard":
                 print("[WARNING] Portia Organization ID not configured - some features may be limited")
     
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
-                     params: Optional[Dict] = None, retry: bool = True) -> Optional[Dict]:
-        """Make HTTP request to Portia API with retry logic"""
-        if not self.enabled:
-            return None
-        
+    def _request_headers(self, idempotency_key: Optional[str]) -> Dict[str, str]:
+        # An Idempotency-Key header keeps a request redelivered by the alert outbox from applying twice
+        return dict(self.headers, **{"Idempotency-Key": idempotency_key}) if idempotency_key else self.headers
+    
+    def _prepare_request(self, endpoint: str, data: Optional[Dict], params: Optional[Dict],
+                         idempotency_key: Optional[str]) -> Tuple[str, Dict[str, str], Optional[bytes]]:
+        """URL (with query string), headers and JSON body for an API request"""
         url = f"{self.config['base_url']}{endpoint}"
-        attempts = 0
-        max_attempts = self.config["retry_attempts"] if retry else 1
-        
-        while attempts < max_attempts:
-            try:
-                response = self.session.request(
-                    method=method,
-                    url=url,
-                    json=data,
-                    params=params,
-                    timeout=self.config["timeout"]
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 401:
-                    print(f"[PORTIA] Authentication failed - check API key")
-                    return None
-                elif response.status_code == 400 and "X_PORTIA_ORG_ID" in response.text:
-                    print(f"[PORTIA] Organization ID required but not configured - skipping Portia features")
-                    return None
-                elif response.status_code == 400 and "Invalid Org ID" in response.text:
-                    print(f"[PORTIA] Invalid Organization ID - skipping Portia features")
-                    return None
-                elif response.status_code == 429:
-                    print(f"[PORTIA] Rate limited - waiting before retry")
-                    time.sleep(2 ** attempts)  # Exponential backoff
-                else:
-                    print(f"[PORTIA] API request failed: {response.status_code} - {response.text}")
-                    if not retry:
-                        return None
-                
-            except requests.exceptions.Timeout:
-                print(f"[PORTIA] Request timeout (attempt {attempts + 1}/{max_attempts})")
-            except requests.exceptions.RequestException as e:
-                print(f"[PORTIA] Request error: {e}")
-            
-            attempts += 1
-            if attempts < max_attempts:
-                time.sleep(1)  # Wait before retry
-        
-        print(f"[PORTIA] All {max_attempts} attempts failed")
-        return None
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        return url, self._request_headers(idempotency_key), body
     
-    def create_monitor(self, name: str, url: str, check_interval: int = 60, 
-                      alert_channels: Optional[List[str]] = None) -> Optional[Dict]:
-        """Create a new monitoring endpoint"""
-        endpoint = self.config["endpoints"]["monitor_create"]
-        
+    def _handle_response(self, status_code: int, headers, text: str, attempts: int,
+                         retry: bool) -> Tuple[bool, Optional[Dict], bool]:
+        """Interpret one response: (finished, result, throttled)
+
+        Not finished means the request should be tried again; throttled means the
+        limiter already holds callers back, so no extra retry delay is needed.
+        """
+        self.limiter.observe(status_code, headers, default_pause=2 ** attempts)
+        if status_code == 200:
+            return True, json.loads(text), False
+        elif status_code == 401:
+            print(f"[PORTIA] Authentication failed - check API key")
+            return True, None, False
+        elif status_code == 400 and "X_PORTIA_ORG_ID" in text:
+            print(f"[PORTIA] Organization ID required but not configured - skipping Portia features")
+            return True, None, False
+        elif status_code == 400 and "Invalid Org ID" in text:
+            print(f"[PORTIA] Invalid Organization ID - skipping Portia features")
+            return True, None, False
+        elif status_code == 429:
+            # The limiter now holds every caller back for Retry-After (or 2 ** attempts)
+            print(f"[PORTIA] Rate limited - waiting before retry")
+            return False, None, True
+        print(f"[PORTIA] API request failed: {status_code} - {text}")
+        return not retry, None, False
+    
+    # API calls: each builds its request (keyword arguments for _make_request) and a function that
+    # turns the response into the return value; PortiaSDK and AsyncPortiaSDK only add the transport
+    
+    def _create_monitor_call(self, name: str, url: str, check_interval: int,
+                             alert_channels: Optional[List[str]]) -> PortiaCall:
         data = {
             "name": name,
             "url": url,
@@ -97,66 +96,49 @@ class PortiaSDK:
             "created_at": datetime.now().isoformat()
         }
         
-        result = self._make_request("POST", endpoint, data=data)
-        if result:
-            print(f"[PORTIA] Monitor created: {name} -> {url}")
-        return result
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Monitor created: {name} -> {url}")
+            return result
+        return {"method": "POST", "endpoint": self.config["endpoints"]["monitor_create"], "data": data}, finish
     
-    def update_monitor(self, monitor_id: str, **kwargs) -> Optional[Dict]:
-        """Update an existing monitor"""
-        endpoint = self.config["endpoints"]["monitor_update"]
+    def _update_monitor_call(self, monitor_id: str, fields: Dict) -> PortiaCall:
+        data = {"monitor_id": monitor_id, "updated_at": datetime.now().isoformat(), **fields}
         
-        data = {
-            "monitor_id": monitor_id,
-            "updated_at": datetime.now().isoformat(),
-            **kwargs
-        }
-        
-        result = self._make_request("PUT", endpoint, data=data)
-        if result:
-            print(f"[PORTIA] Monitor updated: {monitor_id}")
-        return result
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Monitor updated: {monitor_id}")
+            return result
+        return {"method": "PUT", "endpoint": self.config["endpoints"]["monitor_update"], "data": data}, finish
     
-    def delete_monitor(self, monitor_id: str) -> bool:
-        """Delete a monitor"""
-        endpoint = self.config["endpoints"]["monitor_delete"]
-        
-        data = {"monitor_id": monitor_id}
-        result = self._make_request("DELETE", endpoint, data=data)
-        
-        if result:
-            print(f"[PORTIA] Monitor deleted: {monitor_id}")
-            return True
-        return False
+    def _delete_monitor_call(self, monitor_id: str) -> PortiaCall:
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Monitor deleted: {monitor_id}")
+                return True
+            return False
+        return {"method": "DELETE", "endpoint": self.config["endpoints"]["monitor_delete"],
+                "data": {"monitor_id": monitor_id}}, finish
     
-    def list_monitors(self) -> Optional[List[Dict]]:
-        """List all monitors"""
-        endpoint = self.config["endpoints"]["monitor_list"]
-        
-        result = self._make_request("GET", endpoint)
-        if result:
-            monitors = result.get("monitors", [])
-            print(f"[PORTIA] Found {len(monitors)} monitors")
-            return monitors
-        return None
+    def _list_monitors_call(self) -> PortiaCall:
+        def finish(result):
+            if result:
+                monitors = result.get("monitors", [])
+                print(f"[PORTIA] Found {len(monitors)} monitors")
+                return monitors
+            return None
+        return {"method": "GET", "endpoint": self.config["endpoints"]["monitor_list"]}, finish
     
-    def get_monitor_status(self, monitor_id: str) -> Optional[Dict]:
-        """Get current status of a monitor"""
-        endpoint = self.config["endpoints"]["monitor_status"]
-        
-        params = {"monitor_id": monitor_id}
-        result = self._make_request("GET", endpoint, params=params)
-        
-        if result:
-            status = result.get("status", "unknown")
-            print(f"[PORTIA] Monitor {monitor_id} status: {status}")
-        return result
+    def _get_monitor_status_call(self, monitor_id: str) -> PortiaCall:
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Monitor {monitor_id} status: {result.get('status', 'unknown')}")
+            return result
+        return {"method": "GET", "endpoint": self.config["endpoints"]["monitor_status"],
+                "params": {"monitor_id": monitor_id}}, finish
     
-    def create_incident(self, monitor_id: str, title: str, description: str, 
-                       severity: str = "medium", status: str = "open") -> Optional[Dict]:
-        """Create a new incident"""
-        endpoint = self.config["endpoints"]["create_incident"]
-        
+    def _create_incident_call(self, monitor_id: str, title: str, description: str, severity: str,
+                              status: str, idempotency_key: Optional[str]) -> PortiaCall:
         data = {
             "monitor_id": monitor_id,
             "title": title,
@@ -167,61 +149,47 @@ class PortiaSDK:
             "source": "portia-uptime-agent"
         }
         
-        result = self._make_request("POST", endpoint, data=data)
-        if result:
-            incident_id = result.get("incident_id")
-            print(f"[PORTIA] Incident created: {incident_id} - {title}")
-        return result
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Incident created: {result.get('incident_id')} - {title}")
+            return result
+        return {"method": "POST", "endpoint": self.config["endpoints"]["create_incident"], "data": data,
+                "idempotency_key": idempotency_key}, finish
     
-    def update_incident(self, incident_id: str, **kwargs) -> Optional[Dict]:
-        """Update an incident"""
-        endpoint = self.config["endpoints"]["update_incident"]
-        
-        data = {
-            "incident_id": incident_id,
-            "updated_at": datetime.now().isoformat(),
-            **kwargs
-        }
+    def _update_incident_call(self, incident_id: str, idempotency_key: Optional[str], fields: Dict) -> PortiaCall:
+        data = {"incident_id": incident_id, "updated_at": datetime.now().isoformat(), **fields}
         
-        result = self._make_request("PUT", endpoint, data=data)
-        if result:
-            print(f"[PORTIA] Incident updated: {incident_id}")
-        return result
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Incident updated: {incident_id}")
+            return result
+        return {"method": "PUT", "endpoint": self.config["endpoints"]["update_incident"], "data": data,
+                "idempotency_key": idempotency_key}, finish
     
-    def get_incident(self, incident_id: str) -> Optional[Dict]:
-        """Get incident details"""
-        endpoint = self.config["endpoints"]["get_incident"]
-        
-        params = {"incident_id": incident_id}
-        result = self._make_request("GET", endpoint, params=params)
-        
-        if result:
-            title = result.get("title", "Unknown")
-            print(f"[PORTIA] Retrieved incident: {incident_id} - {title}")
-        return result
+    def _get_incident_call(self, incident_id: str) -> PortiaCall:
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Retrieved incident: {incident_id} - {result.get('title', 'Unknown')}")
+            return result
+        return {"method": "GET", "endpoint": self.config["endpoints"]["get_incident"],
+                "params": {"incident_id": incident_id}}, finish
     
-    def list_incidents(self, monitor_id: Optional[str] = None, 
-                      status: Optional[str] = None, limit: int = 50) -> Optional[List[Dict]]:
-        """List incidents with optional filtering"""
-        endpoint = self.config["endpoints"]["list_incidents"]
-        
+    def _list_incidents_call(self, monitor_id: Optional[str], status: Optional[str], limit: int) -> PortiaCall:
         params = {"limit": limit}
         if monitor_id:
             params["monitor_id"] = monitor_id
         if status:
             params["status"] = status
         
-        result = self._make_request("GET", endpoint, params=params)
-        if result:
-            incidents = result.get("incidents", [])
-            print(f"[PORTIA] Found {len(incidents)} incidents")
-            return incidents
-        return None
+        def finish(result):
+            if result:
+                incidents = result.get("incidents", [])
+                print(f"[PORTIA] Found {len(incidents)} incidents")
+                return incidents
+            return None
+        return {"method": "GET", "endpoint": self.config["endpoints"]["list_incidents"], "params": params}, finish
     
-    def report_incident(self, url: str, incident_data: Dict) -> bool:
-        """Report an incident to Portia API"""
-        endpoint = self.config["endpoints"]["incident_report"]
-        
+    def _report_incident_call(self, url: str, incident_data: Dict) -> PortiaCall:
         payload = {
             "url": url,
             "incident": incident_data,
@@ -230,39 +198,42 @@ class PortiaSDK:
             "version": "1.0.0"
         }
         
-        result = self._make_request("POST", endpoint, data=payload)
-        if result:
-            print(f"[PORTIA] Incident report sent successfully for {url}")
-            return True
-        else:
+        def finish(result):
+            if result:
+                print(f"[PORTIA] Incident report sent successfully for {url}")
+                return True
             print(f"[PORTIA] Failed to send incident report for {url}")
             return False
+        return {"method": "POST", "endpoint": self.config["endpoints"]["incident_report"], "data": payload}, finish
     
-    def get_enhanced_monitoring_data(self, url: str) -> Optional[Dict]:
-        """Get enhanced monitoring data for a URL"""
-        # This would integrate with Portia's monitoring data
-        # For now, return basic structure
+    def get_enhanced_monitoring_data(self, url: str, window: Optional[float] = None) -> Optional[Dict]:
+        """Get enhanced monitoring data for a URL from the local probe history
+
+        ``window`` limits the figures to the last N seconds (default: full retention;
+        latency quantiles only reach back LATENCY_SKETCH_WINDOWS sketch windows).
+        Targets are keyed by name, which defaults to their URL.
+        """
+        history = get_history_store()
+        summary = history.summary(url, since=time.time() - window if window else None) if history else {}
+        last_check = summary.get("last_check")
+        # Latency quantiles cover whole sketch windows, so round the window up
+        windows = max(1, math.ceil(window / LATENCY_SKETCH_WINDOW)) if window else None
+        latency = get_latency_sketches().quantiles(url, windows)
         return {
             "url": url,
             "portia_data": {
                 "monitor_id": None,
-                "last_check": datetime.now().isoformat(),
-                "uptime_percentage": None,
-                "average_response_time": None,
-                "incident_count": 0
+                "last_check": datetime.fromtimestamp(last_check).isoformat() if last_check else None,
+                "uptime_percentage": summary.get("uptime_percentage"),
+                "average_response_time": summary.get("average_response_time"),
+                "response_time_p50": latency["p50"],
+                "response_time_p95": latency["p95"],
+                "response_time_p99": latency["p99"],
+                "incident_count": summary.get("outages", 0),
+                "samples": summary.get("samples", 0)
             }
         }
     
-    def health_check(self) -> bool:
-        """Check if Portia API is accessible"""
-        try:
-            # Try to list monitors as a health check
-            result = self.list_monitors()
-            return result is not None
-        except Exception as e:
-            print(f"[PORTIA] Health check failed: {e}")
-            return False
-    
     def get_api_info(self) -> Optional[Dict]:
         """Get Portia API information"""
         try:
@@ -276,17 +247,255 @@ class PortiaSDK:
                     "incident_management": True,
                     "alerting": True,
                     "webhooks": bool(self.config.get("webhook_url"))
-                }
+                },
+                "rate_limit": self.limiter.wait_stats()
             }
         except Exception as e:
             print(f"[PORTIA] Failed to get API info: {e}")
             return None
 
+
+class PortiaSDK(PortiaClientBase):
+    """Portia SDK client for API integration"""
+    
+    def __init__(self):
+        super().__init__()
+        # Shared keep-alive pool; headers go on each request so the pool stays client-neutral
+        self.pool = get_session_pool()
+    
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
+                     params: Optional[Dict] = None, retry: bool = True,
+                     idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        """Make HTTP request to Portia API with retry logic"""
+        if not self.enabled:
+            return None
+        
+        url, headers, body = self._prepare_request(endpoint, data, params, idempotency_key)
+        attempts = 0
+        max_attempts = self.config["retry_attempts"] if retry else 1
+        
+        while attempts < max_attempts:
+            # Shared pacing: waits out our quota and any pause the server asked for
+            self.limiter.acquire()
+            throttled = False
+            try:
+                response = self.pool.request(method, url, headers=headers, data=body,
+                                             timeout=self.config["timeout"])
+                finished, result, throttled = self._handle_response(
+                    response.status_code, response.headers, response.text, attempts, retry
+                )
+                if finished:
+                    return result
+            except requests.exceptions.Timeout:
+                print(f"[PORTIA] Request timeout (attempt {attempts + 1}/{max_attempts})")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"[PORTIA] Request error: {e}")
+            
+            attempts += 1
+            if attempts < max_attempts and not throttled:
+                time.sleep(1)  # Wait before retry
+        
+        print(f"[PORTIA] All {max_attempts} attempts failed")
+        return None
+    
+    def _call(self, call: PortiaCall):
+        request, finish = call
+        return finish(self._make_request(**request))
+    
+    def create_monitor(self, name: str, url: str, check_interval: int = 60, 
+                      alert_channels: Optional[List[str]] = None) -> Optional[Dict]:
+        """Create a new monitoring endpoint"""
+        return self._call(self._create_monitor_call(name, url, check_interval, alert_channels))
+    
+    def update_monitor(self, monitor_id: str, **kwargs) -> Optional[Dict]:
+        """Update an existing monitor"""
+        return self._call(self._update_monitor_call(monitor_id, kwargs))
+    
+    def delete_monitor(self, monitor_id: str) -> bool:
+        """Delete a monitor"""
+        return self._call(self._delete_monitor_call(monitor_id))
+    
+    def list_monitors(self) -> Optional[List[Dict]]:
+        """List all monitors"""
+        return self._call(self._list_monitors_call())
+    
+    def get_monitor_status(self, monitor_id: str) -> Optional[Dict]:
+        """Get current status of a monitor"""
+        return self._call(self._get_monitor_status_call(monitor_id))
+    
+    def create_incident(self, monitor_id: str, title: str, description: str, 
+                       severity: str = "medium", status: str = "open",
+                       idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        """Create a new incident"""
+        return self._call(self._create_incident_call(monitor_id, title, description, severity, status,
+                                                     idempotency_key))
+    
+    def update_incident(self, incident_id: str, idempotency_key: Optional[str] = None,
+                        **kwargs) -> Optional[Dict]:
+        """Update an incident"""
+        return self._call(self._update_incident_call(incident_id, idempotency_key, kwargs))
+    
+    def get_incident(self, incident_id: str) -> Optional[Dict]:
+        """Get incident details"""
+        return self._call(self._get_incident_call(incident_id))
+    
+    def list_incidents(self, monitor_id: Optional[str] = None, 
+                      status: Optional[str] = None, limit: int = 50) -> Optional[List[Dict]]:
+        """List incidents with optional filtering"""
+        return self._call(self._list_incidents_call(monitor_id, status, limit))
+    
+    def report_incident(self, url: str, incident_data: Dict) -> bool:
+        """Report an incident to Portia API"""
+        return self._call(self._report_incident_call(url, incident_data))
+    
+    def health_check(self) -> bool:
+        """Check if Portia API is accessible"""
+        try:
+            # Try to list monitors as a health check
+            result = self.list_monitors()
+            return result is not None
+        except Exception as e:
+            print(f"[PORTIA] Health check failed: {e}")
+            return False
+
+class AsyncPortiaSDK(PortiaClientBase):
+    """asyncio Portia client with the same methods as PortiaSDK, as coroutines
+
+    Requests go over the stdlib async HTTP client with keep-alive connections.
+    At most ``max_concurrency`` requests (PORTIA_MAX_CONCURRENCY) are in flight
+    at once, and the semaphore is held only for the HTTP round trip, so a
+    request waiting out a backoff doesn't occupy a slot. Many targets can
+    report concurrently with ``asyncio.gather``. The connection pool and
+    semaphore belong to one event loop and are rebuilt if the client is used
+    from another loop.
+    """
+    
+    def __init__(self, max_concurrency: Optional[int] = None):
+        super().__init__()
+        self.max_concurrency = max(1, max_concurrency or self.config["max_concurrency"])
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[AsyncConnectionPool] = None
+    
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._pool = AsyncConnectionPool(max_idle_per_host=self.max_concurrency)
+    
+    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                            params: Optional[Dict] = None, retry: bool = True,
+                            idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        """Make HTTP request to Portia API with retry logic, backing off without blocking the loop"""
+        if not self.enabled:
+            return None
+        self._bind_loop()
+        
+        url, headers, body = self._prepare_request(endpoint, data, params, idempotency_key)
+        attempts = 0
+        max_attempts = self.config["retry_attempts"] if retry else 1
+        
+        while attempts < max_attempts:
+            # Paced before taking a slot, so waiting tasks don't hold the semaphore
+            await self.limiter.acquire_async()
+            throttled = False
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        async_http.request(method, url, headers=headers, body=body, pool=self._pool),
+                        timeout=self.config["timeout"]
+                    )
+                finished, result, throttled = self._handle_response(
+                    response.status_code, response.headers, response.body.decode("utf-8", "replace"),
+                    attempts, retry
+                )
+                if finished:
+                    return result
+            except asyncio.TimeoutError:
+                print(f"[PORTIA] Request timeout (attempt {attempts + 1}/{max_attempts})")
+            except (OSError, async_http.ProtocolError, ValueError) as e:
+                print(f"[PORTIA] Request error: {e}")
+            
+            attempts += 1
+            if attempts < max_attempts and not throttled:
+                await asyncio.sleep(1)  # Wait before retry
+        
+        print(f"[PORTIA] All {max_attempts} attempts failed")
+        return None
+    
+    async def _call(self, call: PortiaCall):
+        request, finish = call
+        return finish(await self._make_request(**request))
+    
+    async def create_monitor(self, name: str, url: str, check_interval: int = 60,
+                             alert_channels: Optional[List[str]] = None) -> Optional[Dict]:
+        """Create a new monitoring endpoint"""
+        return await self._call(self._create_monitor_call(name, url, check_interval, alert_channels))
+    
+    async def update_monitor(self, monitor_id: str, **kwargs) -> Optional[Dict]:
+        """Update an existing monitor"""
+        return await self._call(self._update_monitor_call(monitor_id, kwargs))
+    
+    async def delete_monitor(self, monitor_id: str) -> bool:
+        """Delete a monitor"""
+        return await self._call(self._delete_monitor_call(monitor_id))
+    
+    async def list_monitors(self) -> Optional[List[Dict]]:
+        """List all monitors"""
+        return await self._call(self._list_monitors_call())
+    
+    async def get_monitor_status(self, monitor_id: str) -> Optional[Dict]:
+        """Get current status of a monitor"""
+        return await self._call(self._get_monitor_status_call(monitor_id))
+    
+    async def create_incident(self, monitor_id: str, title: str, description: str,
+                              severity: str = "medium", status: str = "open",
+                              idempotency_key: Optional[str] = None) -> Optional[Dict]:
+        """Create a new incident"""
+        return await self._call(self._create_incident_call(monitor_id, title, description, severity, status,
+                                                           idempotency_key))
+    
+    async def update_incident(self, incident_id: str, idempotency_key: Optional[str] = None,
+                              **kwargs) -> Optional[Dict]:
+        """Update an incident"""
+        return await self._call(self._update_incident_call(incident_id, idempotency_key, kwargs))
+    
+    async def get_incident(self, incident_id: str) -> Optional[Dict]:
+        """Get incident details"""
+        return await self._call(self._get_incident_call(incident_id))
+    
+    async def list_incidents(self, monitor_id: Optional[str] = None,
+                             status: Optional[str] = None, limit: int = 50) -> Optional[List[Dict]]:
+        """List incidents with optional filtering"""
+        return await self._call(self._list_incidents_call(monitor_id, status, limit))
+    
+    async def report_incident(self, url: str, incident_data: Dict) -> bool:
+        """Report an incident to Portia API"""
+        return await self._call(self._report_incident_call(url, incident_data))
+    
+    async def health_check(self) -> bool:
+        """Check if Portia API is accessible"""
+        try:
+            return await self.list_monitors() is not None
+        except Exception as e:
+            print(f"[PORTIA] Health check failed: {e}")
+            return False
+    
+    async def close(self) -> None:
+        """Close pooled connections (call from the loop the client was used on)"""
+        if self._pool is not None:
+            await self._pool.close()
+
 # Convenience functions for easy access
 def get_portia_client() -> PortiaSDK:
     """Get a configured Portia SDK client"""
     return PortiaSDK()
 
+def get_async_portia_client() -> AsyncPortiaSDK:
+    """Get a configured asyncio Portia SDK client"""
+    return AsyncPortiaSDK()
+
 def test_portia_connection() -> bool:
     """Test Portia API connection"""
     client = get_portia_client()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Async Probe Engine
+Runs thousands of concurrent uptime checks with per-host and global limits
+"""
+
+import asyncio
+import json
+import os
+import random
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+import async_http
+from anomaly import ANOMALY_DETECTION, LatencyAnomalyDetector
+from body_assertions import BodyChecker, build_assertions
+from connection_pool import AsyncConnectionPool
+from dns_cache import DNSCache
+from history_store import get_history_store
+from latency_sketch import LatencySketches, get_latency_sketches
+from quorum import QuorumConfirmer, get_quorum_confirmer
+
+# Load environment variables
+load_dotenv()
+
+# Probe Engine Configuration
+PROBE_TIMEOUT = float(os.getenv("PROBE_TIMEOUT", "10"))
+PROBE_MAX_IN_FLIGHT = int(os.getenv("PROBE_MAX_IN_FLIGHT", "500"))
+PROBE_PER_HOST_LIMIT = int(os.getenv("PROBE_PER_HOST_LIMIT", "4"))
+MONITOR_TARGETS_FILE = os.getenv("MONITOR_TARGETS_FILE")
+# Reuse keep-alive connections between probes of the same host
+PROBE_KEEPALIVE = os.getenv("PROBE_KEEPALIVE", "true").lower() == "true"
+# Resolve probe hostnames through the in-process DNS cache
+PROBE_DNS_CACHE = os.getenv("PROBE_DNS_CACHE", "true").lower() == "true"
+# Stop reading a response body after this many bytes
+PROBE_MAX_BODY_BYTES = int(os.getenv("PROBE_MAX_BODY_BYTES", str(256 * 1024)))
+
+# Probe modes: full GET, HEAD only, or GET for just the first byte
+PROBE_MODES = ("GET", "HEAD", "RANGE")
+
+# Retry Configuration
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.5"))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "5"))
+RETRY_TIME_BUDGET = float(os.getenv("RETRY_TIME_BUDGET", "25"))
+
+# Hedged requests fire a second probe once the first exceeds the target's p95 latency
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+
+def format_timings(timings: Dict) -> Dict[str, float]:
+    """Round phase timings (seconds) for results, dropping bookkeeping keys"""
+    return {key: round(value, 6) for key, value in timings.items() if key != "phase"}
+
+
+class ProbeTarget:
+    """A monitored endpoint and its probe options"""
+
+    def __init__(self, url: str, name: Optional[str] = None, timeout: float = PROBE_TIMEOUT,
+                 interval: Optional[float] = None, hedge: Optional[bool] = None,
+                 cold: bool = False, dns_cache: bool = True, mode: str = "GET",
+                 assertions: Optional[List[Dict]] = None,
+                 max_body_bytes: int = PROBE_MAX_BODY_BYTES,
+                 depends_on: Optional[List[str]] = None):
+        self.url = url
+        self.name = name or url
+        self.timeout = timeout
+        # Seconds between checks; None means the daemon-wide MONITORING_INTERVAL
+        self.interval = interval
+        # None falls back to HEDGE_REQUESTS
+        self.hedge = HEDGE_REQUESTS if hedge is None else hedge
+        # Cold probes always open a new connection to measure the full handshake
+        self.cold = cold
+        # Disable when monitoring DNS itself: every probe then does a fresh lookup
+        # (and a fresh connection, since a reused one would skip resolution)
+        self.dns_cache = dns_cache
+        self.mode = mode.upper()
+        if self.mode not in PROBE_MODES:
+            raise ValueError(f"Unknown probe mode {mode!r}, expected one of {PROBE_MODES}")
+        # Streaming content checks, see body_assertions.py (validated up front)
+        self.assertions = assertions or []
+        build_assertions(self.assertions)
+        self.max_body_bytes = max_body_bytes
+        # Names of upstream targets this one needs (see dependency_graph.py)
+        self.depends_on = list(depends_on or [])
+
+    @property
+    def host_key(self) -> str:
+        """Key used for per-host concurrency caps"""
+        _, host, port, _ = async_http.split_url(self.url)
+        return f"{host.lower()}:{port}"
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProbeTarget":
+        """Build a target from a targets-file entry"""
+        return cls(
+            url=data["url"],
+            name=data.get("name"),
+            timeout=float(data.get("timeout", PROBE_TIMEOUT)),
+            interval=float(data["interval"]) if data.get("interval") else None,
+            hedge=data.get("hedge"),
+            cold=bool(data.get("cold", False)),
+            dns_cache=bool(data.get("dns_cache", True)),
+            mode=data.get("mode", "GET"),
+            assertions=data.get("assertions"),
+            max_body_bytes=int(data.get("max_body_bytes", PROBE_MAX_BODY_BYTES)),
+            depends_on=[data["depends_on"]] if isinstance(data.get("depends_on"), str) else data.get("depends_on"),
+        )
+
+    def __repr__(self) -> str:
+        return f"ProbeTarget({self.name!r}, {self.url!r})"
+
+
+def load_targets(default_url: Optional[str] = None) -> List[ProbeTarget]:
+    """Load monitored targets from MONITOR_TARGETS_FILE, MONITORED_URLS or MONITORED_URL"""
+    if MONITOR_TARGETS_FILE:
+        with open(MONITOR_TARGETS_FILE) as f:
+            entries = json.load(f)
+        return [ProbeTarget.from_dict(entry) if isinstance(entry, dict) else ProbeTarget(entry)
+                for entry in entries]
+
+    urls = os.getenv("MONITORED_URLS")
+    if urls:
+        return [ProbeTarget(url.strip()) for url in urls.split(",") if url.strip()]
+
+    return [ProbeTarget(default_url or os.getenv("MONITORED_URL", "https://example.com"))]
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by a total time budget"""
+
+    def __init__(self, attempts: int = RETRY_ATTEMPTS, backoff_base: float = RETRY_BACKOFF_BASE,
+                 backoff_max: float = RETRY_BACKOFF_MAX, time_budget: float = RETRY_TIME_BUDGET):
+        self.attempts = max(1, attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.time_budget = time_budget
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def should_retry(self, result: Dict) -> bool:
+        """Retry transport failures, 5xx and 429; other HTTP errors are definitive"""
+        if result.get("status") == "UP":
+            return False
+        code = result.get("code")
+        return code is None or code >= 500 or code == 429
+
+
+class AsyncProbeEngine:
+    """Concurrent uptime prober with a global in-flight limit and per-host caps"""
+
+    def __init__(self, max_in_flight: int = PROBE_MAX_IN_FLIGHT,
+                 per_host_limit: int = PROBE_PER_HOST_LIMIT,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 latency: Optional[LatencySketches] = None,
+                 anomaly: Optional[LatencyAnomalyDetector] = None,
+                 quorum: Optional[QuorumConfirmer] = None):
+        self.max_in_flight = max_in_flight
+        self.per_host_limit = per_host_limit
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Per-target latency quantiles, shared with alerting and the Portia client by default
+        self.latency = latency or get_latency_sketches()
+        # Flags UP results far slower than the target's baseline as DEGRADED
+        if anomaly is None and ANOMALY_DETECTION:
+            anomaly = LatencyAnomalyDetector(get_history_store())
+        self.anomaly = anomaly
+        # Confirms failures that outlast the retries from several vantage points before they count as DOWN
+        self.quorum = quorum or get_quorum_confirmer()
+        self.keepalive = PROBE_KEEPALIVE
+        self.pool: Optional[AsyncConnectionPool] = None
+        self.dns_cache = DNSCache() if PROBE_DNS_CACHE else None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _bind_loop(self) -> None:
+        """(Re)create loop-bound semaphores and connections when used from a new event loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._host_limits = {}
+            self.pool = AsyncConnectionPool(max_idle_per_host=self.per_host_limit)
+
+    def _host_limit(self, target: ProbeTarget) -> asyncio.Semaphore:
+        key = target.host_key
+        semaphore = self._host_limits.get(key)
+        if semaphore is None:
+            semaphore = self._host_limits[key] = asyncio.Semaphore(self.per_host_limit)
+        return semaphore
+
+    async def probe(self, target: ProbeTarget) -> Dict:
+        """Probe a single target, retrying per the retry policy, and return the result dict"""
+        self._bind_loop()
+        try:
+            host_limit = self._host_limit(target)
+        except ValueError as e:
+            return {"status": "DOWN", "error": str(e)}
+
+        loop = asyncio.get_running_loop()
+        policy = self.retry_policy
+        deadline = loop.time() + policy.time_budget
+        attempt = 0
+        while True:
+            attempt += 1
+            timeout = min(target.timeout, deadline - loop.time())
+            result = await self._attempt(target, host_limit, timeout)
+            result["attempts"] = attempt
+
+            if not policy.should_retry(result) or attempt >= policy.attempts:
+                break
+            delay = policy.backoff(attempt)
+            # Only retry if the next attempt still gets a meaningful share of the budget
+            if deadline - loop.time() - delay < min(1.0, target.timeout):
+                break
+            await asyncio.sleep(delay)
+
+        if self.quorum is not None and policy.should_retry(result):
+            # Retries are spent: other vantage points vote before the failure counts as DOWN
+            result = await self._confirm(target, host_limit, result)
+            result["attempts"] = attempt
+
+        if result.get("status") == "UP":
+            self.latency.record(target.name, result["response_time"])
+            degraded = None
+            if self.anomaly is not None:
+                degraded = self.anomaly.observe(target.name, result["response_time"], target.timeout)
+            if degraded:
+                result["status"] = "DEGRADED"
+                result["degraded"] = degraded
+        return result
+
+    async def _confirm(self, target: ProbeTarget, host_limit: asyncio.Semaphore, failure: Dict) -> Dict:
+        async def fetch(source: Optional[str], timeout: float) -> Dict:
+            async with host_limit, self._in_flight:
+                return await self._fetch(target, min(target.timeout, timeout), local_addr=source, fresh=True)
+
+        result = await self.quorum.confirm(failure, fetch)
+        vote = result["quorum"]
+        print(f"[QUORUM] {target.name}: {vote['down_votes']}/{vote['votes']} vantage points failed "
+              f"({vote['required']} needed) - {'DOWN confirmed' if vote['confirmed'] else 'failure overruled'}")
+        return result
+
+    async def _attempt(self, target: ProbeTarget, host_limit: asyncio.Semaphore,
+                       timeout: float) -> Dict:
+        """One attempt, optionally hedged with a second probe past the target's p95"""
+        # Hedge on the p95 of roughly the last hour or two (current and previous sketch window)
+        hedge_after = (self.latency.quantile(target.name, 0.95, windows=2, min_samples=HEDGE_MIN_SAMPLES)
+                       if target.hedge else None)
+        if hedge_after is None or hedge_after >= timeout:
+            return await self._limited_fetch(target, host_limit, timeout)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        primary = asyncio.create_task(self._limited_fetch(target, host_limit, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.create_task(
+            self._limited_fetch(target, host_limit, timeout - (loop.time() - started))
+        )
+        pending = {primary, hedge}
+        first_failure = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result.get("status") == "UP":
+                        if task is hedge:
+                            result["hedged"] = True
+                        return result
+                    first_failure = first_failure or result
+            return first_failure
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _limited_fetch(self, target: ProbeTarget, host_limit: asyncio.Semaphore,
+                             timeout: float) -> Dict:
+        async with host_limit, self._in_flight:
+            return await self._fetch(target, timeout)
+
+    async def _fetch(self, target: ProbeTarget, timeout: float, local_addr: Optional[str] = None,
+                     fresh: bool = False) -> Dict:
+        """One probe; ``fresh`` (or a ``local_addr``) opens a new connection instead of a pooled one"""
+        timings: Dict = {}
+        dns_info: Dict = {}
+        # Probes from a specific source address never share pooled connections
+        fresh = fresh or target.cold or not target.dns_cache or not self.keepalive or local_addr is not None
+        pool = None if fresh else self.pool
+
+        async def resolve(host: str, port: int) -> list:
+            addresses, _ = await self.dns_cache.resolve(
+                host, port, bypass=not target.dns_cache, info=dns_info
+            )
+            return addresses
+
+        resolver = resolve if self.dns_cache is not None else None
+        method, headers, checker = "GET", None, None
+        if target.mode == "HEAD":
+            method = "HEAD"
+        elif target.mode == "RANGE":
+            # Liveness only: ask for one byte and stop after the first chunk regardless
+            headers = {"Range": "bytes=0-0"}
+            checker = BodyChecker(None, max_bytes=1)
+        else:
+            checker = BodyChecker(target.assertions, max_bytes=target.max_body_bytes)
+
+        try:
+            response = await asyncio.wait_for(
+                async_http.request(method, target.url, headers=headers, timings=timings, pool=pool,
+                                   resolver=resolver, on_body=checker.feed if checker else None,
+                                   local_addr=local_addr),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            result = self._failure(timings, {"status": "DOWN", "error": "Timeout"})
+        except (ConnectionError, OSError):
+            result = self._failure(timings, {"status": "DOWN", "error": "Connection Error"})
+        except Exception as e:
+            result = self._failure(timings, {"status": "DOWN", "error": str(e)})
+        else:
+            connection = "cold" if pool is None else ("reused" if response.reused else "new")
+            ok_codes = (200, 206) if target.mode == "RANGE" else (200,)
+            failure = checker.failure() if checker and response.status_code in ok_codes else None
+            if response.status_code not in ok_codes:
+                result = {"status": "DOWN", "code": response.status_code,
+                          "error": f"HTTP {response.status_code}"}
+            elif failure:
+                result = {"status": "DOWN", "code": response.status_code, "error": failure}
+            else:
+                result = {"status": "UP", "code": response.status_code, "response_time": response.elapsed}
+            result["timings"] = format_timings(timings)
+            result["connection"] = connection
+            if checker is not None:
+                result["body_bytes"] = checker.bytes_read
+
+        if self.dns_cache is not None:
+            result["dns_cache"] = dict(dns_info, hits=self.dns_cache.hits, misses=self.dns_cache.misses)
+        return result
+
+    @staticmethod
+    def _failure(timings: Dict, result: Dict) -> Dict:
+        """Attach the phases completed before a failure and the phase that failed"""
+        if timings:
+            result["failed_phase"] = timings.get("phase")
+            result["timings"] = format_timings(timings)
+        return result
+
+    async def probe_many(self, targets: Iterable[ProbeTarget]) -> Dict[str, Dict]:
+        """Probe all targets concurrently, keyed by target name"""
+        targets = list(targets)
+        results = await asyncio.gather(*(self.probe(target) for target in targets))
+        return {target.name: result for target, result in zip(targets, results)}
+
+    async def close(self) -> None:
+        """Close pooled connections held for the current event loop"""
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def _run_and_close(self, coro):
+        try:
+            return await coro
+        finally:
+            await self.close()
+
+    def check(self, target: ProbeTarget) -> Dict:
+        """Blocking wrapper around :meth:`probe` for synchronous callers"""
+        return asyncio.run(self._run_and_close(self.probe(target)))
+
+    def check_many(self, targets: Iterable[ProbeTarget]) -> Dict[str, Dict]:
+        """Blocking wrapper around :meth:`probe_many` for synchronous callers"""
+        return asyncio.run(self._run_and_close(self.probe_many(targets)))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Quorum Confirmation
+Re-probe a failing target from several vantage points before it is declared DOWN
+"""
+
+import asyncio
+import os
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Quorum Configuration
+# Source addresses (interfaces) to confirm from, comma separated; empty = the default route
+QUORUM_SOURCES = os.getenv("QUORUM_SOURCES", "")
+# On by default only with QUORUM_SOURCES: from the default route alone a vote is just more retries
+QUORUM_CONFIRMATION = (os.getenv("QUORUM_CONFIRMATION") or str(bool(QUORUM_SOURCES))).lower() == "true"
+# Confirmation probes per failure, spread round-robin over QUORUM_SOURCES
+QUORUM_PROBES = int(os.getenv("QUORUM_PROBES", "2"))
+# Failed votes (the original failure included) needed to declare DOWN; 0 = simple majority
+QUORUM_SIZE = int(os.getenv("QUORUM_SIZE", "0"))
+# Upper bound in seconds on the whole confirmation round
+QUORUM_TIMEOUT = float(os.getenv("QUORUM_TIMEOUT", "5"))
+
+
+def parse_sources(spec: str) -> List[Optional[str]]:
+    """Source addresses from a comma-separated list; None stands for the default route"""
+    sources = [source.strip() for source in spec.split(",") if source.strip()]
+    return [None if source == "default" else source for source in sources] or [None]
+
+
+class QuorumConfirmer:
+    """Votes on a failed probe with immediate, parallel re-probes
+
+    Each re-probe opens a fresh connection (a stale pooled connection is one
+    of the local failures being ruled out) and is capped at ``timeout``, so a
+    confirmation adds at most that long to detection. The failure stands only
+    if ``quorum`` of the votes fail; otherwise the passing re-probe's result
+    is used, with the overruled failure attached.
+    """
+
+    def __init__(self, sources: Optional[List[Optional[str]]] = None, probes: int = QUORUM_PROBES,
+                 quorum: int = QUORUM_SIZE, timeout: float = QUORUM_TIMEOUT):
+        self.sources = sources if sources is not None else parse_sources(QUORUM_SOURCES)
+        self.probes = max(1, probes)
+        votes = self.probes + 1
+        self.quorum = min(quorum, votes) if quorum > 0 else votes // 2 + 1
+        self.timeout = timeout
+
+    async def confirm(self, failure: Dict,
+                      fetch: Callable[[Optional[str], float], Awaitable[Dict]]) -> Dict:
+        """Vote on ``failure``; returns it if the quorum agrees, else the passing re-probe's result
+
+        ``fetch(source, timeout)`` runs one probe on a new, unpooled connection from a source
+        address (None = the default route).
+        """
+        sources = [self.sources[i % len(self.sources)] for i in range(self.probes)]
+        results = await asyncio.gather(*(fetch(source, self.timeout) for source in sources))
+
+        failed = [result for result in results if result.get("status") != "UP"]
+        down_votes = 1 + len(failed)
+        vote = {
+            "down_votes": down_votes,
+            "votes": len(results) + 1,
+            "required": self.quorum,
+            "confirmed": down_votes >= self.quorum,
+        }
+        if vote["confirmed"]:
+            failure["quorum"] = vote
+            return failure
+
+        passed = next(result for result in results if result.get("status") == "UP")
+        vote["overruled"] = failure.get("error")
+        passed["quorum"] = vote
+        return passed
+
+
+_quorum_confirmer: Optional[QuorumConfirmer] = None
+_quorum_confirmer_lock = threading.Lock()
+
+
+def get_quorum_confirmer() -> Optional[QuorumConfirmer]:
+    """Get the shared confirmer, or None when quorum confirmation is disabled"""
+    global _quorum_confirmer
+    if not QUORUM_CONFIRMATION:
+        return None
+    with _quorum_confirmer_lock:
+        if _quorum_confirmer is None:
+            _quorum_confirmer = QuorumConfirmer()
+        return _quorum_confirmer
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter
+Client-side request pacing shared by threads, asyncio tasks and (optionally) processes
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Rate Limiter Configuration
+# Shared state for agents/workers on one host, e.g. sqlite:///rate_limits.db; empty = per process
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "")
+# Longest a server may ask us to pause (Retry-After / X-RateLimit-Reset), in seconds
+RATE_LIMIT_MAX_PAUSE = float(os.getenv("RATE_LIMIT_MAX_PAUSE", "300"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    name TEXT PRIMARY KEY,
+    tat REAL NOT NULL,
+    paused_until REAL NOT NULL
+)
+"""
+
+# Rate limiter state: the "theoretical arrival time" of the next request and the end of any server pause
+RateState = Tuple[float, float]
+StateUpdate = Callable[[RateState], Tuple[RateState, float]]
+
+
+class LocalRateState:
+    """Limiter state shared by the threads and tasks of one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: RateState = (0.0, 0.0)
+
+    def update(self, fn: StateUpdate) -> float:
+        """Apply ``fn(state) -> (new state, result)`` atomically; returns the result"""
+        with self._lock:
+            self._state, result = fn(self._state)
+            return result
+
+
+class SQLiteRateState:
+    """Limiter state in a SQLite database, shared by every process that opens it
+
+    Each update is one IMMEDIATE transaction, so processes serialise on the
+    database lock. Times are wall-clock, so this is for processes on one host.
+    """
+
+    def __init__(self, path: str, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+    def update(self, fn: StateUpdate) -> float:
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT tat, paused_until FROM rate_limits WHERE name = ?", (self.name,)
+            ).fetchone()
+            (tat, paused_until), result = fn(row if row else (0.0, 0.0))
+            self._conn.execute("INSERT OR REPLACE INTO rate_limits (name, tat, paused_until) VALUES (?, ?, ?)",
+                               (self.name, tat, paused_until))
+            return result
+
+
+def open_rate_state(spec: str, name: str):
+    """Limiter state backend from a ``scheme://location`` spec (empty or sqlite:///path)"""
+    if not spec:
+        return LocalRateState()
+    scheme, _, location = spec.partition("://")
+    if scheme == "sqlite" and location:
+        # sqlite:///relative.db -> relative.db, sqlite:////abs/path.db -> /abs/path.db
+        return SQLiteRateState(location[1:] if location.startswith("/") else location, name)
+    raise ValueError(f"Unsupported rate limit store {spec!r} (expected sqlite:///path)")
+
+
+def parse_retry_after(value: Optional[str], now: float) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset(value: Optional[str], now: float) -> Optional[float]:
+    """Seconds until an X-RateLimit-Reset, given as seconds or as a Unix timestamp"""
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    # Anything past 2001 is an epoch timestamp rather than a delay
+    return max(0.0, reset - now if reset > 1e9 else reset)
+
+
+class RateLimiter:
+    """Token bucket (GCRA form) that every caller reserves a send slot from
+
+    ``rate`` requests per second are allowed, with bursts of up to
+    ``capacity``. Each ``acquire`` takes the next free slot at once and then
+    waits for it, so concurrent callers queue up in order instead of all
+    retrying together. ``observe`` feeds response headers back: a 429/503
+    Retry-After, or an X-RateLimit-Remaining of zero, pauses every caller until
+    the server's reset time. With ``rate`` 0 only server-requested pauses apply.
+    """
+
+    def __init__(self, name: str, rate: float = 0.0, capacity: float = 1.0, state=None,
+                 max_pause: float = RATE_LIMIT_MAX_PAUSE, clock: Callable[[], float] = time.time):
+        self.name = name
+        self.interval = 1 / rate if rate > 0 else 0.0
+        # A full bucket lets ``capacity`` requests through back to back
+        self.tolerance = self.interval * (max(1.0, capacity) - 1)
+        self.state = state if state is not None else LocalRateState()
+        self.max_pause = max_pause
+        self.clock = clock
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "delayed": 0, "wait_seconds": 0.0, "max_wait": 0.0,
+                      "throttled": 0, "paused": 0, "limit": None, "remaining": None}
+
+    def reserve(self) -> float:
+        """Take the next send slot; returns how many seconds to wait before sending"""
+        now = self.clock()
+
+        def take(state: RateState) -> Tuple[RateState, float]:
+            tat, paused_until = state
+            tat = max(tat, now)
+            start = max(now, tat - self.tolerance)
+            return (tat + self.interval, paused_until), start - now
+
+        wait = self.state.update(take)
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            if wait > 0:
+                self.stats["delayed"] += 1
+                self.stats["wait_seconds"] += wait
+                self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+        return wait
+
+    def pause_remaining(self) -> float:
+        """Seconds left of a server-requested pause"""
+        now = self.clock()
+        return self.state.update(lambda state: (state, max(0.0, state[1] - now)))
+
+    def acquire(self) -> float:
+        """Block the calling thread until it may send; returns the seconds waited"""
+        waited = 0.0
+        wait = self.reserve()
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            # A slot reserved before a 429 arrived must still sit out the pause
+            wait = self.pause_remaining()
+        return waited
+
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop until this task may send"""
+        waited = 0.0
+        wait = self.reserve()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.pause_remaining()
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for ``seconds``, then resume with an empty bucket"""
+        seconds = min(seconds, self.max_pause)
+        until = self.clock() + seconds
+        self.state.update(lambda state: ((max(state[0], until + self.tolerance), max(state[1], until)), 0.0))
+        with self._stats_lock:
+            self.stats["paused"] += 1
+
+    def observe(self, status: int, headers: Mapping[str, str], default_pause: float = 1.0) -> None:
+        """Learn from a response's status and rate limit headers"""
+        now = self.clock()
+        headers = {key.lower(): value for key, value in headers.items()}
+        remaining = headers.get("x-ratelimit-remaining")
+        with self._stats_lock:
+            if headers.get("x-ratelimit-limit"):
+                self.stats["limit"] = headers["x-ratelimit-limit"]
+            if remaining is not None:
+                self.stats["remaining"] = remaining
+
+        if status in (429, 503):
+            if status == 429:
+                with self._stats_lock:
+                    self.stats["throttled"] += 1
+            retry_after = parse_retry_after(headers.get("retry-after"), now)
+            if retry_after is None:
+                retry_after = parse_reset(headers.get("x-ratelimit-reset"), now)
+            if retry_after is not None or status == 429:
+                self.pause(default_pause if retry_after is None else retry_after)
+            return
+
+        try:
+            exhausted = remaining is not None and float(remaining) <= 0
+        except ValueError:
+            exhausted = False
+        if exhausted:
+            reset = parse_reset(headers.get("x-ratelimit-reset"), now)
+            self.pause(default_pause if reset is None else reset)
+
+    def wait_stats(self) -> Dict:
+        """Requests paced so far and how long they waited"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["average_wait"] = stats["wait_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float = 0.0, capacity: float = 1.0) -> RateLimiter:
+    """Get the process-wide limiter for an API (the first call's rate and capacity apply)
+
+    With RATE_LIMIT_STORE set, the limiter's state is shared with other processes.
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(name)
+        if limiter is None:
+            try:
+                state = open_rate_state(RATE_LIMIT_STORE, name)
+            except (sqlite3.Error, ValueError) as e:
+                print(f"[RATE] Could not open rate limit store {RATE_LIMIT_STORE}: {e} - pacing per process")
+                state = LocalRateState()
+            limiter = _rate_limiters[name] = RateLimiter(name, rate, capacity, state)
+        return limiter
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Target Scheduler
+Heap-based per-target check scheduling with phase spreading, jitter, drift correction,
+adaptive intervals and a global probe budget
+"""
+
+import heapq
+import math
+import os
+import random
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Fraction of a target's interval used as random per-run jitter (e.g. 0.05 = +/-5%)
+SCHEDULER_JITTER = float(os.getenv("SCHEDULER_JITTER", "0.05"))
+
+# Adaptive intervals: probe failing targets fast, stable ones progressively less often
+ADAPTIVE_INTERVALS = os.getenv("ADAPTIVE_INTERVALS", "true").lower() == "true"
+# Interval (seconds) while a target is DOWN or DEGRADED, so DOWN_THRESHOLD is reached quickly
+ADAPTIVE_MIN_INTERVAL = float(os.getenv("ADAPTIVE_MIN_INTERVAL", "15"))
+# Stable targets back off up to this multiple of their configured interval...
+ADAPTIVE_MAX_FACTOR = float(os.getenv("ADAPTIVE_MAX_FACTOR", "4"))
+# ...growing by this factor after every ADAPTIVE_STABLE_RUNS consecutive UP results
+ADAPTIVE_GROWTH = float(os.getenv("ADAPTIVE_GROWTH", "1.5"))
+ADAPTIVE_STABLE_RUNS = int(os.getenv("ADAPTIVE_STABLE_RUNS", "12"))
+
+# Global probe budget: at most PROBE_BUDGET probes per PROBE_BUDGET_CYCLE seconds (0 = unlimited)
+PROBE_BUDGET = int(os.getenv("PROBE_BUDGET", "0"))
+PROBE_BUDGET_CYCLE = float(os.getenv("PROBE_BUDGET_CYCLE", "60"))
+
+
+def phase_offset(name: str, interval: float) -> float:
+    """Stable offset in [0, interval) so targets sharing an interval are spread evenly"""
+    return (zlib.crc32(name.encode("utf-8")) / 2 ** 32) * interval
+
+
+class _Entry:
+    __slots__ = ("interval", "anchor", "version")
+
+    def __init__(self, interval: float, anchor: float):
+        self.interval = interval
+        self.anchor = anchor
+        self.version = 0
+
+
+class TargetScheduler:
+    """Min-heap of next check times, O(log n) per scheduled check
+
+    Each target keeps an anchor on its own fixed grid (anchor + k * interval).
+    Jitter is applied to the fire time only, never to the anchor, so it does not
+    accumulate, and late ticks are caught up on the grid rather than pushed back.
+    """
+
+    def __init__(self, jitter: float = SCHEDULER_JITTER,
+                 clock: Callable[[], float] = time.monotonic):
+        self.jitter = jitter
+        self.clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, _Entry] = {}
+        self.skipped_runs = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def add(self, name: str, interval: float, now: Optional[float] = None) -> None:
+        """Schedule a target, phase-spread across its first interval"""
+        if interval <= 0:
+            raise ValueError(f"Interval must be positive, got {interval}")
+        now = self.clock() if now is None else now
+        entry = _Entry(interval, now + phase_offset(name, interval))
+        previous = self._entries.get(name)
+        if previous is not None:
+            entry.version = previous.version + 1
+        self._entries[name] = entry
+        self._push(name, entry)
+
+    def remove(self, name: str) -> None:
+        """Unschedule a target (its heap item is discarded lazily)"""
+        self._entries.pop(name, None)
+
+    def reschedule(self, name: str, interval: float, now: Optional[float] = None) -> None:
+        """Change a target's interval, taking effect from its next run"""
+        entry = self._entries.get(name)
+        if entry is None:
+            self.add(name, interval, now)
+            return
+        if interval <= 0:
+            raise ValueError(f"Interval must be positive, got {interval}")
+        now = self.clock() if now is None else now
+        # The next run happens one new interval after the last one, or now if that has passed
+        last_run = entry.anchor - entry.interval
+        entry.interval = interval
+        entry.anchor = max(now, last_run + interval)
+        entry.version += 1
+        self._push(name, entry)
+
+    def interval_of(self, name: str) -> Optional[float]:
+        entry = self._entries.get(name)
+        return entry.interval if entry else None
+
+    def next_due(self) -> Optional[float]:
+        """Time of the earliest pending check, or None if nothing is scheduled"""
+        while self._heap:
+            due, version, name = self._heap[0]
+            entry = self._entries.get(name)
+            if entry is not None and entry.version == version:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        """Return targets due at ``now`` and schedule their next runs"""
+        now = self.clock() if now is None else now
+        due_names: List[str] = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due_names) >= limit:
+                break
+            _, version, name = heapq.heappop(self._heap)
+            entry = self._entries.get(name)
+            if entry is None or entry.version != version:
+                continue  # Removed or rescheduled since this item was pushed
+
+            due_names.append(name)
+            entry.anchor += entry.interval
+            if entry.anchor <= now:
+                # Fell behind by whole intervals: skip the missed slots, stay on the grid
+                missed = math.ceil((now - entry.anchor) / entry.interval)
+                self.skipped_runs += missed
+                entry.anchor += missed * entry.interval
+                if entry.anchor <= now:
+                    entry.anchor += entry.interval
+            entry.version += 1
+            self._push(name, entry)
+
+        self._maybe_compact()
+        return due_names
+
+    def _push(self, name: str, entry: _Entry) -> None:
+        spread = entry.interval * self.jitter
+        fire_at = entry.anchor + (random.uniform(-spread, spread) if spread else 0.0)
+        heapq.heappush(self._heap, (fire_at, entry.version, name))
+
+    def _maybe_compact(self) -> None:
+        # Stale items from remove/reschedule are skipped lazily; rebuild if they dominate
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._heap = [item for item in self._heap
+                          if item[2] in self._entries and self._entries[item[2]].version == item[1]]
+            heapq.heapify(self._heap)
+
+
+class AdaptiveIntervalPolicy:
+    """Picks each target's next interval from its latest result
+
+    A DOWN or DEGRADED result drops the interval to ``min_interval`` at once.
+    UP results first double it back to the configured interval, then every
+    ``stable_runs`` consecutive UPs grow it by ``growth`` until it reaches
+    ``max_factor`` times the configured interval.
+    """
+
+    def __init__(self, min_interval: float = ADAPTIVE_MIN_INTERVAL, max_factor: float = ADAPTIVE_MAX_FACTOR,
+                 growth: float = ADAPTIVE_GROWTH, stable_runs: int = ADAPTIVE_STABLE_RUNS):
+        self.min_interval = min_interval
+        self.max_factor = max(1.0, max_factor)
+        self.growth = max(1.0, growth)
+        self.stable_runs = max(1, stable_runs)
+        self._streaks: Dict[str, int] = {}
+
+    def next_interval(self, name: str, base: float, current: float, status: Optional[str]) -> float:
+        """The interval to use after a result with ``status`` (``base`` is the configured interval)"""
+        if status != "UP":
+            self._streaks[name] = 0
+            return min(base, self.min_interval)
+
+        streak = self._streaks.get(name, 0) + 1
+        if current < base:
+            # Recovering: ramp back quickly so a relapse is still caught fast
+            self._streaks[name] = 0
+            return min(base, current * 2)
+        if streak >= self.stable_runs:
+            self._streaks[name] = 0
+            return min(base * self.max_factor, current * self.growth)
+        self._streaks[name] = streak
+        return current
+
+    def forget(self, name: str) -> None:
+        self._streaks.pop(name, None)
+
+
+class ProbeBudget:
+    """Token bucket capping total probes at ``limit`` per ``cycle`` seconds
+
+    Checks over budget are not dropped: they stay due in the scheduler and run
+    as tokens refill, oldest first.
+    """
+
+    def __init__(self, limit: int, cycle: float, clock: Callable[[], float] = time.monotonic):
+        if limit <= 0 or cycle <= 0:
+            raise ValueError("Probe budget limit and cycle must be positive")
+        self.capacity = float(limit)
+        self.rate = limit / cycle
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        # Scheduler passes that left due checks waiting for tokens
+        self.exhausted = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: Optional[float] = None) -> int:
+        """Probes that may start now"""
+        self._refill(self.clock() if now is None else now)
+        return int(self.tokens)
+
+    def spend(self, count: int, now: Optional[float] = None) -> None:
+        self._refill(self.clock() if now is None else now)
+        self.tokens -= count
+
+    def next_available(self, now: Optional[float] = None) -> float:
+        """When the next probe may start"""
+        now = self.clock() if now is None else now
+        self._refill(now)
+        return now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+
+
+def take_due(scheduler: TargetScheduler, budget: Optional[ProbeBudget], now: float) -> List[str]:
+    """Pop the targets due at ``now``, within the probe budget if there is one"""
+    if budget is None:
+        return scheduler.pop_due(now)
+    due = scheduler.pop_due(now, limit=budget.available(now))
+    budget.spend(len(due), now)
+    next_due = scheduler.next_due()
+    if next_due is not None and next_due <= now:
+        budget.exhausted += 1
+    return due
+
+
+def next_wakeup(scheduler: TargetScheduler, budget: Optional[ProbeBudget], now: float) -> Optional[float]:
+    """When the next check can run: the earliest due time, held back by an exhausted budget"""
+    next_due = scheduler.next_due()
+    if next_due is not None and budget is not None:
+        next_due = max(next_due, budget.next_available(now))
+    return next_due
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Sharded Probing
+Consistent-hash targets across worker processes that stream results to one coordinator
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from hash_ring import HashRing
+from monitor_daemon import MONITORING_INTERVAL, MonitorDaemon
+from probe_engine import AsyncProbeEngine, ProbeTarget
+from scheduler import PROBE_BUDGET, PROBE_BUDGET_CYCLE, ProbeBudget, TargetScheduler, next_wakeup, take_due
+
+# Load environment variables
+load_dotenv()
+
+# Sharding Configuration
+# Worker processes for probing; 0 or 1 keeps probing in the daemon process
+PROBE_WORKERS = int(os.getenv("PROBE_WORKERS", "0"))
+# Workers send results in batches of up to this many, at least this often (seconds)
+SHARD_BATCH_SIZE = int(os.getenv("SHARD_BATCH_SIZE", "200"))
+SHARD_BATCH_INTERVAL = float(os.getenv("SHARD_BATCH_INTERVAL", "0.05"))
+
+
+class ProbeWorker:
+    """Probe loop for one shard, run in its own process
+
+    Takes ("add", target) / ("remove", name) / ("interval", name, seconds) /
+    ("stop",) commands and sends ``(worker_id, [(name, result), ...])``
+    batches to the coordinator. ``budget`` is this worker's share of PROBE_BUDGET.
+    """
+
+    def __init__(self, worker_id: str, targets: List[ProbeTarget], interval: float,
+                 commands: multiprocessing.Queue, results: multiprocessing.Queue, budget: int = 0):
+        self.worker_id = worker_id
+        self.interval = interval
+        self.commands = commands
+        self.results = results
+        self.engine = AsyncProbeEngine()
+        self.scheduler = TargetScheduler()
+        self.budget = ProbeBudget(budget, PROBE_BUDGET_CYCLE) if budget > 0 else None
+        self.targets: Dict[str, ProbeTarget] = {}
+        self._probing: Dict[str, asyncio.Task] = {}
+        self._batch: List[Tuple[str, Dict]] = []
+        self._stopped = False
+        self._wakeup: Optional[asyncio.Event] = None
+        for target in targets:
+            self.add_target(target)
+
+    def add_target(self, target: ProbeTarget) -> None:
+        self.targets[target.name] = target
+        self.scheduler.add(target.name, target.interval or self.interval)
+
+    def remove_target(self, name: str) -> None:
+        self.targets.pop(name, None)
+        self.scheduler.remove(name)
+
+    def _command(self, command: Tuple) -> None:
+        if command[0] == "add":
+            self.add_target(command[1])
+        elif command[0] == "remove":
+            self.remove_target(command[1])
+        elif command[0] == "interval":
+            if command[1] in self.targets:
+                self.scheduler.reschedule(command[1], command[2])
+        elif command[0] == "stop":
+            self._stopped = True
+        self._wakeup.set()
+
+    def _read_commands(self, loop: asyncio.AbstractEventLoop) -> None:
+        while True:
+            command = self.commands.get()
+            loop.call_soon_threadsafe(self._command, command)
+            if command[0] == "stop":
+                return
+
+    def _start_probe(self, name: str) -> None:
+        target = self.targets.get(name)
+        if target is None or name in self._probing:
+            return
+        task = asyncio.create_task(self._probe(target))
+        self._probing[name] = task
+        task.add_done_callback(lambda t, name=name: self._probing.pop(name, None))
+
+    async def _probe(self, target: ProbeTarget) -> None:
+        result = await self.engine.probe(target)
+        if target.name in self.targets:
+            self._batch.append((target.name, result))
+            if len(self._batch) >= SHARD_BATCH_SIZE:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._batch:
+            self.results.put((self.worker_id, self._batch))
+            self._batch = []
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        threading.Thread(target=self._read_commands, args=(loop,), daemon=True).start()
+
+        while not self._stopped:
+            now = time.monotonic()
+            for name in take_due(self.scheduler, self.budget, now):
+                self._start_probe(name)
+            self._flush()
+
+            next_due = next_wakeup(self.scheduler, self.budget, now)
+            delay = next_due - now if next_due is not None else MONITORING_INTERVAL
+            if self._probing:
+                delay = min(delay, SHARD_BATCH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, delay))
+            except asyncio.TimeoutError:
+                pass
+
+        if self._probing:
+            await asyncio.gather(*self._probing.values(), return_exceptions=True)
+        self._flush()
+        await self.engine.close()
+
+
+def run_probe_worker(worker_id: str, targets: List[ProbeTarget], interval: float,
+                     commands: multiprocessing.Queue, results: multiprocessing.Queue, budget: int = 0) -> None:
+    """Worker process entry point"""
+    # Ctrl+C goes to the whole process group; let the coordinator shut workers down in order
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(ProbeWorker(worker_id, targets, interval, commands, results, budget).run())
+
+
+class ShardedMonitorDaemon(MonitorDaemon):
+    """Monitor daemon whose probes run in worker processes, one hash-ring shard each
+
+    Results stream back over a multiprocessing queue and go through the usual
+    dispatch path (history, state, alerting and remediation) in this process.
+    Dead workers are restarted with their shard at the next summary tick.
+    """
+
+    def __init__(self, targets: List[ProbeTarget], interval: float = MONITORING_INTERVAL,
+                 workers: int = PROBE_WORKERS):
+        self._context = multiprocessing.get_context("spawn")
+        self.ring = HashRing(f"worker-{i}" for i in range(max(1, workers)))
+        self.shards: Dict[str, Dict[str, ProbeTarget]] = {node: {} for node in self.ring.nodes}
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._commands: Dict[str, multiprocessing.Queue] = {}
+        self._results = self._context.Queue()
+        self._stopping = False
+        super().__init__(targets, interval)
+        # Workers enforce their share of the probe budget
+        self.budget = None
+
+    def _schedule(self, target: ProbeTarget) -> None:
+        """Hand the target to the worker that owns it on the ring"""
+        node = self.ring.node_for(target.name)
+        self.shards[node][target.name] = target
+        if node in self._commands:
+            self._commands[node].put(("add", target))
+
+    def _unschedule(self, name: str) -> None:
+        node = self.ring.node_for(name)
+        if self.shards[node].pop(name, None) is not None and node in self._commands:
+            self._commands[node].put(("remove", name))
+
+    def _set_interval(self, name: str, interval: float) -> None:
+        node = self.ring.node_for(name)
+        if name in self.shards[node] and node in self._commands:
+            self._commands[node].put(("interval", name, interval))
+
+    def _spawn(self, node: str) -> None:
+        commands = self._context.Queue()
+        # Each worker enforces an even share of the global probe budget
+        budget = max(1, PROBE_BUDGET // len(self.ring.nodes)) if PROBE_BUDGET > 0 else 0
+        process = self._context.Process(
+            target=run_probe_worker, name=f"probe-{node}", daemon=True,
+            args=(node, list(self.shards[node].values()), self.interval, commands, self._results, budget),
+        )
+        process.start()
+        self._processes[node] = process
+        self._commands[node] = commands
+
+    def _read_results(self, loop: asyncio.AbstractEventLoop) -> None:
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            loop.call_soon_threadsafe(self._on_results, *message)
+
+    def _on_results(self, node: str, batch: List[Tuple[str, Dict]]) -> None:
+        for name, result in batch:
+            target = self.targets.get(name)
+            if target is None:
+                continue
+            self._stats["probes"] += 1
+            self._stats["up" if result.get("status") == "UP" else "not_up"] += 1
+            # Workers keep their own sketches for hedging; alerts read this process's copy
+            if result.get("response_time") is not None:
+                self.engine.latency.record(name, result["response_time"])
+            self.dispatch_result(target, result)
+
+    def _log_summary(self) -> None:
+        super()._log_summary()
+        for node, process in list(self._processes.items()):
+            if not process.is_alive() and not self._stopping:
+                print(f"[SHARD] {node} exited (code {process.exitcode}) - restarting "
+                      f"with {len(self.shards[node])} targets")
+                # The new worker starts every target on its configured interval
+                for name in self.shards[node]:
+                    self._intervals.pop(name, None)
+                self._spawn(node)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for node in self.ring.nodes:
+            self._spawn(node)
+        sizes = ", ".join(f"{node}: {len(shard)}" for node, shard in self.shards.items())
+        print(f"[SHARD] Started {len(self._processes)} probe workers ({sizes})")
+        reader = threading.Thread(target=self._read_results, args=(loop,), daemon=True)
+        reader.start()
+        try:
+            await super().run()
+        finally:
+            self._stopping = True
+            for commands in self._commands.values():
+                commands.put(("stop",))
+            for process in self._processes.values():
+                await loop.run_in_executor(None, process.join, 10)
+            # Results already queued by the workers are delivered before the reader stops
+            self._results.put(None)
+            await loop.run_in_executor(None, reader.join)
+            await asyncio.sleep(0)
+            if self._pending:
+                await asyncio.gather(*self._pending.values(), return_exceptions=True)
+            if self.store:
+                self.store.flush()
+            if self.history:
+                self.history.flush()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+SLO Engine
+Vectorised multi-window error-budget burn-rate alerts over the probe history
+"""
+
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+import history_store
+from history_store import HistoryStore, get_history_store
+from main import MONITORING_INTERVAL, open_portia_incident, send_alert, update_portia_incident
+from scheduler import ADAPTIVE_MAX_FACTOR
+from state_store import StateStore
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Load environment variables
+load_dotenv()
+
+# SLO Configuration
+# Availability objective in percent of time not DOWN
+SLO_TARGET = float(os.getenv("SLO_TARGET", "99.9"))
+# Burn-rate rules as "long_window:short_window:burn_rate:severity" (seconds), comma separated.
+# Defaults follow the SRE workbook: page on a 2% / 5% budget spend in 1h / 6h, ticket on 10% in 1d
+SLO_BURN_RULES = os.getenv("SLO_BURN_RULES", "3600:300:14.4:page,21600:1800:6:page,86400:7200:3:ticket")
+SLO_EVAL_INTERVAL = float(os.getenv("SLO_EVAL_INTERVAL", "60"))
+# Targets need this many probes in the long window before they can alert
+SLO_MIN_SAMPLES = int(os.getenv("SLO_MIN_SAMPLES", "10"))
+# A probe result counts for the time until the next probe, but for at most this many seconds, so time
+# the agent wasn't running isn't counted; defaults to twice the longest adaptive probe interval
+SLO_MAX_SAMPLE_GAP = float(os.getenv("SLO_MAX_SAMPLE_GAP")
+                           or 2 * ADAPTIVE_MAX_FACTOR * max(MONITORING_INTERVAL, history_store.HISTORY_RESOLUTION))
+
+# A target breaching several rules is reported once, under its most severe one
+SEVERITY_RANK = {"ticket": 1, "page": 2}
+
+
+class BurnRule:
+    """Alert when both the long and the short window burn budget faster than ``burn_rate``"""
+
+    def __init__(self, long_window: float, short_window: float, burn_rate: float, severity: str):
+        self.long_window = long_window
+        self.short_window = short_window
+        self.burn_rate = burn_rate
+        self.severity = severity
+
+    @property
+    def label(self) -> str:
+        return f"{_duration(self.long_window)}/{_duration(self.short_window)} x{self.burn_rate:g}"
+
+
+def parse_burn_rules(spec: str) -> List[BurnRule]:
+    rules = []
+    for item in spec.split(","):
+        if item.strip():
+            long_window, short_window, burn_rate, severity = item.strip().split(":")
+            rules.append(BurnRule(float(long_window), float(short_window), float(burn_rate), severity))
+    return rules
+
+
+def _duration(seconds: float) -> str:
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+def record_dtype() -> "np.dtype":
+    """NumPy view of history_store.RECORD"""
+    return np.dtype([("timestamp", "<u4"), ("status", "u1"), ("flags", "u1"), ("code", "<u2"),
+                     ("latency", "<u2", (len(history_store.LATENCY_FIELDS),))])
+
+
+class SLOEngine:
+    """Evaluates every target's burn rates in one vectorised pass over the history file
+
+    Error rates are measured over time, not probe counts: each result stands
+    for the time until the next one (up to ``max_gap``), so a DOWN target
+    probed every 15 s weighs no more than one probed every 5 minutes.
+
+    Each ring is read as deep as its timestamps say the longest rule window
+    reaches, however often the target is probed. Rings are processed in
+    chunks of similar depth to bound the memory one evaluation needs.
+
+    Each target has at most one open breach (and Portia incident), under its
+    most severe breaching rule; with a ``store`` the open breaches survive
+    restarts and move with targets between fleet agents.
+    """
+
+    def __init__(self, history: HistoryStore, rules: Optional[List[BurnRule]] = None,
+                 slo_target: float = SLO_TARGET, min_samples: int = SLO_MIN_SAMPLES,
+                 max_gap: float = SLO_MAX_SAMPLE_GAP, chunk_records: int = 1 << 21,
+                 store: Optional[StateStore] = None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("The SLO engine requires numpy")
+        self.history = history
+        self.rules = rules if rules is not None else parse_burn_rules(SLO_BURN_RULES)
+        self.error_budget = 1 - slo_target / 100
+        self.min_samples = min_samples
+        self.max_gap = max_gap
+        # Records gathered per chunk of rings
+        self.chunk_records = chunk_records
+        self.dtype = record_dtype()
+        if self.dtype.itemsize != history_store.RECORD.size:
+            raise ValueError("History record layout does not match the SLO engine's view")
+        self.store = store
+        # Targets currently alerting, with their rule, when they started and their incident
+        self.firing: Dict[str, Dict] = store.slo_breaches() if store is not None else {}
+
+    def _records(self) -> "np.ndarray":
+        """The history file's records as a (capacity, slots) array view"""
+        buffer, offset, capacity = self.history.data_buffer()
+        records = np.frombuffer(buffer, dtype=self.dtype, offset=offset, count=capacity * self.history.slots)
+        return records.reshape(capacity, self.history.slots)
+
+    def _newest(self, field: "np.ndarray", rings: "np.ndarray", heads: "np.ndarray", depth: int) -> "np.ndarray":
+        """Each ring's newest ``depth`` values of one record field, newest first"""
+        slots = self.history.slots
+        out = np.empty((len(rings), depth), dtype=field.dtype)
+        start = heads - depth
+        # Rings whose newest records don't wrap round are one slice each: copy them as windows
+        direct = start >= 0
+        if direct.any():
+            windows = sliding_window_view(field, depth, axis=1)
+            out[direct] = windows[rings[direct], start[direct]][:, ::-1]
+        # The rest (young or just-wrapped rings) are gathered record by record
+        wrapped = ~direct
+        if wrapped.any():
+            positions = (heads[wrapped, None] - 1 - np.arange(depth)[None, :]) % slots
+            out[wrapped] = field[rings[wrapped, None], positions]
+        return out
+
+    def _window_lengths(self, timestamp: "np.ndarray", rings: "np.ndarray", heads: "np.ndarray",
+                        limits: "np.ndarray", cutoff: float) -> "np.ndarray":
+        """How many of each ring's newest records are at or after ``cutoff``
+
+        Timestamps fall with depth, so this is a binary search run on all rings at once.
+        """
+        low = np.zeros(len(rings), dtype=np.int64)
+        high = limits.copy()
+        while True:
+            active = low < high
+            if not active.any():
+                return low
+            middle = (low + high) // 2
+            inside = timestamp[rings, (heads - 1 - middle) % self.history.slots] >= cutoff
+            low = np.where(active & inside, middle + 1, low)
+            high = np.where(active & ~inside, middle, high)
+
+    def _window_rates(self, records: "np.ndarray", rings: "np.ndarray", heads: "np.ndarray",
+                      depths: "np.ndarray", windows: List[float],
+                      now: float) -> Dict[float, Tuple["np.ndarray", "np.ndarray"]]:
+        """Time-weighted error rate and probe count per window for a chunk of rings"""
+        depth = max(1, int(depths.max()))
+        valid = np.arange(depth)[None, :] < depths[:, None]
+        down = (self._newest(records["status"], rings, heads, depth) == history_store.STATUS_CODES["DOWN"]) & valid
+        starts = self._newest(records["timestamp"], rings, heads, depth).astype(np.float64)
+        # Each result lasts until the next (newer) one, the newest until now, capped at max_gap
+        ends = np.empty_like(starts)
+        ends[:, 0] = now
+        ends[:, 1:] = starts[:, :-1]
+        np.minimum(ends, starts + self.max_gap, out=ends)
+
+        results = {}
+        for window in windows:
+            cutoff = now - window
+            covered = np.where(valid, np.clip(ends - np.maximum(starts, cutoff), 0, None), 0.0)
+            seconds = covered.sum(axis=1)
+            bad = np.where(down, covered, 0.0).sum(axis=1)
+            rate = np.divide(bad, seconds, out=np.zeros(len(rings)), where=seconds > 0)
+            results[window] = (rate, ((starts >= cutoff) & valid).sum(axis=1))
+        return results
+
+    def evaluate(self, now: Optional[float] = None) -> List[Dict]:
+        """Burn rates for every target and rule; returns the (target, rule) pairs breaching"""
+        now = time.time() if now is None else now
+        names, rings, heads, counts = self.history.ring_table()
+        if not names or not self.rules:
+            return []
+        rings = np.asarray(rings, dtype=np.int64)
+        heads = np.asarray(heads, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        records = self._records()
+
+        # Records each ring needs: those inside the longest window plus the one straddling its start
+        longest = max(rule.long_window for rule in self.rules)
+        depths = np.minimum(counts, self._window_lengths(records["timestamp"], rings, heads, counts,
+                                                         now - longest) + 1)
+
+        # Error rate per distinct window, computed once even if several rules share it
+        windows = sorted({w for rule in self.rules for w in (rule.long_window, rule.short_window)})
+        rates = {window: np.zeros(len(names)) for window in windows}
+        totals = {window: np.zeros(len(names), dtype=np.int64) for window in windows}
+        # Deepest rings first, so each chunk is padded only to depths close to its own
+        order = np.argsort(-depths, kind="stable")
+        position = 0
+        while position < len(order):
+            rows = max(1, self.chunk_records // max(1, int(depths[order[position]])))
+            chunk = order[position:position + rows]
+            position += rows
+            for window, (rate, total) in self._window_rates(records, rings[chunk], heads[chunk], depths[chunk],
+                                                            windows, now).items():
+                rates[window][chunk] = rate
+                totals[window][chunk] = total
+        del records
+
+        breaches = []
+        for rule in self.rules:
+            long_burn = rates[rule.long_window] / self.error_budget
+            short_burn = rates[rule.short_window] / self.error_budget
+            breaching = ((long_burn >= rule.burn_rate) & (short_burn >= rule.burn_rate)
+                         & (totals[rule.long_window] >= self.min_samples))
+            for i in np.flatnonzero(breaching):
+                breaches.append({
+                    "name": names[i],
+                    "rule": rule.label,
+                    "severity": rule.severity,
+                    "long_burn_rate": round(float(long_burn[i]), 2),
+                    "short_burn_rate": round(float(short_burn[i]), 2),
+                    "error_rate": round(float(rates[rule.long_window][i]), 5),
+                    "samples": int(totals[rule.long_window][i]),
+                })
+        return breaches
+
+    def tick(self, portia_client=None, now: Optional[float] = None,
+             owned: Optional[Set[str]] = None) -> List[Dict]:
+        """Evaluate once, alert on newly breaching targets, re-grade changed ones and clear recovered ones
+
+        ``owned`` limits alerting to those targets (fleet agents only alert on their own).
+        Returns each breaching target's most severe breach.
+        """
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        current: Dict[str, Dict] = {}
+        for breach in self.evaluate(now):
+            if owned is not None and breach["name"] not in owned:
+                continue
+            held = current.get(breach["name"])
+            if held is None or _rank(breach) > _rank(held):
+                current[breach["name"]] = breach
+        if owned is not None and self.store is not None:
+            # Targets handed over by another agent keep the breach (and incident) it recorded
+            for name, breach in self.store.slo_breaches().items():
+                if name in owned and name not in self.firing:
+                    self.firing[name] = breach
+
+        for name, breach in current.items():
+            previous = self.firing.get(name)
+            if previous is None:
+                breach["since"] = now
+                breach["incident_id"] = alert_burn_rate(breach, portia_client)
+            else:
+                breach["since"], breach["incident_id"] = previous["since"], previous["incident_id"]
+                if breach["severity"] != previous["severity"]:
+                    regrade_burn_rate(breach, previous["severity"], portia_client)
+                elif breach["rule"] == previous["rule"]:
+                    continue
+            if self.store is not None:
+                self.store.save_slo_breach(name, breach["rule"], breach["severity"], breach["since"],
+                                           breach["incident_id"])
+        for name, breach in self.firing.items():
+            if name in current:
+                continue
+            if owned is not None and name not in owned:
+                # Handed to another agent, which carries on with the target's alerting
+                continue
+            clear_burn_rate(breach, portia_client)
+            if self.store is not None:
+                self.store.delete_slo_breach(name)
+        self.firing = current
+        print(f"[SLO] Evaluated {len(self.rules)} rules in {(time.perf_counter() - started) * 1000:.1f} ms, "
+              f"{len(current)} targets breaching")
+        return list(current.values())
+
+
+def _rank(breach: Dict) -> Tuple[int, float]:
+    return SEVERITY_RANK.get(breach["severity"], 0), breach["long_burn_rate"]
+
+
+def _incident_severity(severity: str) -> str:
+    return "high" if severity == "page" else "medium"
+
+
+def alert_burn_rate(breach: Dict, portia_client=None) -> Optional[str]:
+    """Send a burn-rate breach through the alert channels and the Portia incident path
+
+    Returns the id of the incident opened for it, if any.
+    """
+    print(f"[SLO] {breach['name']}: error budget burning x{breach['long_burn_rate']} ({breach['rule']})")
+    budget = 100 - SLO_TARGET
+    since = datetime.fromtimestamp(breach["since"]).strftime("%Y-%m-%d %H:%M:%S")
+    send_alert(f"""
+🔥 SLO BURN RATE ALERT ({breach['severity'].upper()})
+
+Target: {breach['name']}
+Objective: {SLO_TARGET:g}% availability (error budget {budget:.3g}%)
+Rule: {breach['rule']}
+Burn rate: x{breach['long_burn_rate']} (long window), x{breach['short_burn_rate']} (short window)
+Error rate: {breach['error_rate'] * 100:.3g}% of the time ({breach['samples']} probes)
+Breaching since: {since}
+    """)
+
+    if portia_client and portia_client.enabled:
+        return open_portia_incident(
+            portia_client,
+            f"slo:{breach['name']}",
+            monitor_id="uptime-agent",
+            title=f"Error budget burn: {breach['name']}",
+            description=(f"{breach['name']} is burning its {SLO_TARGET:g}% SLO error budget "
+                         f"x{breach['long_burn_rate']} ({breach['rule']}) since {since}"),
+            severity=_incident_severity(breach["severity"]),
+            status="open"
+        )
+    return None
+
+
+def regrade_burn_rate(breach: Dict, previous_severity: str, portia_client=None) -> None:
+    """Move a target's open breach to a new severity; escalations alert again"""
+    escalated = SEVERITY_RANK.get(breach["severity"], 0) > SEVERITY_RANK.get(previous_severity, 0)
+    print(f"[SLO] {breach['name']}: burn rate {'escalated' if escalated else 'eased'} "
+          f"from {previous_severity} to {breach['severity']} ({breach['rule']})")
+    if escalated:
+        since = datetime.fromtimestamp(breach["since"]).strftime("%Y-%m-%d %H:%M:%S")
+        send_alert(f"""
+🔥 SLO BURN RATE ESCALATED ({previous_severity.upper()} → {breach['severity'].upper()})
+
+Target: {breach['name']}
+Rule: {breach['rule']}
+Burn rate: x{breach['long_burn_rate']} (long window), x{breach['short_burn_rate']} (short window)
+Breaching since: {since}
+    """)
+    if breach.get("incident_id") and portia_client and portia_client.enabled:
+        update_portia_incident(
+            portia_client,
+            f"slo:{breach['name']}",
+            breach["incident_id"],
+            severity=_incident_severity(breach["severity"]),
+            description=(f"{breach['name']} is burning its {SLO_TARGET:g}% SLO error budget "
+                         f"x{breach['long_burn_rate']} ({breach['rule']})")
+        )
+
+
+def clear_burn_rate(breach: Dict, portia_client=None) -> None:
+    """Resolve the incident opened for a breach once its burn rate is back under every rule"""
+    print(f"[SLO] {breach['name']}: burn rate back under all rules")
+    if breach.get("incident_id") and portia_client and portia_client.enabled:
+        update_portia_incident(
+            portia_client,
+            f"slo:{breach['name']}",
+            breach["incident_id"],
+            status="resolved",
+            resolved_at=datetime.now().isoformat()
+        )
+
+
+if __name__ == "__main__":
+    history = get_history_store()
+    if history is None:
+        print("❌ Probe history is disabled (HISTORY_PATH)")
+    else:
+        for breach in SLOEngine(history).evaluate():
+            print(breach)
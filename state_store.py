@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+State Store
+Durable per-target monitor state (down counters, last status, open incidents, fix PRs, last alert, SLO breaches)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# State Store Configuration
+# Set STATE_DB_PATH to an empty value to keep state in memory only (previous behaviour)
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "uptime_state.db")
+# Dirty state is committed in one transaction at most this often...
+STATE_FLUSH_INTERVAL = float(os.getenv("STATE_FLUSH_INTERVAL", "1"))
+# ...or as soon as this many targets have changed
+STATE_FLUSH_BATCH = int(os.getenv("STATE_FLUSH_BATCH", "100"))
+
+STATE_FIELDS = ("down_count", "last_status", "incident_id", "pr_number", "last_alert_at")
+SLO_FIELDS = ("rule", "severity", "since", "incident_id")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS target_state (
+    name TEXT PRIMARY KEY,
+    down_count INTEGER NOT NULL DEFAULT 0,
+    last_status TEXT,
+    incident_id TEXT,
+    pr_number INTEGER,
+    last_alert_at REAL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Targets breaching an SLO burn-rate rule, so their incidents outlive restarts and fleet handovers
+_SLO_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slo_breaches (
+    name TEXT PRIMARY KEY,
+    rule TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    since REAL NOT NULL,
+    incident_id TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+_UPSERT = """
+INSERT INTO target_state (name, down_count, last_status, incident_id, pr_number, last_alert_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET
+    down_count = excluded.down_count,
+    last_status = excluded.last_status,
+    incident_id = excluded.incident_id,
+    pr_number = excluded.pr_number,
+    last_alert_at = excluded.last_alert_at,
+    updated_at = excluded.updated_at
+"""
+
+
+def empty_state() -> Dict:
+    return {"down_count": 0, "last_status": None, "incident_id": None, "pr_number": None, "last_alert_at": None}
+
+
+class StateStore:
+    """SQLite (WAL mode) store for per-target state, cached in memory
+
+    Every row is read once when the store opens, so lookups are dictionary hits.
+    Writes update the cache immediately and are committed in batches (see
+    STATE_FLUSH_INTERVAL / STATE_FLUSH_BATCH); a crash loses at most one batch.
+    Safe to share between the daemon's event loop and its worker threads.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH, flush_interval: float = STATE_FLUSH_INTERVAL,
+                 flush_batch: int = STATE_FLUSH_BATCH):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL is durable across process crashes; only power loss can drop the last commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_SLO_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(target_state)")}
+        if "last_alert_at" not in columns:
+            # Databases written before repeat alerts were throttled
+            self._conn.execute("ALTER TABLE target_state ADD COLUMN last_alert_at REAL")
+        self._states: Dict[str, Dict] = {}
+        self._dirty = set()
+        self._last_flush = time.monotonic()
+
+        rows = self._conn.execute(
+            "SELECT name, down_count, last_status, incident_id, pr_number, last_alert_at FROM target_state"
+        )
+        for name, *values in rows:
+            self._states[name] = dict(zip(STATE_FIELDS, values))
+
+    def load(self, name: str) -> Dict:
+        """Get a copy of the saved state for a target (defaults if never seen)"""
+        with self._lock:
+            return dict(self._states.get(name) or empty_state())
+
+    def save(self, name: str, **fields) -> None:
+        """Record new state for a target; committed with the next batch"""
+        unknown = set(fields) - set(STATE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown state fields: {', '.join(sorted(unknown))}")
+        with self._lock:
+            state = self._states.setdefault(name, empty_state())
+            if all(state[key] == value for key, value in fields.items()):
+                return
+            state.update(fields)
+            self._dirty.add(name)
+            if (len(self._dirty) >= self.flush_batch
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def refresh(self, names: Iterable[str]) -> None:
+        """Re-read targets' saved state from the database, e.g. after another agent owned them
+
+        Targets with uncommitted local changes keep those changes.
+        """
+        with self._lock:
+            for name in names:
+                if name in self._dirty:
+                    continue
+                row = self._conn.execute(
+                    "SELECT down_count, last_status, incident_id, pr_number, last_alert_at FROM target_state "
+                    "WHERE name = ?",
+                    (name,),
+                ).fetchone()
+                if row is None:
+                    self._states.pop(name, None)
+                else:
+                    self._states[name] = dict(zip(STATE_FIELDS, row))
+
+    def delete(self, name: str) -> None:
+        """Forget a target's state"""
+        with self._lock:
+            self._states.pop(name, None)
+            self._dirty.discard(name)
+            self._conn.execute("DELETE FROM target_state WHERE name = ?", (name,))
+
+    def slo_breaches(self) -> Dict[str, Dict]:
+        """Every target recorded as breaching an SLO rule, read from the database
+
+        Read on every call rather than cached, so an agent picks up breaches
+        recorded by the agent that owned a target before it.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, rule, severity, since, incident_id FROM slo_breaches"
+            ).fetchall()
+        return {name: dict(zip(SLO_FIELDS, values), name=name) for name, *values in rows}
+
+    def save_slo_breach(self, name: str, rule: str, severity: str, since: float,
+                        incident_id: Optional[str]) -> None:
+        """Record that a target is breaching an SLO rule (committed at once)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO slo_breaches (name, rule, severity, since, incident_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, rule, severity, since, incident_id, time.time()),
+            )
+
+    def delete_slo_breach(self, name: str) -> None:
+        """Forget a target's SLO breach once it has cleared"""
+        with self._lock:
+            self._conn.execute("DELETE FROM slo_breaches WHERE name = ?", (name,))
+
+    def flush(self) -> None:
+        """Commit all pending changes"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        now = time.time()
+        rows = [(name, *(self._states[name][key] for key in STATE_FIELDS), now)
+                for name in self._dirty]
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(_UPSERT, rows)
+        self._dirty.clear()
+
+    def close(self) -> None:
+        """Flush pending changes and close the database"""
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+
+_state_store: Optional[StateStore] = None
+_state_store_lock = threading.Lock()
+
+
+def get_state_store() -> Optional[StateStore]:
+    """Get the process-wide state store, or None when persistence is disabled"""
+    global _state_store
+    if not STATE_DB_PATH:
+        return None
+    with _state_store_lock:
+        if _state_store is None:
+            try:
+                _state_store = StateStore()
+            except sqlite3.Error as e:
+                print(f"[STATE] Could not open state store {STATE_DB_PATH}: {e} - state will not persist")
+                return None
+        return _state_store
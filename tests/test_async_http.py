@@ -0,0 +1,212 @@
+"""
+Async HTTP Client tests
+Response parsing (chunked, Content-Length, EOF-delimited) and keep-alive reuse against a local server
+"""
+
+import asyncio
+
+import pytest
+
+from async_http import (ProtocolError, build_request, has_body, is_reusable, iter_body, read_response_head,
+                        request)
+from connection_pool import AsyncConnectionPool
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def feed(data: bytes, eof: bool = True) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    if eof:
+        reader.feed_eof()
+    return reader
+
+
+async def parse(data: bytes, chunk_size: int = 65536):
+    """Head and body of a raw response, plus whatever is left on the stream after it"""
+    reader = feed(data)
+    status, reason, headers = await read_response_head(reader)
+    body = b"".join([chunk async for chunk in iter_body(reader, headers, chunk_size)])
+    return status, reason, headers, body, await reader.read()
+
+
+def test_content_length_body_leaves_next_response_on_the_stream():
+    raw = (b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\nSet-Cookie: a=1\r\nSet-Cookie: b=2\r\n\r\nhello"
+           b"HTTP/1.1 204 No Content\r\n\r\n")
+    status, reason, headers, body, rest = run(parse(raw, chunk_size=2))
+    assert (status, reason, body) == (200, "OK", b"hello")
+    # Repeated headers are folded into one, names are lower-cased
+    assert headers["set-cookie"] == "a=1, b=2"
+    assert rest.startswith(b"HTTP/1.1 204")
+
+
+def test_chunked_body_with_extensions_and_trailers():
+    raw = (b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+           b"4;name=value\r\nWiki\r\n"
+           b"6\r\npedia \r\n"
+           b"E\r\nin \r\n\r\nchunks.\r\n"
+           b"0\r\nExpires: never\r\n\r\n"
+           b"NEXT")
+    status, _, headers, body, rest = run(parse(raw, chunk_size=3))
+    assert body == b"Wikipedia in \r\n\r\nchunks."
+    # Trailers are consumed, so the connection is positioned at the next response
+    assert rest == b"NEXT"
+
+
+def test_eof_delimited_body():
+    _, _, _, body, _ = run(parse(b"HTTP/1.0 200 OK\r\n\r\nuntil the end"))
+    assert body == b"until the end"
+
+
+@pytest.mark.parametrize("raw", [
+    b"",
+    b"garbage\r\n\r\n",
+    b"HTTP/1.1 abc OK\r\n\r\n",
+    b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n",
+    b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n10\r\nshort",
+    b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nshort",
+    b"HTTP/1.1 200 OK\r\nContent-Length: ten\r\n\r\n",
+])
+def test_malformed_responses_raise_protocol_error(raw):
+    with pytest.raises(ProtocolError):
+        run(parse(raw))
+
+
+def test_framing_rules():
+    assert not has_body("HEAD", 200)
+    assert not has_body("GET", 204) and not has_body("GET", 304) and not has_body("GET", 101)
+    assert has_body("GET", 200)
+    assert is_reusable({"content-length": "5"}, "GET", 200)
+    assert is_reusable({"transfer-encoding": "chunked"}, "GET", 200)
+    assert is_reusable({}, "HEAD", 200)
+    # An EOF-delimited body uses up the connection
+    assert not is_reusable({}, "GET", 200)
+    assert not is_reusable({"content-length": "5", "connection": "Close"}, "GET", 200)
+
+
+def test_build_request():
+    raw = build_request("POST", "example.com", 8080, "http", "/a?b=1", {"Connection": "keep-alive"}, b"{}")
+    head, _, body = raw.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    assert lines[0] == "POST /a?b=1 HTTP/1.1"
+    assert "Host: example.com:8080" in lines
+    assert "Connection: keep-alive" in lines
+    assert "Content-Length: 2" in lines
+    assert body == b"{}"
+    assert b"Host: example.com\r\n" in build_request("GET", "example.com", 443, "https", "/")
+
+
+class Server:
+    """Local HTTP server answering each path with a canned raw response"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.connections = 0
+        self.requests = []
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                path = head.split(b" ")[1].decode()
+                self.requests.append(path)
+                response = self.responses[path]
+                writer.write(response)
+                await writer.drain()
+                if b"Connection: close" in response:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+OK = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+CHUNKED = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n3\r\ndef\r\n0\r\n\r\n"
+CLOSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok"
+REDIRECT = b"HTTP/1.1 302 Found\r\nLocation: /ok\r\nContent-Length: 0\r\n\r\n"
+
+
+def test_keep_alive_connection_is_reused():
+    async def main():
+        pool = AsyncConnectionPool(max_idle_per_host=2, idle_timeout=30, host_sizes={})
+        async with Server({"/ok": OK, "/chunked": CHUNKED}) as server:
+            first_timings = {}
+            first = await request("GET", server.url("/ok"), pool=pool, timings=first_timings)
+            second_timings = {}
+            second = await request("GET", server.url("/chunked"), pool=pool, timings=second_timings)
+            third = await request("GET", server.url("/ok"), pool=pool)
+            await pool.close()
+        return server, pool, (first, first_timings), (second, second_timings), third
+
+    server, pool, (first, first_timings), (second, second_timings), third = run(main())
+    assert (first.body, second.body, third.body) == (b"ok", b"abcdef", b"ok")
+    assert server.connections == 1
+    assert (first.reused, second.reused, third.reused) == (False, True, True)
+    assert pool.stats["opened"] == 1 and pool.stats["reused"] == 2
+    # Plain HTTP has no TLS phase, and a reused connection has no connect phase at all
+    assert {"dns", "connect", "ttfb", "transfer", "total"} <= set(first_timings)
+    assert "tls" not in first_timings
+    assert "connect" not in second_timings and "total" in second_timings
+
+
+def test_connection_close_is_not_pooled():
+    async def main():
+        pool = AsyncConnectionPool(max_idle_per_host=2, idle_timeout=30, host_sizes={})
+        async with Server({"/close": CLOSE}) as server:
+            responses = [await request("GET", server.url("/close"), pool=pool) for _ in range(2)]
+            await pool.close()
+        return server, responses
+
+    server, responses = run(main())
+    assert [response.body for response in responses] == [b"ok", b"ok"]
+    assert server.connections == 2
+    assert not any(response.reused for response in responses)
+
+
+def test_redirect_follows_on_the_same_connection():
+    async def main():
+        pool = AsyncConnectionPool(max_idle_per_host=2, idle_timeout=30, host_sizes={})
+        async with Server({"/old": REDIRECT, "/ok": OK}) as server:
+            response = await request("GET", server.url("/old"), pool=pool)
+            await pool.close()
+        return server, response
+
+    server, response = run(main())
+    assert response.status_code == 200 and response.body == b"ok"
+    assert response.url.endswith("/ok")
+    assert server.requests == ["/old", "/ok"]
+    assert server.connections == 1
+
+
+def test_failed_request_still_reports_total():
+    async def main():
+        # Bind and close a server so the port refuses connections
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        timings = {}
+        with pytest.raises(OSError):
+            await request("GET", f"http://127.0.0.1:{port}/", timings=timings)
+        return timings
+
+    timings = run(main())
+    assert timings["phase"] == "connect"
+    assert "connect" in timings and "total" in timings
+    assert "ttfb" not in timings
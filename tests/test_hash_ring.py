@@ -0,0 +1,55 @@
+"""
+Hash Ring tests
+Even shares and minimal key movement when owners join or leave
+"""
+
+from collections import Counter
+
+from hash_ring import HashRing
+
+KEYS = [f"https://site{i}.example/health" for i in range(20_000)]
+
+
+def assignment(ring):
+    return {key: ring.node_for(key) for key in KEYS}
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing().node_for("key") is None
+
+
+def test_shares_are_roughly_even():
+    ring = HashRing([f"node{i}" for i in range(4)], vnodes=128)
+    shares = Counter(assignment(ring).values())
+    assert set(shares) == set(ring.nodes)
+    assert max(shares.values()) < 1.3 * len(KEYS) / 4
+    assert min(shares.values()) > 0.7 * len(KEYS) / 4
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(["a", "b", "c"])
+    before = assignment(ring)
+    ring.add_node("d")
+    after = assignment(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == "d" for key in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(["a", "b", "c", "d"])
+    before = assignment(ring)
+    ring.remove_node("b")
+    after = assignment(ring)
+    assert all(before[key] == "b" for key in KEYS if before[key] != after[key])
+    assert "b" not in after.values()
+
+    ring.add_node("b")
+    assert assignment(ring) == before
+
+
+def test_assignment_is_stable_across_instances_and_order():
+    assert assignment(HashRing(["a", "b", "c"])) == assignment(HashRing(["c", "a", "b"]))
+    ring = HashRing(["a"])
+    ring.add_node("a")
+    assert ring.nodes == ["a"]
@@ -0,0 +1,108 @@
+"""
+History Store tests
+Ring wraparound, file growth, resizing and one record per resolution interval
+"""
+
+import pytest
+
+from history_store import HistoryStore
+
+# A timestamp on a whole minute, so resolution intervals start at BASE
+BASE = 1_700_000_040
+
+
+def open_store(tmp_path, slots=4, max_targets=8, resolution=1):
+    return HistoryStore(str(tmp_path / "history.bin"), slots=slots, max_targets=max_targets,
+                        resolution=resolution)
+
+
+def up(total=0.1):
+    return {"status": "UP", "code": 200, "response_time": total}
+
+
+def timestamps(store, name):
+    return [record["timestamp"] for record in store.records(name)]
+
+
+def test_ring_wraps_keeping_newest_records_in_order(tmp_path):
+    store = open_store(tmp_path, slots=4)
+    for i in range(10):
+        store.record("a", up(), BASE + i)
+    assert timestamps(store, "a") == [BASE + 6, BASE + 7, BASE + 8, BASE + 9]
+    assert [record["timestamp"] for record in store.records("a", limit=2)] == [BASE + 8, BASE + 9]
+    assert timestamps(store, "a")[-1] == store.summary("a")["last_check"]
+    store.close()
+
+
+def test_records_round_trip_fields(tmp_path):
+    store = open_store(tmp_path)
+    store.record("a", {"status": "DOWN", "code": 503, "timings": {"dns": 0.002, "connect": 0.01, "total": 0.5}},
+                 BASE)
+    [record] = store.records("a")
+    assert record["status"] == "DOWN"
+    assert record["code"] == 503
+    # Phases that were not measured (tls on plain HTTP) are left out
+    assert record["timings"] == {"dns": 0.002, "connect": 0.01, "total": 0.5}
+    store.close()
+
+
+def test_file_grows_as_targets_are_added_and_reopens(tmp_path):
+    store = open_store(tmp_path, max_targets=8)
+    assert store.capacity == 1
+    for target in range(5):
+        for i in range(3):
+            store.record(f"t{target}", up(), BASE + 10 * target + i)
+    assert store.capacity >= 5
+    store.close()
+
+    store = open_store(tmp_path, max_targets=8)
+    for target in range(5):
+        assert timestamps(store, f"t{target}") == [BASE + 10 * target + i for i in range(3)]
+    store.close()
+
+
+def test_full_store_refuses_new_targets(tmp_path):
+    store = open_store(tmp_path, max_targets=2)
+    store.record("a", up(), BASE)
+    store.record("b", up(), BASE)
+    with pytest.raises(ValueError):
+        store.record("c", up(), BASE)
+    store.forget("a")
+    store.record("c", up(), BASE)
+    assert timestamps(store, "c") == [BASE]
+    store.close()
+
+
+def test_resize_keeps_newest_records(tmp_path):
+    store = open_store(tmp_path, slots=8, max_targets=4)
+    for i in range(11):
+        store.record("a", up(), BASE + i)
+    store.record("b", up(), BASE)
+    store.close()
+
+    store = open_store(tmp_path, slots=4, max_targets=16)
+    assert timestamps(store, "a") == [BASE + 7, BASE + 8, BASE + 9, BASE + 10]
+    assert timestamps(store, "b") == [BASE]
+    store.record("a", up(), BASE + 11)
+    assert timestamps(store, "a") == [BASE + 8, BASE + 9, BASE + 10, BASE + 11]
+    store.close()
+
+    store = open_store(tmp_path, slots=16, max_targets=16)
+    assert timestamps(store, "a") == [BASE + 8, BASE + 9, BASE + 10, BASE + 11]
+    store.record("a", up(), BASE + 12)
+    assert len(store.records("a")) == 5
+    store.close()
+
+
+def test_one_record_per_interval_keeps_worst_result(tmp_path):
+    store = open_store(tmp_path, slots=16, resolution=60)
+    store.record("a", up(), BASE)
+    store.record("a", {"status": "DOWN", "code": 503}, BASE + 15)
+    store.record("a", up(), BASE + 30)
+    store.record("a", {"status": "DEGRADED", "code": 200}, BASE + 45)
+    store.record("a", up(), BASE + 60)
+
+    records = store.records("a")
+    assert [(record["timestamp"], record["status"]) for record in records] == [(BASE, "DOWN"), (BASE + 60, "UP")]
+    assert records[0]["code"] == 503
+    store.close()
@@ -0,0 +1,105 @@
+"""
+Latency Sketch tests
+Quantile error bounds, exact merges, bin collapsing and serialisation
+"""
+
+import json
+import random
+
+import pytest
+
+from latency_sketch import DDSketch, WindowedSketch
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999)
+
+
+def exact_quantile(values, q):
+    """The value the sketch estimates: the one at rank q * (n - 1) of the sorted data"""
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def latencies(count, seed=1):
+    generator = random.Random(seed)
+    return [generator.lognormvariate(-2.5, 1.0) for _ in range(count)]
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.02, 0.05])
+def test_quantiles_within_relative_accuracy(accuracy):
+    values = latencies(20_000)
+    sketch = DDSketch(accuracy)
+    for value in values:
+        sketch.add(value)
+    for q in QUANTILES:
+        expected = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - expected) <= accuracy * expected
+    # The extremes are clamped to the observed range, never past it
+    assert min(values) <= sketch.quantile(0) <= min(values) * (1 + accuracy)
+    assert max(values) * (1 - accuracy) <= sketch.quantile(1) <= max(values)
+    assert sketch.count == len(values)
+
+
+def test_zero_and_empty():
+    assert DDSketch().quantile(0.5) is None
+    sketch = DDSketch()
+    for value in [0.0] * 60 + [1.0] * 40:
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(0.9) == pytest.approx(1.0, rel=0.01)
+
+
+def test_merge_equals_one_sketch_of_all_values():
+    values = latencies(5000)
+    combined, left, right = DDSketch(), DDSketch(), DDSketch()
+    for i, value in enumerate(values):
+        combined.add(value)
+        (left if i % 3 else right).add(value)
+    left.merge(right)
+    assert left.bins == combined.bins
+    assert left.count == combined.count
+    for q in QUANTILES:
+        assert left.quantile(q) == combined.quantile(q)
+
+    with pytest.raises(ValueError):
+        left.merge(DDSketch(0.05))
+
+
+def test_collapsing_keeps_high_quantiles_accurate():
+    # Six decades of values need far more than 64 bins at 1% accuracy
+    generator = random.Random(3)
+    values = [10 ** generator.uniform(-4, 2) for _ in range(10_000)]
+    sketch = DDSketch(0.01, max_bins=64)
+    for value in values:
+        sketch.add(value)
+    assert len(sketch.bins) <= 64
+    for q in (0.99, 0.999):
+        expected = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - expected) <= 0.01 * expected
+
+
+def test_round_trip_through_json():
+    sketch = DDSketch()
+    for value in latencies(1000):
+        sketch.add(value)
+    restored = DDSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.bins == sketch.bins
+    assert (restored.count, restored.min, restored.max) == (sketch.count, sketch.min, sketch.max)
+    assert restored.quantile(0.95) == sketch.quantile(0.95)
+
+    empty = DDSketch.from_dict(DDSketch().to_dict())
+    assert empty.quantile(0.5) is None
+
+
+def test_windowed_sketch_expires_old_windows():
+    windowed = WindowedSketch(window=60, windows=3)
+    for minute in range(5):
+        windowed.add(float(minute + 1), minute * 60 + 30)
+    assert sorted(windowed.sketches) == [2, 3, 4]
+    assert windowed.merged(now=4 * 60 + 30).count == 3
+    assert windowed.merged(windows=1, now=4 * 60 + 30).quantile(0.5) == pytest.approx(5.0, rel=0.01)
+
+    restored = WindowedSketch.from_dict(json.loads(json.dumps(windowed.to_dict())), windows=3)
+    other = WindowedSketch(window=60, windows=3)
+    other.add(10.0, 5 * 60)
+    restored.merge(other)
+    assert sorted(restored.sketches) == [3, 4, 5]
@@ -0,0 +1,152 @@
+"""
+Outbox tests
+Dedup keys, claim timeouts, retry backoff, dead letters and per-stream ordering
+"""
+
+import time
+
+import pytest
+
+from outbox import Outbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(str(tmp_path / "outbox.db"), batch=10, retry_base=0, retry_max=0, max_attempts=3,
+                  claim_timeout=60)
+
+
+class Recorder:
+    """Handler that records what it was given and answers from a list of results"""
+
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(items)
+        return [self.ok] * len(items)
+
+
+def test_put_deduplicates_by_key(outbox):
+    assert outbox.put("alert", {"message": "down"}, key="a:1")
+    assert not outbox.put("alert", {"message": "changed"}, key="a:1")
+    # Without a key the kind and payload are the key
+    assert outbox.put("alert", {"message": "down"})
+    assert not outbox.put("alert", {"message": "down"})
+    assert outbox.pending() == 2
+    assert outbox.stats["duplicates"] == 2
+
+    outbox.register("alert", Recorder())
+    outbox._flush_once()
+    assert outbox.pending() == 0
+    # Delivered items are remembered, so a re-queued duplicate is still dropped
+    assert not outbox.put("alert", {"message": "down"}, key="a:1")
+
+
+def test_delivers_batches_with_keys(outbox):
+    handler = Recorder()
+    outbox.register("alert", handler)
+    for i in range(3):
+        outbox.put("alert", {"n": i}, key=f"k{i}")
+    assert outbox._flush_once() == 3
+    assert handler.batches == [[("k0", {"n": 0}), ("k1", {"n": 1}), ("k2", {"n": 2})]]
+    assert outbox._flush_once() == 0
+    assert outbox.stats["delivered"] == 3
+
+
+def test_unsettled_claim_is_redelivered_after_timeout(outbox):
+    outbox.put("alert", {"message": "down"}, key="a:1")
+    now = time.time()
+    [(_, key, _, _, attempts)] = outbox._claim(now)
+    assert (key, attempts) == ("a:1", 1)
+
+    # The claiming process died before settling: nobody else takes the item until the claim times out
+    assert outbox._claim(now + 1) == []
+    [(_, key, _, _, attempts)] = outbox._claim(now + outbox.claim_timeout)
+    assert (key, attempts) == ("a:1", 2)
+
+
+def test_failures_retry_then_become_dead_letters(outbox):
+    handler = Recorder(ok=False)
+    outbox.register("alert", handler)
+    outbox.put("alert", {"message": "down"}, key="a:1")
+    for _ in range(5):
+        outbox._flush_once()
+    assert len(handler.batches) == outbox.max_attempts
+    assert outbox.pending() == 0
+    assert (outbox.stats["failed"], outbox.stats["dead"], outbox.stats["delivered"]) == (2, 1, 0)
+
+
+def test_retry_backs_off_exponentially(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"), retry_base=5, retry_max=12, max_attempts=10)
+    outbox.register("alert", Recorder(ok=False))
+    outbox.put("alert", {"message": "down"}, key="a:1")
+
+    delays = []
+    now = time.time()
+    for _ in range(4):
+        claimed = outbox._claim(now + 3600)
+        outbox._settle(claimed, [False], "refused")
+        next_attempt = outbox._conn.execute("SELECT next_attempt FROM outbox").fetchone()[0]
+        delays.append(next_attempt - time.time())
+    assert [round(delay) for delay in delays] == [5, 10, 12, 12]
+
+
+def test_handler_errors_and_missing_handlers_are_retried(outbox):
+    def broken(items):
+        raise RuntimeError("boom")
+
+    outbox.register("alert", broken)
+    outbox.put("alert", {"message": "down"}, key="a:1")
+    outbox.put("unknown", {"message": "?"}, key="u:1")
+    outbox._flush_once()
+    errors = dict(outbox._conn.execute("SELECT key, last_error FROM outbox").fetchall())
+    assert errors == {"a:1": "boom", "u:1": "No handler for unknown"}
+    assert outbox.pending() == 2
+
+
+def test_stream_items_are_delivered_one_at_a_time_in_order(outbox):
+    handler = Recorder()
+    outbox.register("incident", handler)
+    for step in ("create", "update", "resolve"):
+        outbox.put("incident", {"step": step}, key=f"site:{step}", stream="site")
+    outbox.put("incident", {"step": "other"}, key="other:create", stream="other")
+
+    while outbox._flush_once():
+        pass
+    assert [[payload["step"] for _, payload in batch] for batch in handler.batches] == [
+        ["create", "other"], ["update"], ["resolve"]]
+
+
+def test_failed_stream_item_holds_back_later_ones(outbox):
+    outbox.register("incident", Recorder(ok=False))
+    outbox.put("incident", {"step": "create"}, key="site:create", stream="site")
+    outbox.put("incident", {"step": "update"}, key="site:update", stream="site")
+    outbox.retry_base = outbox.retry_max = 60
+    outbox._flush_once()
+    # The create is waiting to retry, so the update is not attempted before it
+    assert outbox._claim(time.time()) == []
+
+
+def test_pending_items_survive_reopening(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    first = Outbox(path)
+    first.put("alert", {"message": "down"}, key="a:1")
+    first._conn.close()
+
+    second = Outbox(path)
+    handler = Recorder()
+    second.register("alert", handler)
+    assert second._flush_once() == 1
+    assert handler.batches == [[("a:1", {"message": "down"})]]
+
+
+def test_placeholder_refs(outbox):
+    ref = outbox.new_ref("site")
+    assert outbox.resolve(ref) is None
+    outbox.set_ref(ref, "incident-7")
+    assert outbox.resolve(ref) == "incident-7"
+    assert outbox.resolve("incident-8") == "incident-8"
+    outbox.forget_ref(ref)
+    assert outbox.resolve(ref) is None
@@ -0,0 +1,95 @@
+"""
+Rate Limiter tests
+GCRA admission, server-requested pauses and state shared through SQLite
+"""
+
+import pytest
+
+from rate_limiter import RateLimiter, SQLiteRateState, open_rate_state, parse_reset, parse_retry_after
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_paced():
+    clock = Clock()
+    limiter = RateLimiter("api", rate=2, capacity=3, clock=clock)
+    # A full bucket lets ``capacity`` requests straight through...
+    assert [limiter.reserve() for _ in range(3)] == [0, 0, 0]
+    # ...after which each caller is handed the next slot, one interval apart
+    assert [limiter.reserve() for _ in range(3)] == pytest.approx([0.5, 1.0, 1.5])
+    stats = limiter.wait_stats()
+    assert stats["requests"] == 6 and stats["delayed"] == 3
+    assert stats["max_wait"] == pytest.approx(1.5)
+
+
+def test_bucket_refills_over_time():
+    clock = Clock()
+    limiter = RateLimiter("api", rate=1, capacity=2, clock=clock)
+    assert [limiter.reserve() for _ in range(2)] == [0, 0]
+    assert limiter.reserve() == pytest.approx(1.0)
+    # Idle long enough to earn the burst back, but never more than the burst
+    clock.now += 100
+    assert [limiter.reserve() for _ in range(2)] == [0, 0]
+    assert limiter.reserve() == pytest.approx(1.0)
+
+
+def test_zero_rate_admits_everything():
+    limiter = RateLimiter("api", clock=Clock())
+    assert all(limiter.reserve() == 0 for _ in range(1000))
+
+
+def test_retry_after_pauses_every_caller():
+    clock = Clock()
+    limiter = RateLimiter("api", rate=0, clock=clock)
+    limiter.observe(429, {"Retry-After": "30"})
+    assert limiter.pause_remaining() == pytest.approx(30)
+    assert limiter.reserve() == pytest.approx(30)
+    assert limiter.stats["throttled"] == 1
+    clock.now += 30
+    assert limiter.reserve() == 0
+
+
+def test_exhausted_quota_pauses_until_reset():
+    clock = Clock()
+    limiter = RateLimiter("api", rate=0, clock=clock)
+    limiter.observe(200, {"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "0",
+                          "X-RateLimit-Reset": str(clock.now + 12)})
+    assert limiter.pause_remaining() == pytest.approx(12)
+    assert limiter.wait_stats()["limit"] == "100"
+
+
+def test_pause_is_capped():
+    clock = Clock()
+    limiter = RateLimiter("api", clock=clock, max_pause=60)
+    limiter.observe(503, {"Retry-After": "86400"})
+    assert limiter.pause_remaining() == pytest.approx(60)
+
+
+def test_header_parsing():
+    now = 1_700_000_000.0
+    assert parse_retry_after("12", now) == 12
+    assert parse_retry_after("Tue, 14 Nov 2023 22:13:40 GMT", now) == pytest.approx(20)
+    assert parse_retry_after("soon", now) is None
+    assert parse_reset("5", now) == 5
+    assert parse_reset(str(now + 7), now) == pytest.approx(7)
+    assert parse_reset(None, now) is None
+
+
+def test_sqlite_state_is_shared_between_limiters(tmp_path):
+    clock = Clock()
+    spec = f"sqlite:///{tmp_path / 'limits.db'}"
+    first = RateLimiter("api", rate=1, capacity=1, state=open_rate_state(spec, "api"), clock=clock)
+    second = RateLimiter("api", rate=1, capacity=1, state=open_rate_state(spec, "api"), clock=clock)
+    assert isinstance(first.state, SQLiteRateState)
+    assert first.reserve() == 0
+    assert second.reserve() == pytest.approx(1.0)
+    assert first.reserve() == pytest.approx(2.0)
+
+    with pytest.raises(ValueError):
+        open_rate_state("redis://localhost", "api")
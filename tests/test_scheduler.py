@@ -0,0 +1,114 @@
+"""
+Scheduler tests
+Grid anchoring under jitter, catching up after stalls, rescheduling and the probe budget
+"""
+
+import random
+
+import pytest
+
+from scheduler import AdaptiveIntervalPolicy, ProbeBudget, TargetScheduler, phase_offset, take_due
+
+
+def run_until(scheduler, end):
+    """Fire every check due before ``end`` exactly when due; returns (time, name) pairs"""
+    fired = []
+    while scheduler.next_due() is not None and scheduler.next_due() < end:
+        now = scheduler.next_due()
+        fired.extend((now, name) for name in scheduler.pop_due(now))
+    return fired
+
+
+def test_phase_offsets_spread_targets_across_the_interval():
+    offsets = [phase_offset(f"https://site{i}.example", 60) for i in range(1000)]
+    assert all(0 <= offset < 60 for offset in offsets)
+    # Roughly uniform: every 6 s bucket gets a share
+    buckets = [0] * 10
+    for offset in offsets:
+        buckets[int(offset // 6)] += 1
+    assert min(buckets) > 50
+    assert phase_offset("a", 60) == phase_offset("a", 60)
+
+
+def test_jitter_stays_within_bounds_and_does_not_accumulate():
+    random.seed(7)
+    scheduler = TargetScheduler(jitter=0.1)
+    scheduler.add("a", 10, now=0)
+    anchor = phase_offset("a", 10)
+
+    fired = run_until(scheduler, 10_000)
+    assert len(fired) == pytest.approx(1000, abs=1)
+    for run, (when, _) in enumerate(fired):
+        # Every run is within +/-10% of its slot on the original grid, however long it has run
+        assert abs(when - (anchor + run * 10)) <= 1.0
+    assert len({round(when - (anchor + run * 10), 6) for run, (when, _) in enumerate(fired)}) > 1
+    assert scheduler.skipped_runs == 0
+
+
+def test_late_tick_skips_missed_runs_and_stays_on_grid():
+    scheduler = TargetScheduler(jitter=0)
+    scheduler.add("a", 10, now=0)
+    anchor = phase_offset("a", 10)
+
+    # The loop stalls for 35 s past the first due time
+    assert scheduler.pop_due(anchor + 35) == ["a"]
+    assert scheduler.skipped_runs == 3
+    assert scheduler.next_due() == pytest.approx(anchor + 40)
+    assert scheduler.pop_due(anchor + 39.9) == []
+    assert scheduler.pop_due(anchor + 40) == ["a"]
+    assert scheduler.next_due() == pytest.approx(anchor + 50)
+
+
+def test_reschedule_and_remove():
+    scheduler = TargetScheduler(jitter=0)
+    scheduler.add("a", 60, now=0)
+    scheduler.add("b", 60, now=0)
+    last_run = phase_offset("a", 60)
+    scheduler.pop_due(last_run)
+
+    # A shorter interval runs one new interval after the last run...
+    scheduler.reschedule("a", 15, now=last_run + 5)
+    assert scheduler.interval_of("a") == 15
+    # ...or at once when that time has already passed
+    scheduler.reschedule("a", 2, now=last_run + 5)
+    assert scheduler.pop_due(last_run + 5) == ["a"]
+
+    scheduler.remove("b")
+    assert "b" not in scheduler
+    assert "b" not in [name for _, name in run_until(scheduler, 1000)]
+    assert len(scheduler) == 1
+
+
+def test_pop_due_limit_leaves_the_rest_due():
+    scheduler = TargetScheduler(jitter=0)
+    for i in range(5):
+        scheduler.add(f"t{i}", 60, now=0)
+    assert len(scheduler.pop_due(100, limit=2)) == 2
+    assert scheduler.next_due() <= 100
+    assert len(scheduler.pop_due(100)) == 3
+
+
+def test_probe_budget_paces_due_checks():
+    scheduler = TargetScheduler(jitter=0)
+    for i in range(5):
+        scheduler.add(f"t{i}", 60, now=0)
+    budget = ProbeBudget(2, 10, clock=lambda: 0)
+
+    assert len(take_due(scheduler, budget, 60)) == 2
+    assert budget.exhausted == 1
+    assert budget.next_available(60) == pytest.approx(65)
+    assert take_due(scheduler, budget, 62) == []
+    assert len(take_due(scheduler, budget, 70)) == 2
+    assert len(take_due(scheduler, budget, 75)) == 1
+
+
+def test_adaptive_interval_drops_on_failure_and_backs_off_when_stable():
+    policy = AdaptiveIntervalPolicy(min_interval=15, max_factor=4, growth=2, stable_runs=3)
+    assert policy.next_interval("a", 60, 60, "DOWN") == 15
+    assert policy.next_interval("a", 60, 15, "UP") == 30
+    assert policy.next_interval("a", 60, 30, "UP") == 60
+    intervals = [60]
+    for _ in range(12):
+        intervals.append(policy.next_interval("a", 60, intervals[-1], "UP"))
+    assert intervals[-1] == 240
+    assert max(intervals) == 240
@@ -0,0 +1,148 @@
+"""
+SLO Engine tests
+Burn-rate math on synthetic history, one breach per target, and breaches surviving restarts
+"""
+
+import pytest
+
+import slo_engine
+from history_store import HistoryStore
+from slo_engine import BurnRule, SLOEngine
+from state_store import StateStore
+
+NOW = 1_700_086_400
+PAGE = BurnRule(3600, 300, 14.4, "page")
+TICKET = BurnRule(86400, 7200, 3, "ticket")
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.bin"), slots=2048, max_targets=16, resolution=60)
+    yield store
+    store.close()
+
+
+def probe(history, name, statuses, start, step=60):
+    for i, status in enumerate(statuses):
+        history.record(name, {"status": status, "code": 200 if status == "UP" else 503}, start + i * step)
+
+
+def engine(history, rules, **kwargs):
+    kwargs.setdefault("min_samples", 10)
+    kwargs.setdefault("max_gap", 120)
+    return SLOEngine(history, rules=rules, slo_target=99.9, **kwargs)
+
+
+def test_burn_rates_of_a_recent_outage(history):
+    # One probe a minute for the last hour, the final ten minutes DOWN
+    probe(history, "flaky", ["UP"] * 50 + ["DOWN"] * 10, NOW - 3600)
+    probe(history, "healthy", ["UP"] * 60, NOW - 3600)
+
+    [breach] = engine(history, [PAGE]).evaluate(NOW)
+    assert breach["name"] == "flaky"
+    assert breach["error_rate"] == pytest.approx(600 / 3600, abs=1e-5)
+    # 1/6 of the hour down against a 0.1% budget, and the whole short window down
+    assert breach["long_burn_rate"] == pytest.approx(166.67, abs=0.01)
+    assert breach["short_burn_rate"] == pytest.approx(1000)
+    assert breach["samples"] == 60
+
+
+def test_short_window_must_also_breach(history):
+    # Down for most of the hour but recovered for the last 10 minutes
+    probe(history, "recovered", ["DOWN"] * 50 + ["UP"] * 10, NOW - 3600)
+    assert engine(history, [PAGE]).evaluate(NOW) == []
+
+
+def test_min_samples(history):
+    probe(history, "new", ["DOWN"] * 5, NOW - 300)
+    assert engine(history, [PAGE]).evaluate(NOW) == []
+    assert len(engine(history, [PAGE], min_samples=5).evaluate(NOW)) == 1
+
+
+def test_gaps_are_capped_at_max_gap(history):
+    # Ten DOWN minutes, 40 minutes with the agent stopped, then ten UP minutes
+    probe(history, "gap", ["DOWN"] * 10, NOW - 3600)
+    probe(history, "gap", ["UP"] * 10, NOW - 600)
+    rule = BurnRule(3600, 3600, 1, "ticket")
+
+    [breach] = engine(history, [rule], max_gap=120).evaluate(NOW)
+    # The last DOWN result only counts for max_gap seconds, not the whole gap
+    assert breach["error_rate"] == pytest.approx((9 * 60 + 120) / (9 * 60 + 120 + 600), abs=1e-5)
+    [breach] = engine(history, [rule], max_gap=3600).evaluate(NOW)
+    assert breach["error_rate"] == pytest.approx(3000 / 3600, abs=1e-5)
+
+
+def test_small_chunks_give_the_same_rates(history):
+    for target in range(6):
+        probe(history, f"t{target}", ["UP"] * (40 + target) + ["DOWN"] * (20 - target), NOW - 3600)
+    whole = engine(history, [PAGE]).evaluate(NOW)
+    chunked = engine(history, [PAGE], chunk_records=1).evaluate(NOW)
+    assert len(whole) == 6
+
+    def by_name(breaches):
+        return sorted(breaches, key=lambda breach: breach["name"])
+
+    assert by_name(chunked) == by_name(whole)
+
+
+class Calls:
+    def __init__(self, monkeypatch):
+        self.alerts = []
+        self.opened = []
+        self.updates = []
+        monkeypatch.setattr(slo_engine, "send_alert", lambda message, url=None: self.alerts.append(message))
+        monkeypatch.setattr(slo_engine, "open_portia_incident", self.open)
+        monkeypatch.setattr(slo_engine, "update_portia_incident",
+                            lambda client, stream, incident_id, **fields: self.updates.append((incident_id, fields)))
+
+    def open(self, client, stream, **fields):
+        self.opened.append(fields)
+        return f"incident-{len(self.opened)}"
+
+
+class Portia:
+    enabled = True
+
+
+def test_tick_alerts_once_per_target_and_persists(history, tmp_path, monkeypatch):
+    calls = Calls(monkeypatch)
+    store = StateStore(str(tmp_path / "state.db"))
+    # Breaches both rules: a day with a steady 1% error rate ending in a 10 minute outage
+    probe(history, "flaky", (["UP"] * 99 + ["DOWN"]) * 14 + ["UP"] * 30 + ["DOWN"] * 10, NOW - 86400)
+
+    first = engine(history, [TICKET, PAGE], store=store)
+    assert {breach["severity"] for breach in first.evaluate(NOW)} == {"ticket", "page"}
+    # Reported once, under the most severe rule
+    [breach] = first.tick(Portia(), now=NOW)
+    assert breach["severity"] == "page"
+    assert len(calls.alerts) == 1
+    assert calls.opened[0]["severity"] == "high"
+    assert store.slo_breaches()["flaky"]["incident_id"] == "incident-1"
+
+    # A restarted agent picks the breach up instead of alerting again
+    second = engine(history, [TICKET, PAGE], store=store)
+    assert second.tick(Portia(), now=NOW + 60)
+    assert len(calls.alerts) == 1 and len(calls.opened) == 1
+
+    # Long after the last probe nothing is in the windows, so the breach clears
+    assert second.tick(Portia(), now=NOW + 2 * 86400) == []
+    [(incident_id, fields)] = calls.updates
+    assert incident_id == "incident-1"
+    assert fields["status"] == "resolved"
+    assert store.slo_breaches() == {}
+    store.close()
+
+
+def test_handover_clears_breach_recorded_by_previous_owner(history, tmp_path, monkeypatch):
+    calls = Calls(monkeypatch)
+    store = StateStore(str(tmp_path / "state.db"))
+    probe(history, "moved", ["UP"] * 60, NOW - 3600)
+    agent = engine(history, [PAGE], store=store)
+    assert agent.tick(Portia(), now=NOW, owned=set()) == []
+
+    # Another agent recorded a breach for the target, which has since recovered, then handed it over
+    store.save_slo_breach("moved", PAGE.label, "page", NOW - 600, "incident-9")
+    assert agent.tick(Portia(), now=NOW, owned={"moved"}) == []
+    assert calls.updates[0][0] == "incident-9"
+    assert store.slo_breaches() == {}
+    store.close()